@@ -0,0 +1,431 @@
+"""
+검색 파이프라인 지연시간/처리량 벤치마크 (외부 서버 없이 실행)
+
+- Qdrant 는 로컬 메모리 모드, vLLM 은 지연시간을 지정할 수 있는 가짜 completions 서버로 대체
+- 합성 기사 코퍼스를 실제 임베딩 모델로 적재한 뒤 main.app 에 질문 목록을 지정한 동시성으로 재생
+- 요청별 종단 지연시간과 단계별(키워드 LLM / 임베딩 / Qdrant / 재정렬 / 직렬화) p50/p95/p99, QPS 를 JSON 으로 출력
+- qdrant_utils 의 검색 방식(hybrid / rerank / fusion)과 qdrant_multi(동기 클라이언트) 를 같은 조건에서 비교
+
+    python benchmark.py
+    python benchmark.py --docs 5000 --requests 500 --concurrency 16 --output bench.json
+    python benchmark.py --strategies hybrid,multi --llm-latency-ms 300 --queries questions.txt
+    python benchmark.py --strategies hybrid,fusion --partition-by-year   # 연도별 파티션 컬렉션 + 라우터로 측정
+
+--queries 는 한 줄에 질문 하나인 텍스트 파일 또는 question 필드가 있는 JSONL.
+캐시는 기본으로 끄고 측정 (--with-caches 로 켜면 반복 질문은 캐시에서 응답).
+"""
+import os, sys, json, time, random, socket, asyncio, argparse, tempfile, threading, contextlib
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from metrics import percentile
+
+STAGES = ["keyword_llm", "embed", "qdrant", "rerank", "serialize"]
+STRATEGIES = ["hybrid", "rerank", "fusion", "multi"]
+
+# ✅ 합성 코퍼스 재료
+TOPIC_TERMS = {
+    "경제": ["금리", "환율", "물가", "부동산", "수출", "소비"],
+    "IT": ["반도체", "인공지능", "클라우드", "스마트폰", "데이터센터", "5G"],
+    "암호화폐": ["비트코인", "이더리움", "거래소", "스테이블코인", "블록체인", "채굴"],
+    "사회": ["교육", "저출산", "고령화", "교통", "의료", "노동"],
+    "국제": ["미국", "중국", "일본", "유럽연합", "무역", "관세"],
+}
+REPORTERS = ["김민수", "이서연", "박지훈", "최유진", "정하늘", "강도윤"]
+ORGANIZATIONS = ["한국경제신문", "IT데일리", "코인뉴스", "사회일보", "글로벌타임즈"]
+WEEKDAYS = ["월", "화", "수", "목", "금", "토", "일"]
+SENTENCES = [
+    "{term} 관련 정책 변화가 시장에 영향을 주고 있다.",
+    "전문가들은 {term} 흐름이 당분간 이어질 것으로 내다봤다.",
+    "{term} 분야 기업들의 실적 발표가 이어졌다.",
+    "정부는 {term} 대책을 다음 달 발표할 예정이다.",
+    "{term}에 대한 관심이 높아지면서 투자도 늘고 있다.",
+    "업계에서는 {term} 경쟁이 더 치열해질 것이라는 분석이 나온다.",
+]
+
+# ✅ 요청 단위 단계별 누적 시간 (요청 task 와 그 하위 task/스레드에 전파)
+_stage_times: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_times", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    times = _stage_times.get()
+    if times is not None:
+        times[stage] = times.get(stage, 0.0) + seconds
+
+
+def timed_async(stage: str, fn: Callable) -> Callable:
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            record_stage(stage, time.perf_counter() - start)
+    return wrapper
+
+
+def timed_sync(stage: str, fn: Callable) -> Callable:
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record_stage(stage, time.perf_counter() - start)
+    return wrapper
+
+
+# ✅ 클라이언트/모델의 공개 메서드 호출 시간을 한 단계로 기록하는 프록시
+class TimedProxy:
+    def __init__(self, target, stage: str):
+        self._target = target
+        self._stage = stage
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        if asyncio.iscoroutinefunction(attr):
+            return timed_async(self._stage, attr)
+        return timed_sync(self._stage, attr)
+
+
+# ✅ 합성 기사 코퍼스 (seed 고정 → 실행마다 동일)
+def make_corpus(num_docs: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    topics = list(TOPIC_TERMS)
+    records = []
+    for i in range(num_docs):
+        topic = rng.choice(topics)
+        terms = rng.sample(TOPIC_TERMS[topic], 3)
+        year, month, day = rng.choice([2023, 2024, 2025]), rng.randint(1, 12), rng.randint(1, 28)
+        content = " ".join(rng.choice(SENTENCES).format(term=rng.choice(terms)) for _ in range(rng.randint(8, 20)))
+        records.append({
+            "id": i + 1,
+            "title_original": f"{terms[0]} {rng.choice(['전망', '동향', '논란', '급등', '하락', '확대'])}… {terms[1]}도 주목",
+            "content": content,
+            "organization": ORGANIZATIONS[topics.index(topic)],
+            "reporter": rng.choice(REPORTERS),
+            "year": year,
+            "month": month,
+            "date_day": day,
+            "date_weekday": WEEKDAYS[(year + month * 3 + day) % 7],
+            "topic": topic,
+            "url": f"https://news.example.com/articles/{i + 1}",
+            "main_image_url": f"https://news.example.com/images/{i + 1}.jpg",
+        })
+    return records
+
+
+# ✅ 기본 질문 세트: 규칙 기반 파서로 끝나는 질문 + LLM 이 필요한 질문을 섞음
+def make_queries(num_queries: int, seed: int) -> List[str]:
+    rng = random.Random(seed + 1)
+    templates = [
+        lambda t, r: f"{rng.choice([2023, 2024, 2025])}년 {rng.randint(1, 12)}월 {t} 기사",
+        lambda t, r: f"{t} {rng.choice(['전망', '동향'])}",
+        lambda t, r: f"{r} 기자가 쓴 {t} 기사",
+        lambda t, r: f"최근 {t} 관련 소식 알려줘",
+        lambda t, r: f"{t}은 왜 중요해?",
+        lambda t, r: f"작년 {t} 시장은 어땠어?",
+    ]
+    all_terms = [term for terms in TOPIC_TERMS.values() for term in terms]
+    return [rng.choice(templates)(rng.choice(all_terms), rng.choice(REPORTERS)) for _ in range(num_queries)]
+
+
+def load_queries(path: str) -> List[str]:
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                question = json.loads(line).get("question")
+                if question:
+                    queries.append(question)
+            else:
+                queries.append(line)
+    return queries
+
+
+# ✅ 가짜 vLLM completions 서버 (별도 스레드의 uvicorn, 실제 HTTP 왕복 포함)
+#    키워드 프롬프트에는 규칙 기반 파서 결과를 쉼표로 이어서 응답
+def build_stub_vllm(latency_ms: float, jitter_ms: float):
+    from fastapi import FastAPI, Request
+    from query_parser import parse_question, to_keywords
+
+    stub = FastAPI()
+
+    def complete(prompt: str) -> str:
+        if "키워드:" in prompt and "질문:" in prompt:
+            question = prompt.split("질문:", 1)[1].split("\n", 1)[0].strip()
+            return ", ".join(to_keywords(parse_question(question))) or question
+        return "요약 문장입니다. 두 번째 문장입니다."
+
+    @stub.post("/v1/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+        return {"choices": [{"index": i, "text": complete(p)} for i, p in enumerate(prompts)]}
+
+    return stub
+
+
+def start_stub_vllm(latency_ms: float, jitter_ms: float):
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        build_stub_vllm(latency_ms, jitter_ms), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.02)
+    print(f"🤖 가짜 vLLM 서버: 127.0.0.1:{port} (지연 {latency_ms}±{jitter_ms}ms)", file=sys.stderr)
+    return server, thread, f"http://127.0.0.1:{port}/v1/completions"
+
+
+# ✅ 메모리 모드 Qdrant 두 개에 같은 코퍼스 적재
+#    비동기(qdrant_utils/main) 와 동기(qdrant_multi) 클라이언트는 저장소를 공유할 수 없어서 각각 채움
+#    partitioned 면 양쪽 모두 연도별 파티션 컬렉션에 나눠 적재
+async def seed_collections(records: List[Dict], async_client, sync_client, collection: str, encode_batch_size: int,
+                           partitioned: bool = False):
+    import ingest
+    from qdrant_client.models import PointStruct, VectorParams, Distance
+    from qdrant_admin import SPARSE_VECTOR_NAME, ensure_collection, ensure_payload_indexes, partition_name
+
+    start = time.time()
+    texts = [ingest.build_embedding_text(r) for r in records]
+    vectors, sparse_vectors = await asyncio.to_thread(ingest.embed_batch, texts, encode_batch_size, True)
+    dim = len(vectors[0])
+
+    for i in range(0, len(records), 256):
+        chunk = list(zip(records[i:i + 256], vectors[i:i + 256], sparse_vectors[i:i + 256]))
+        groups: Dict[str, List] = {}
+        for r, v, sp in chunk:
+            payload = ingest.build_payload(r)
+            target = partition_name(collection, payload.get("year")) if partitioned else collection
+            groups.setdefault(target, []).append(
+                PointStruct(id=ingest.to_point_id(r["id"]), vector={"": v.tolist(), SPARSE_VECTOR_NAME: sp},
+                            payload=payload)
+            )
+        for target, points in groups.items():
+            if await ensure_collection(async_client, target, dim, sparse=True):
+                await ensure_payload_indexes(async_client, target)
+            await async_client.upsert(target, points=points)
+            if sync_client is not None:
+                if not sync_client.collection_exists(target):
+                    sync_client.create_collection(target, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+                sync_client.upsert(target, points=[
+                    PointStruct(id=p.id, vector=p.vector[""], payload=p.payload) for p in points
+                ])
+    print(f"📦 합성 기사 {len(records)}건 적재 ({time.time() - start:.1f}초, dim={dim})", file=sys.stderr)
+
+
+def summarize(values: List[float], wall_time: float) -> Dict:
+    values = sorted(values)
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "count": len(values),
+        "qps": round(len(values) / wall_time, 2) if wall_time else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+# ✅ 질문 목록을 concurrency 개 작업자로 재생
+async def replay(run_one: Callable, queries: List[str], num_requests: int, concurrency: int, warmup: int) -> Dict:
+    for q in queries[:warmup]:
+        await run_one(q)
+
+    latencies: List[float] = []
+    stage_samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < num_requests:
+            question = queries[next_index % len(queries)]
+            next_index += 1
+            times: Dict[str, float] = {}
+            token = _stage_times.set(times)
+            start = time.perf_counter()
+            try:
+                await run_one(question)
+                latencies.append(time.perf_counter() - start)
+                for stage, seconds in times.items():
+                    stage_samples[stage].append(seconds)
+            except Exception as e:
+                errors += 1
+                print(f"❌ 요청 실패 ({question}): {e!r}", file=sys.stderr)
+            finally:
+                _stage_times.reset(token)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - start
+
+    return {
+        "requests": num_requests,
+        "errors": errors,
+        "wall_time_s": round(wall_time, 3),
+        "latency": summarize(latencies, wall_time),
+        # 단계별 값은 요청 하나 안에서 해당 단계에 쓴 누적 시간 (동시 호출은 합산)
+        "stages": {stage: summarize(samples, wall_time) for stage, samples in stage_samples.items() if samples},
+    }
+
+
+async def run(args):
+    os.environ.setdefault("SUMMARY_DB_PATH", os.path.join(args.workdir, "summaries.sqlite3"))
+    os.environ.setdefault("INGEST_VERSION_FILE", os.path.join(args.workdir, "ingest_version"))
+
+    import fastapi.routing
+    import httpx
+    from fastapi.responses import JSONResponse
+    from qdrant_client import AsyncQdrantClient, QdrantClient
+    import vllm_utils, qdrant_utils, resources, main
+    from cache_utils import keyword_cache, vector_cache
+
+    server, thread, stub_url = start_stub_vllm(args.llm_latency_ms, args.llm_jitter_ms)
+    vllm_utils.VLLM_API_URL = stub_url
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise SystemExit(f"❌ 알 수 없는 검색 방식: {', '.join(sorted(unknown))}")
+
+    qdrant_multi = None
+    sync_client = None
+    if "multi" in strategies:
+        import qdrant_multi
+        sync_client = QdrantClient(location=":memory:")
+
+    async_client = AsyncQdrantClient(location=":memory:")
+    records = make_corpus(args.docs, args.seed)
+    await seed_collections(records, async_client, sync_client, qdrant_utils.collection_name, args.encode_batch_size,
+                           partitioned=args.partition_by_year)
+    qdrant_utils.partition_router.enabled = args.partition_by_year
+    if qdrant_multi is not None:
+        qdrant_multi.partitioned = args.partition_by_year
+    queries = load_queries(args.queries) if args.queries else make_queries(max(args.requests, 50), args.seed)
+
+    # ✅ 단계별 계측 연결
+    resources.set_qdrant_client(TimedProxy(async_client, "qdrant"))
+    qdrant_utils.encode_query = timed_async("embed", qdrant_utils.encode_query)
+    qdrant_utils.cosine_similarity = timed_sync("rerank", qdrant_utils.cosine_similarity)
+    main.call_vllm_generate_search_condition = timed_async("keyword_llm", main.call_vllm_generate_search_condition)
+    fastapi.routing.serialize_response = timed_async("serialize", fastapi.routing.serialize_response)
+    JSONResponse.render = timed_sync("serialize", JSONResponse.render)
+    if qdrant_multi is not None:
+        resources.set_sync_qdrant_client(TimedProxy(sync_client, "qdrant"))
+        timed_model = TimedProxy(resources.get_model(), "embed")
+        qdrant_multi.get_model = lambda: timed_model
+        qdrant_multi.cosine_similarity = timed_sync("rerank", qdrant_multi.cosine_similarity)
+
+    caches = [keyword_cache, vector_cache, main.search_response_cache]
+    if not args.with_caches:
+        for cache in caches:
+            cache.max_size = 0
+
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://benchmark", timeout=None)
+
+    async def run_app(question: str):
+        response = await http.post("/search/documents", json={"question": question})
+        response.raise_for_status()
+        body = response.json()
+        if "error" in body:
+            raise RuntimeError(body["error"])
+
+    # qdrant_multi 는 동기 함수 → 스레드에서 실행, 키워드 추출과 응답 형식은 main 과 동일하게 맞춤
+    async def run_multi(question: str):
+        keywords, _ = await main.resolve_keywords(question)
+        documents = await asyncio.to_thread(
+            qdrant_multi.keyword_then_semantic_rerank, question, keywords, main.SEARCH_TOP_K
+        )
+        start = time.perf_counter()
+        json.dumps({
+            "result_count": len(documents),
+            "documents": [main.format_document(doc) for doc in documents]
+        }, ensure_ascii=False)
+        record_stage("serialize", time.perf_counter() - start)
+
+    results = {}
+    try:
+        for strategy in strategies:
+            for cache in caches:
+                cache.clear()
+            if strategy == "multi":
+                run_one = run_multi
+            else:
+                qdrant_utils.RETRIEVAL_MODE = main.RETRIEVAL_MODE = strategy
+                run_one = run_app
+            print(f"⏱️ {strategy}: {args.requests}건, 동시성 {args.concurrency}", file=sys.stderr)
+            # 파이프라인의 디버그 print 는 측정 중 버림 (출력 비용은 그대로 포함)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results[strategy] = await replay(run_one, queries, args.requests, args.concurrency, args.warmup)
+            latency = results[strategy]["latency"]
+            print(f"   → {latency['qps']} QPS | p50 {latency['p50_ms']}ms | p95 {latency['p95_ms']}ms "
+                  f"| p99 {latency['p99_ms']}ms | 실패 {results[strategy]['errors']}건", file=sys.stderr)
+    finally:
+        await http.aclose()
+        await vllm_utils.close_http_client()
+        await qdrant_utils.query_batcher.stop()
+        await async_client.close()
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    return {
+        "config": {
+            "docs": args.docs,
+            "queries": len(queries),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "with_caches": args.with_caches,
+            "partition_by_year": args.partition_by_year,
+            "seed": args.seed,
+            "timestamp": time.time(),
+        },
+        "strategies": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 파이프라인 벤치마크 (메모리 Qdrant + 가짜 vLLM)")
+    parser.add_argument("--docs", type=int, default=2000, help="합성 기사 수")
+    parser.add_argument("--queries", default="", help="질문 파일 (텍스트 한 줄 하나 또는 question 필드 JSONL)")
+    parser.add_argument("--requests", type=int, default=200, help="검색 방식별 측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=5, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help=f"비교할 검색 방식 ({', '.join(STRATEGIES)})")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="가짜 vLLM 응답 지연(ms)")
+    parser.add_argument("--llm-jitter-ms", type=float, default=20.0, help="가짜 vLLM 지연 편차(ms)")
+    parser.add_argument("--encode-batch-size", type=int, default=64, help="코퍼스 임베딩 배치 크기")
+    parser.add_argument("--with-caches", action="store_true", help="키워드/벡터/응답 캐시를 켠 상태로 측정")
+    parser.add_argument("--partition-by-year", action="store_true", help="연도별 파티션 컬렉션에 적재하고 라우터로 검색")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="결과 JSON 파일 (기본: 표준 출력)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ 결과 저장: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
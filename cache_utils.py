@@ -0,0 +1,185 @@
+import os, re, json, time, pickle, asyncio, threading, unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# ✅ 질문 캐시 설정
+QUERY_CACHE_MAX_SIZE = int(os.getenv("QUERY_CACHE_MAX_SIZE", "10000"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "86400"))  # 초
+QUERY_CACHE_DIR = os.getenv("QUERY_CACHE_DIR", "")  # 비어 있으면 디스크 저장 안 함
+
+# ✅ 검색 응답 캐시 설정
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "5000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # 초
+RESPONSE_CACHE_VERSION_CHECK_INTERVAL = float(os.getenv("RESPONSE_CACHE_VERSION_CHECK_INTERVAL", "5"))  # 초
+
+
+# ✅ 캐시 키용 질문 정규화 (전각/반각, 대소문자, 공백, 끝 문장부호 통일)
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question or "")
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text.rstrip("?!.。 ")
+
+
+# ✅ 크기 제한(LRU) + 만료시간(TTL) 캐시, 선택적으로 메모리 상한과 파일 저장 지원
+#    max_bytes 를 쓰려면 sizeof(value) 로 항목 크기를 추정해야 함
+class LRUCache:
+    def __init__(self, max_size: int, ttl: float, persist_path: Optional[str] = None,
+                 max_bytes: int = 0, sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()  # key → (value, 만료 시각, 크기)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        self._set(key, value, time.time() + self.ttl)
+
+    def _set(self, key, value, expires_at):
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_size or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    # 만료되지 않은 항목만 저장 (신뢰할 수 있는 로컬 파일 전용 pickle 형식)
+    def save(self):
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self._lock:
+            items = [(k, v, exp) for k, (v, exp, _) in self._data.items() if exp >= now]
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.persist_path)
+        print(f"💾 캐시 저장 완료: {self.persist_path} ({len(items)}건)")
+
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "rb") as f:
+                items = pickle.load(f)
+        except Exception as e:
+            print(f"❌ 캐시 파일 로드 실패 ({self.persist_path}): {e}")
+            return
+        now = time.time()
+        for key, value, expires_at in items[-self.max_size:]:
+            if expires_at >= now:
+                self._set(key, value, expires_at)
+        print(f"📂 캐시 로드 완료: {self.persist_path} ({len(self._data)}건)")
+
+
+# ✅ 컬렉션 버전이 바뀌면 전체를 비우는 캐시 (검색 응답용)
+#    version_fn 은 (포인트 수, 적재 버전) 처럼 데이터가 바뀌면 달라지는 값을 반환
+#    버전 확인은 check_interval 초에 한 번만 하므로 적중 시에는 dict 조회 비용만 듦
+class VersionedCache(LRUCache):
+    def __init__(self, version_fn: Callable[[], Awaitable[Any]], check_interval: float, **kwargs):
+        super().__init__(**kwargs)
+        self.version_fn = version_fn
+        self.check_interval = check_interval
+        self.version = None
+        self.invalidations = 0
+        self._checked_at = 0.0
+        self._check_lock = asyncio.Lock()
+
+    async def refresh_version(self, force: bool = False):
+        if not force and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        async with self._check_lock:
+            if not force and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            try:
+                version = await self.version_fn()
+            except Exception as e:
+                print(f"❌ 컬렉션 버전 확인 실패: {e}")
+                return
+            finally:
+                self._checked_at = time.monotonic()
+            if self.version is not None and version != self.version:
+                print(f"♻️ 컬렉션 버전 변경 {self.version} → {version}, 응답 캐시 비움")
+                self.clear()
+                self.invalidations += 1
+            self.version = version
+
+    async def aget(self, key):
+        await self.refresh_version()
+        return self.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "version": self.version, "invalidations": self.invalidations}
+
+
+def json_sizeof(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def _persist_path(name: str) -> Optional[str]:
+    return os.path.join(QUERY_CACHE_DIR, f"{name}.pkl") if QUERY_CACHE_DIR else None
+
+
+# ✅ 정규화된 질문 → 정제된 키워드 리스트
+keyword_cache = LRUCache(QUERY_CACHE_MAX_SIZE, QUERY_CACHE_TTL, _persist_path("keywords"))
+
+# ✅ 정규화된 질문 → 질문 임베딩 벡터
+vector_cache = LRUCache(QUERY_CACHE_MAX_SIZE, QUERY_CACHE_TTL, _persist_path("vectors"))
+
+
+def save_query_caches():
+    keyword_cache.save()
+    vector_cache.save()
+
+
+def query_cache_stats() -> Dict[str, Any]:
+    return {"keywords": keyword_cache.stats(), "vectors": vector_cache.stats()}
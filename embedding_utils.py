@@ -0,0 +1,157 @@
+import os, asyncio, gc, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set
+from metrics import EMBED_BATCH_SIZE, ERRORS
+
+# ✅ 임베딩 전용 스레드 풀 (CPU/GPU 연산을 이벤트 루프 밖에서 실행, 동시 실행 수 제한)
+EMBED_MAX_WORKERS = int(os.getenv("EMBED_MAX_WORKERS", "2"))
+embed_executor = ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS, thread_name_prefix="embed")
+
+# ✅ 마이크로 배칭 설정
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+# ✅ VRAM / 가비지 정리 주기 (초, 0 이하면 비활성화)
+EMBED_CLEANUP_INTERVAL = float(os.getenv("EMBED_CLEANUP_INTERVAL", "60"))
+
+
+def clear_memory():
+    import torch
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+# ✅ 동시 요청을 모아서 한 번의 encode 로 처리하는 배처
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], list],
+        executor: ThreadPoolExecutor = embed_executor,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS,
+        max_concurrent_batches: int = EMBED_MAX_WORKERS,
+        cleanup_interval: float = EMBED_CLEANUP_INTERVAL,
+    ):
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self.cleanup_interval = cleanup_interval
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._cleaner: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()  # 실행 중인 배치 (참조를 유지해야 GC 로 사라지지 않음)
+        self._loop = None
+        self._encoded_since_cleanup = 0
+
+        # 통계
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+
+    # 루프가 바뀌었으면 새로 만들고, 수집 작업이 죽었으면 (대기열은 그대로 두고) 다시 시작
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._collector = self._cleaner = None
+            self._batches = set()
+        if self._collector is None or self._collector.done():
+            if self._collector is not None and not self._collector.cancelled() and self._collector.exception():
+                print(f"❌ 임베딩 배처 수집 작업 종료 → 다시 시작: {self._collector.exception()!r}")
+                ERRORS.inc(component="embed")
+            self._collector = loop.create_task(self._collect_loop())
+        if self.cleanup_interval > 0 and (self._cleaner is None or self._cleaner.done()):
+            self._cleaner = loop.create_task(self._cleanup_loop())
+
+    async def encode(self, text: str):
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def encode_many(self, texts: List[str]):
+        return list(await asyncio.gather(*(self.encode(t) for t in texts)))
+
+    async def stop(self):
+        tasks = [task for task in (self._collector, self._cleaner) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *self._batches, return_exceptions=True)
+        self._collector = self._cleaner = None
+
+    async def _collect_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    # 이미 대기 중인 요청은 바로 가져가고, 없으면 남은 시간만큼만 기다림
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._slots.acquire()
+            except BaseException as e:
+                # 모으던 요청은 호출 측이 영원히 기다리지 않도록 같이 실패 처리
+                for _, future in batch:
+                    if not future.done():
+                        if isinstance(e, asyncio.CancelledError):
+                            future.cancel()
+                        else:
+                            future.set_exception(e)
+                raise
+
+            task = loop.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _ in batch]
+        try:
+            vectors = await loop.run_in_executor(self.executor, self.encode_fn, texts)
+        except Exception as e:
+            ERRORS.inc(component="embed")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.items += len(batch)
+        EMBED_BATCH_SIZE.observe(len(batch))
+        self.last_batch_size = len(batch)
+        self._encoded_since_cleanup += len(batch)
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    async def _cleanup_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            if self._encoded_since_cleanup == 0:
+                continue
+            self._encoded_since_cleanup = 0
+            start = time.time()
+            await loop.run_in_executor(self.executor, clear_memory)
+            print(f"🧹 임베딩 메모리 정리 완료 ({time.time() - start:.3f}초)")
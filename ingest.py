@@ -0,0 +1,237 @@
+"""
+기사 대량 적재 (JSONL → KURE-v1 임베딩 → Qdrant)
+
+한 줄에 기사 하나인 JSONL 파일을 읽어 본문을 정제하고, 큰 배치로 임베딩한 뒤
+여러 upsert 작업자로 Qdrant 에 병렬 적재한다. 다음 배치 임베딩과 이전 배치 upsert 가 겹쳐서 실행된다.
+
+    python ingest.py articles.jsonl
+    python ingest.py articles.jsonl --embed-batch-size 256 --upsert-workers 4
+    python ingest.py articles.jsonl --restart       # 저장된 진행 지점을 무시하고 처음부터
+    python ingest.py articles.jsonl --partition-by-year   # 연도별 컬렉션(<컬렉션>_<연도>)에 나눠 적재
+
+- 기사 id 로 point id 를 만들기 때문에 같은 기사를 다시 적재해도 덮어쓰기만 된다 (idempotent).
+- 연속으로 적재가 끝난 마지막 줄 번호를 <입력 파일>.ingest_state.json 에 저장해서 중단 후 이어서 실행한다.
+
+입력 필드: id(또는 article_id), title_original, content, organization, reporter,
+          year, month, date_day, date_weekday, topic, url, main_image_url
+"""
+import os, json, time, uuid, argparse, asyncio
+from typing import Dict, Iterator, List, Tuple
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct
+from resources import get_model
+from qdrant_admin import (
+    QDRANT_HOST, QDRANT_PORT, SPARSE_VECTOR_NAME, PARTITION_BY_YEAR, collection_name,
+    ensure_collection, ensure_payload_indexes, ensure_text_indexes, has_sparse_vectors,
+    bump_ingest_version, typed_date_fields, partition_name, make_snippet, integer_point_id
+)
+from sparse_utils import encode_sparse_document, document_text
+from embedding_utils import embed_executor
+
+# payload 에 그대로 옮기는 필드
+PAYLOAD_FIELDS = [
+    "title_original", "organization", "reporter", "year", "month", "date_day",
+    "date_weekday", "topic", "url", "main_image_url", "content"
+]
+
+# ✅ 기사 id → Qdrant point id (정수 id 는 그대로 (parse_point_id 와 같은 기준), 그 외는 고정 UUID)
+def to_point_id(article_id):
+    point_id = integer_point_id(article_id)
+    if point_id is not None:
+        return point_id
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, str(article_id)))
+
+
+def build_payload(record: Dict) -> Dict:
+    payload = {field: record[field] for field in PAYLOAD_FIELDS if record.get(field) is not None}
+    payload.update(typed_date_fields(payload))  # year / month / date_day 는 정수로 저장
+    payload["snippet"] = make_snippet(payload.get("content", ""))
+    return payload
+
+
+# ✅ 임베딩 입력: 제목 + 정제된 본문 (희소 벡터도 같은 텍스트로 계산)
+def build_embedding_text(record: Dict) -> str:
+    return document_text(record.get("title_original", ""), record.get("content", ""))
+
+
+# ✅ 밀집 임베딩 + 희소 벡터 계산 (임베딩 스레드에서 함께 실행)
+def embed_batch(texts: List[str], encode_batch_size: int, with_sparse: bool):
+    vectors = get_model().encode(texts, batch_size=encode_batch_size, normalize_embeddings=True)
+    sparse_vectors = [encode_sparse_document(t) for t in texts] if with_sparse else [None] * len(texts)
+    return vectors, sparse_vectors
+
+
+# ✅ JSONL 을 (마지막 줄 번호, 기사 목록) 배치 단위로 읽기
+def read_batches(path: str, batch_size: int, start_line: int = 0) -> Iterator[Tuple[int, List[Dict]]]:
+    batch = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if line_no <= start_line or not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ {line_no}번째 줄 JSON 오류, 건너뜀: {e}")
+                continue
+            if record.get("id", record.get("article_id")) is None:
+                print(f"⚠️ {line_no}번째 줄에 id 없음, 건너뜀")
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield line_no, batch
+                batch = []
+        if batch:
+            yield line_no, batch
+
+
+# ✅ 진행 지점 저장 (완료 순서가 뒤섞여도 연속으로 끝난 줄까지만 기록)
+class Checkpoint:
+    def __init__(self, path: str, start_line: int):
+        self.path = path
+        self.committed = start_line
+        self._pending: Dict[int, int] = {}  # 배치 시작 줄 → 마지막 줄
+
+    @staticmethod
+    def load(path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("line", 0)
+
+    # 배치 줄 범위는 (이전 배치 마지막 줄 + 1) ~ 마지막 줄 이라 빈틈 없이 이어짐
+    def done(self, first_line: int, last_line: int):
+        self._pending[first_line] = last_line
+        while self.committed + 1 in self._pending:
+            self.committed = self._pending.pop(self.committed + 1)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"line": self.committed, "updated_at": time.time()}, f)
+
+
+# ✅ 임베딩된 배치 하나를 upsert_batch_size 단위로 나눠 동시에 upsert
+#    배치는 {컬렉션 이름: point 목록} (연도별 파티션 적재 시 여러 컬렉션)
+async def upsert_worker(client, queue: asyncio.Queue, checkpoint: Checkpoint,
+                        stats: Dict, upsert_batch_size: int):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        first_line, last_line, groups = item
+        points = [p for group in groups.values() for p in group]
+        chunks = [
+            (collection, group[i:i + upsert_batch_size])
+            for collection, group in groups.items()
+            for i in range(0, len(group), upsert_batch_size)
+        ]
+        try:
+            await asyncio.gather(*(
+                client.upsert(collection_name=collection, points=chunk, wait=True)
+                for collection, chunk in chunks
+            ))
+            stats["upserted"] += len(points)
+            checkpoint.done(first_line, last_line)
+        except Exception as e:
+            stats["failed"] += len(points)
+            print(f"❌ upsert 실패 ({first_line}~{last_line}번째 줄): {e}")
+
+
+async def run(args):
+    state_path = args.state_file or f"{args.input}.ingest_state.json"
+    start_line = 0 if args.restart else Checkpoint.load(state_path)
+    if start_line:
+        print(f"↩️ {start_line}번째 줄 이후부터 재개")
+    checkpoint = Checkpoint(state_path, start_line)
+
+    client = AsyncQdrantClient(host=args.host, port=args.port, timeout=args.timeout)
+    dim = get_model().get_sentence_embedding_dimension()
+    sparse_by_collection: Dict[str, bool] = {}
+
+    # 컬렉션 생성 + 인덱스 + 희소 벡터 여부 확인 (컬렉션마다 한 번)
+    async def prepare(name: str) -> bool:
+        if name not in sparse_by_collection:
+            await ensure_collection(client, name, dim)
+            await ensure_payload_indexes(client, name)
+            await ensure_text_indexes(client, name)
+            sparse_by_collection[name] = await has_sparse_vectors(client, name)
+            print(f"🔤 {name}: 희소 벡터 {'포함' if sparse_by_collection[name] else '미포함'} 적재")
+        return sparse_by_collection[name]
+
+    if args.partition_by_year:
+        print(f"📅 연도별 파티션 적재: {args.collection}_<연도>")
+        with_sparse = True  # 파티션별 희소 벡터 여부는 point 를 만들 때 확인
+    else:
+        with_sparse = await prepare(args.collection)
+
+    loop = asyncio.get_running_loop()
+    # 큐 크기 제한 → 임베딩이 upsert 보다 너무 앞서 나가지 않도록 backpressure
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.upsert_workers * 2)
+    stats = {"embedded": 0, "upserted": 0, "failed": 0}
+    workers = [
+        asyncio.create_task(upsert_worker(client, queue, checkpoint, stats, args.upsert_batch_size))
+        for _ in range(args.upsert_workers)
+    ]
+
+    start = time.time()
+    last_report = start
+    first_line = start_line + 1
+    try:
+        for last_line, records in read_batches(args.input, args.embed_batch_size, start_line):
+            texts = [build_embedding_text(r) for r in records]
+            vectors, sparse_vectors = await loop.run_in_executor(
+                embed_executor, embed_batch, texts, args.encode_batch_size, with_sparse
+            )
+            stats["embedded"] += len(records)
+
+            groups: Dict[str, List[PointStruct]] = {}
+            for r, vector, sparse in zip(records, vectors, sparse_vectors):
+                payload = build_payload(r)
+                target = partition_name(args.collection, payload.get("year")) if args.partition_by_year else args.collection
+                target_sparse = await prepare(target)
+                groups.setdefault(target, []).append(PointStruct(
+                    id=to_point_id(r.get("id", r.get("article_id"))),
+                    vector={"": vector.tolist(), SPARSE_VECTOR_NAME: sparse}
+                    if target_sparse else vector.tolist(),
+                    payload=payload
+                ))
+            await queue.put((first_line, last_line, groups))
+            first_line = last_line + 1
+
+            now = time.time()
+            if now - last_report >= args.report_every:
+                last_report = now
+                elapsed = now - start
+                print(f"📦 임베딩 {stats['embedded']}건 / 적재 {stats['upserted']}건 "
+                      f"| {stats['upserted'] / elapsed:.1f} docs/sec")
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        await client.close()
+        if stats["upserted"]:
+            bump_ingest_version(args.collection)
+
+    elapsed = time.time() - start
+    print(f"✅ 적재 완료: {stats['upserted']}건 (실패 {stats['failed']}건), "
+          f"{elapsed:.1f}초, {stats['upserted'] / elapsed if elapsed else 0:.1f} docs/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 기사 → Qdrant 대량 적재")
+    parser.add_argument("input", help="기사 JSONL 파일")
+    parser.add_argument("--host", default=QDRANT_HOST)
+    parser.add_argument("--port", type=int, default=QDRANT_PORT)
+    parser.add_argument("--collection", default=collection_name)
+    parser.add_argument("--timeout", type=int, default=120, help="Qdrant 요청 타임아웃(초)")
+    parser.add_argument("--embed-batch-size", type=int, default=512, help="한 번에 읽어서 임베딩할 기사 수")
+    parser.add_argument("--encode-batch-size", type=int, default=64, help="model.encode 내부 배치 크기")
+    parser.add_argument("--upsert-batch-size", type=int, default=128, help="upsert 요청 한 번의 point 수")
+    parser.add_argument("--upsert-workers", type=int, default=4, help="동시 upsert 작업자 수")
+    parser.add_argument("--state-file", default="", help="진행 지점 파일 (기본: <입력 파일>.ingest_state.json)")
+    parser.add_argument("--report-every", type=float, default=10.0, help="진행 상황 출력 간격(초)")
+    parser.add_argument("--restart", action="store_true", help="저장된 진행 지점을 무시하고 처음부터 적재")
+    parser.add_argument("--partition-by-year", action="store_true", default=PARTITION_BY_YEAR,
+                        help="연도별 컬렉션(<컬렉션>_<연도>)에 적재 (기본: PARTITION_BY_YEAR)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,250 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from qdrant_utils import keyword_then_semantic_rerank
+from fastapi.middleware.gzip import GZipMiddleware
+from qdrant_utils import (
+    search_documents, search_documents_page, get_document, get_documents, parse_point_id, query_batcher,
+    collection_version, RETRIEVAL_MODE, PAGE_SORTS
+)
+from resources import (
+    get_qdrant_client, close_qdrant_client, warmup, preload_for_fork, apply_cpu_affinity,
+    status as resource_status, EMBED_PRELOAD
+)
+from embedding_utils import embed_executor
+from contextlib import asynccontextmanager
 from vllm_utils import (
     call_vllm_generate_search_condition,
     clean_llm_keywords,
-    call_vllm_summarize_article
+    call_vllm_summarize_article,
+    call_vllm_summarize_articles,
+    stream_summarize_article,
+    close_http_client,
+    is_llm_error,
+    is_llm_unavailable,
+    llm_unavailable_reason
 )
+from summary_store import summary_store, content_hash
+from cache_utils import (
+    keyword_cache, vector_cache, normalize_question, query_cache_stats, save_query_caches,
+    VersionedCache, json_sizeof,
+    RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_VERSION_CHECK_INTERVAL
+)
+from query_parser import parse_question, to_keywords, merge_date_keywords
+from metrics import STAGE_SECONDS, REQUEST_SECONDS, ERRORS, render_metrics, register_cache, debug_sampled
+import os
 import json
+import time
+import base64
+import zlib
+import asyncio
+import orjson
+
+# ✅ 배치 요약 한 번에 받을 최대 기사 수
+SUMMARY_BATCH_MAX_ITEMS = int(os.getenv("SUMMARY_BATCH_MAX_ITEMS", "32"))
+
+# ✅ 시작 시 임베딩 모델 로드 + 워밍업 (0 이면 첫 요청에서 지연 로드)
+EMBED_LOAD_ON_STARTUP = os.getenv("EMBED_LOAD_ON_STARTUP", "1") == "1"
+
+# ✅ /health/ready 에서 Qdrant 연결 확인 제한 시간 (초)
+READINESS_QDRANT_TIMEOUT = float(os.getenv("READINESS_QDRANT_TIMEOUT", "2"))
+
+# ✅ 검색 결과 개수
+SEARCH_TOP_K = 30
+
+# ✅ /search/documents/page 한 페이지 기사 수 (기본 / 최대)
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_PAGE_MAX_SIZE = 50
+
+# ✅ gzip 응답 압축 (이 크기(바이트) 이상인 응답만 압축, 0 이면 끔)
+#    GZipMiddleware 는 압축 버퍼가 찰 때까지 출력을 모아 두므로 스트리밍 경로(GZIP_EXCLUDED_PATHS)에는 쓰지 않고,
+#    NDJSON 스트림은 gzip_lines 로 줄마다 sync flush 해서 압축해도 결과가 도착하는 대로 전달됨 (SSE 는 압축 안 함)
+RESPONSE_GZIP_MIN_SIZE = int(os.getenv("RESPONSE_GZIP_MIN_SIZE", "0"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+GZIP_EXCLUDED_PATHS = {"/search/documents/stream", "/summarize/stream"}
+
+# ✅ (정규화된 질문, top_k, 검색 방식) → /search/documents 응답 전체
+#    컬렉션 point 수나 적재 버전이 바뀌면 통째로 비움
+search_response_cache = VersionedCache(
+    collection_version,
+    RESPONSE_CACHE_VERSION_CHECK_INTERVAL,
+    max_size=RESPONSE_CACHE_MAX_SIZE,
+    ttl=RESPONSE_CACHE_TTL,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    sizeof=json_sizeof
+)
+
+register_cache("keywords", keyword_cache)
+register_cache("vectors", vector_cache)
+register_cache("responses", search_response_cache)
+register_cache("summaries", summary_store)
+
+# ✅ CPU 고정은 메인 스레드에서 임베딩 스레드/torch 스레드 풀이 생기기 전에 (EMBED_CPU_AFFINITY)
+apply_cpu_affinity()
+
+# ✅ fork 기반 멀티 워커 (gunicorn --preload) 에서 모델 가중치를 워커끼리 공유
+if EMBED_PRELOAD:
+    preload_for_fork()
+
+
+# ✅ 모델 로드 + 워밍업 (임베딩 스레드에서 실행, 그동안 /health/live 는 바로 응답)
+async def warm_up_model():
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(embed_executor, warmup)
+    except Exception as e:
+        print(f"❌ 임베딩 모델 워밍업 실패: {e}")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = asyncio.create_task(warm_up_model()) if EMBED_LOAD_ON_STARTUP else None
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await close_http_client()
+    await close_qdrant_client()
+    await query_batcher.stop()
+    save_query_caches()
+    summary_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 
+# ✅ 스트리밍 경로(GZIP_EXCLUDED_PATHS)는 그대로 전달하고 나머지 응답만 gzip 압축
+class StreamingSafeGZipMiddleware:
+    def __init__(self, app, excluded_paths=frozenset(), **gzip_options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+if RESPONSE_GZIP_MIN_SIZE > 0:
+    app.add_middleware(
+        StreamingSafeGZipMiddleware,
+        excluded_paths=GZIP_EXCLUDED_PATHS,
+        minimum_size=RESPONSE_GZIP_MIN_SIZE,
+        compresslevel=RESPONSE_GZIP_LEVEL
+    )
+
+
+# ✅ 엔드포인트별 응답 시간 (경로는 라우트 패턴 기준, 스트리밍 응답은 헤더 전송까지)
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            path=route.path if route else "unmatched",
+            method=request.method,
+            status=status
+        )
+
+
 @app.get("/", response_class=HTMLResponse)
 async def serve_home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+# ✅ 프로세스가 살아 있으면 항상 200 (모델 로드 중에도)
+@app.get("/health/live")
+async def liveness():
+    return {"status": "ok"}
+
+
+# ✅ 모델 로드/워밍업이 끝나고 Qdrant 에 연결되면 200, 아니면 503
+#    EMBED_LOAD_ON_STARTUP=0 이면 모델은 첫 요청에서 로드하므로 Qdrant 연결만 확인
+@app.get("/health/ready")
+async def readiness():
+    model_ready = resource_status["warmed_up"] if EMBED_LOAD_ON_STARTUP else True
+    try:
+        await asyncio.wait_for(get_qdrant_client().get_collections(), READINESS_QDRANT_TIMEOUT)
+        qdrant_ready = True
+    except Exception:
+        qdrant_ready = False
+    ready = model_ready and qdrant_ready
+    body = {"status": "ready" if ready else "not_ready", "qdrant": qdrant_ready, **resource_status}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        **query_cache_stats(),
+        "responses": search_response_cache.stats(),
+        "summaries": summary_store.stats()
+    }
+
+
+# ✅ 질문 → (검색 키워드, 축소 여부) (캐시 → 규칙 기반 파서 → LLM 순서)
+#    LLM 이 실패/과부하/차단 상태면 기다리지 않고 날짜 키워드만으로 의미 검색 (축소 여부 True)
+#    debug 는 요청마다 한 번 정한 debug_sampled() 값 (True 인 요청만 단계별 로그 출력)
+async def resolve_keywords(user_question: str, debug: bool = False):
+    cache_key = normalize_question(user_question)
+    keywords = keyword_cache.get(cache_key)
+    if keywords is not None:
+        if debug:
+            print("⚡ 키워드 캐시 적중")
+        return keywords, False
+
+    parsed = parse_question(user_question)
+    if parsed["confident"]:
+        keywords = to_keywords(parsed)
+        if debug:
+            print(f"⚡ 규칙 기반 파서로 키워드 추출 (LLM 생략): {keywords}")
+        keyword_cache.set(cache_key, keywords)
+        return keywords, False
+
+    with STAGE_SECONDS.time(stage="keyword_llm"):
+        raw_keywords = await call_vllm_generate_search_condition(user_question)
+    if debug:
+        print(f"🔍 LLM 생성 키워드 (원본): {raw_keywords}")
+    if is_llm_error(raw_keywords):
+        print("⚠️ LLM 키워드 생성 불가 → 키워드 없이 의미 검색")
+        return merge_date_keywords([], parsed), True
+
+    keywords = merge_date_keywords(clean_llm_keywords(raw_keywords), parsed)
+    keyword_cache.set(cache_key, keywords)
+    return keywords, False
+
+
+# ✅ 검색 결과 문서 → API 응답 형식 (본문 대신 미리보기만 포함)
+#    점수가 없는 결과 (발행일순 페이지) 는 accuracy 가 None
+def format_document(doc):
+    score = doc.get("score")
+    return {
+        "id": doc.get("id"),
+        "title": doc.get("제목", ""),
+        "reporter": doc.get("기자", ""),
+        "date": doc.get("날짜", ""),
+        "topic": doc.get("주제", ""),
+        "url": doc.get("URL", ""),
+        "image_url": doc.get("Image_url", ""),
+        "accuracy": f"{round(score * 100, 2)}%" if score is not None else None,
+        "snippet": doc.get("미리보기", "")
+    }
+
+
 @app.post("/search/documents")
 async def document_search(request: Request):
     data = await request.json()
@@ -28,67 +253,473 @@ async def document_search(request: Request):
     if not user_question:
         return {"error": "❌ 질문이 없습니다."}
 
-    print(f"\n📥 사용자 질문: {user_question}")
+    # ✅ 요청별 로그는 LOG_LEVEL=debug 에서 일부 요청만 (한 요청의 로그는 모두 함께 출력)
+    debug = debug_sampled()
+    if debug:
+        print(f"\n📥 사용자 질문: {user_question}")
 
-    raw_keywords = call_vllm_generate_search_condition(user_question)
-    print(f"🔍 LLM 생성 키워드 (원본): {raw_keywords}")
+    response_key = (normalize_question(user_question), SEARCH_TOP_K, RETRIEVAL_MODE)
+    cached = await search_response_cache.aget(response_key)
+    if cached is not None:
+        if debug:
+            print("⚡ 검색 응답 캐시 적중")
+        return cached
 
-    keywords = clean_llm_keywords(raw_keywords)
-    print(f"✅ 정제된 키워드 리스트: {keywords}")
+    keywords, degraded = await resolve_keywords(user_question, debug)
+    if debug:
+        print(f"✅ 정제된 키워드 리스트: {keywords}")
 
-    document_list = keyword_then_semantic_rerank(user_question, keywords, top_k=30)
+    with STAGE_SECONDS.time(stage="search"):
+        document_list = await search_documents(user_question, keywords, top_k=SEARCH_TOP_K)
 
-    print(f"\n📄 검색 결과 개수: {len(document_list)}")
+    if debug:
+        print(f"📄 검색 결과 개수: {len(document_list)}")
 
-    formatted_documents = []
-    for idx, doc in enumerate(document_list, 1):
-        title = doc.get("제목", "")
-        date = doc.get("날짜", "")
-        score = doc.get("score", 0.0)
-        content = doc.get("본문", "")
+    formatted_documents = [format_document(doc) for doc in document_list]
+    response = {
+        "result_count": len(formatted_documents),
+        "documents": formatted_documents
+    }
+
+    # ✅ 디버깅: 문서별 제목/점수와 전체 응답
+    if debug:
+        for idx, doc in enumerate(document_list, 1):
+            print(f"📄 [{idx}] 제목: {doc.get('제목', '')}")
+            print(f"    날짜: {doc.get('날짜', '')}, 점수: {doc.get('score', 0.0):.4f}")
+        print("\n📦 최종 응답 데이터:")
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+
+    # 키워드 없이 검색한 축소 응답은 LLM 이 복구되면 달라지므로 캐시하지 않음
+    if not degraded:
+        search_response_cache.set(response_key, response)
+    return response
+
+
+# ✅ NDJSON 한 줄 (orjson: 표준 json 보다 빠르고 UTF-8 바이트를 바로 반환)
+def ndjson_line(data) -> bytes:
+    return orjson.dumps(data) + b"\n"
+
+
+# ✅ 스트림 압축 (gzip 형식, 줄마다 Z_SYNC_FLUSH 로 내보내서 클라이언트가 바로 풀 수 있음)
+async def gzip_lines(lines):
+    compressor = zlib.compressobj(RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for line in lines:
+        yield compressor.compress(line) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def accepts_gzip(request: Request) -> bool:
+    return RESPONSE_GZIP_MIN_SIZE > 0 and "gzip" in request.headers.get("accept-encoding", "")
+
+
+# ✅ /search/documents 의 스트리밍 버전 (application/x-ndjson, 한 줄에 JSON 하나)
+#    {"type": "meta", "keywords": [...]}         키워드 확정 직후 (캐시 적중 시 생략)
+#    {"type": "document", "document": {...}}     순위 순서대로 한 건씩
+#    {"type": "done", "result_count": N}         마지막 줄
+#    {"type": "error", "error": "❌ ..."}         실패 시 마지막 줄
+#    전체 응답 문자열을 한 번에 만들지 않으므로 첫 결과가 빨리 보이고 요청당 메모리도 줄어듦
+#    요청에 sort / page_size 가 있으면 /search/documents/page 의 첫 페이지를 같은 형식으로 스트리밍하고,
+#    done 줄에 next_cursor 를 담음 (다음 페이지는 /search/documents/page 에 cursor 로 요청)
+@app.post("/search/documents/stream")
+async def document_search_stream(request: Request):
+    data = await request.json()
+    user_question = data.get("question")
+    paged = data.get("sort") is not None or data.get("page_size") is not None
+
+    async def page_stream():
+        sort = data.get("sort") or "relevance"
+        if sort not in PAGE_SORTS:
+            yield ndjson_line({"type": "error", "error": f"❌ 지원하지 않는 정렬입니다: {sort}"})
+            return
+        try:
+            page_size = parse_page_size(data.get("page_size"))
+        except (TypeError, ValueError):
+            yield ndjson_line({"type": "error", "error": "❌ page_size 는 숫자여야 합니다."})
+            return
 
-        # ✅ 디버깅: 각 문서 본문 길이 출력
-        print(f"📄 [{idx}] 제목: {title}")
-        print(f"    날짜: {date}, 점수: {score:.4f}")
-        print(f"    본문 길이: {len(content)}자")
-        print(f"    본문 앞 100자: {content[:100]}")
-
-        formatted_documents.append({
-            "title": title,
-            "reporter": doc.get("기자", ""),
-            "date": date,
-            "topic": doc.get("주제", ""),
-            "url": doc.get("URL", ""),
-            "image_url": doc.get("Image_url", ""),
-            "accuracy": f"{round(score * 100, 2)}%",
-            "content": content
+        debug = debug_sampled()
+        if debug:
+            print(f"\n📥 사용자 질문 (스트리밍 페이지, {sort}): {user_question}")
+
+        try:
+            keywords, degraded = await resolve_keywords(user_question, debug)
+            yield ndjson_line({"type": "meta", "keywords": keywords, "degraded": degraded, "sort": sort})
+
+            with STAGE_SECONDS.time(stage="search"):
+                document_list, next_state = await search_documents_page(
+                    user_question, keywords, sort=sort, page_size=page_size
+                )
+        except Exception as e:
+            print(f"[❌ 스트리밍 검색 실패]: {e}")
+            ERRORS.inc(component="search")
+            yield ndjson_line({"type": "error", "error": "❌ 검색 중 오류가 발생했습니다."})
+            return
+
+        if debug:
+            print(f"📄 검색 결과 개수: {len(document_list)}")
+
+        for doc in document_list:
+            yield ndjson_line({"type": "document", "document": format_document(doc)})
+        yield ndjson_line({
+            "type": "done",
+            "result_count": len(document_list),
+            "next_cursor": page_cursor(user_question, sort, keywords, next_state)
         })
 
-    # ✅ 전체 응답 내용 출력
-    print("\n📦 최종 응답 데이터:")
-    print(json.dumps({
-        "result_count": len(formatted_documents),
-        "documents": formatted_documents
-    }, indent=2, ensure_ascii=False))
+    async def result_stream():
+        if not user_question:
+            yield ndjson_line({"type": "error", "error": "❌ 질문이 없습니다."})
+            return
+        if paged:
+            async for line in page_stream():
+                yield line
+            return
+
+        debug = debug_sampled()
+        if debug:
+            print(f"\n📥 사용자 질문 (스트리밍): {user_question}")
+
+        response_key = (normalize_question(user_question), SEARCH_TOP_K, RETRIEVAL_MODE)
+        cached = await search_response_cache.aget(response_key)
+        if cached is not None:
+            if debug:
+                print("⚡ 검색 응답 캐시 적중")
+            for doc in cached["documents"]:
+                yield ndjson_line({"type": "document", "document": doc})
+            yield ndjson_line({"type": "done", "result_count": cached["result_count"]})
+            return
+
+        try:
+            keywords, degraded = await resolve_keywords(user_question, debug)
+            yield ndjson_line({"type": "meta", "keywords": keywords, "degraded": degraded})
+
+            with STAGE_SECONDS.time(stage="search"):
+                document_list = await search_documents(user_question, keywords, top_k=SEARCH_TOP_K)
+        except Exception as e:
+            print(f"[❌ 스트리밍 검색 실패]: {e}")
+            ERRORS.inc(component="search")
+            yield ndjson_line({"type": "error", "error": "❌ 검색 중 오류가 발생했습니다."})
+            return
+
+        if debug:
+            print(f"📄 검색 결과 개수: {len(document_list)}")
+
+        formatted_documents = []
+        for doc in document_list:
+            formatted = format_document(doc)
+            formatted_documents.append(formatted)
+            yield ndjson_line({"type": "document", "document": formatted})
+        yield ndjson_line({"type": "done", "result_count": len(formatted_documents)})
+
+        # 스트림을 끝까지 보낸 경우에만 /search/documents 와 같은 응답 캐시에 저장
+        if not degraded:
+            search_response_cache.set(response_key, {
+                "result_count": len(formatted_documents),
+                "documents": formatted_documents
+            })
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Vary": "Accept-Encoding"}
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(gzip_lines(result_stream()), media_type="application/x-ndjson", headers=headers)
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson", headers=headers)
+
+
+# ✅ 페이지 cursor (키워드 + 정렬 + 다음 위치를 base64 JSON 으로 감싼 문자열, 클라이언트는 그대로 돌려보냄)
+#    다음 페이지는 cursor 의 키워드를 그대로 쓰므로 LLM 키워드 생성을 다시 하지 않음
+def encode_cursor(data) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(data)).decode().rstrip("=")
 
+
+# 다음 페이지 cursor (마지막 페이지면 None)
+def page_cursor(user_question: str, sort: str, keywords, next_state):
+    if not next_state:
+        return None
+    return encode_cursor({
+        "question": normalize_question(user_question), "sort": sort, "keywords": keywords, "state": next_state
+    })
+
+
+# 한 페이지 기사 수 (없으면 SEARCH_PAGE_SIZE, 1 ~ SEARCH_PAGE_MAX_SIZE 로 제한)
+#    정수 또는 숫자 문자열만 허용, true/false 나 2.7 같은 값은 ValueError
+def parse_page_size(value) -> int:
+    if value is None or value == "":
+        return SEARCH_PAGE_SIZE
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"잘못된 page_size: {value!r}")
+    if isinstance(value, str):
+        value = value.strip()
+        if not (value.isascii() and value.isdigit()):
+            raise ValueError(f"잘못된 page_size: {value!r}")
+    elif not isinstance(value, (int, float)):
+        raise TypeError(f"잘못된 page_size: {value!r}")
+    return min(max(int(value), 1), SEARCH_PAGE_MAX_SIZE)
+
+
+# 형식이 맞지 않으면 None (state 안의 위치 값은 search_documents_page 가 정렬에 맞게 다시 검증)
+def decode_cursor(cursor):
+    if not isinstance(cursor, str):
+        return None
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:  # base64 / JSON 오류 모두 ValueError
+        return None
+    if (
+        not isinstance(data, dict)
+        or not isinstance(data.get("keywords"), list)
+        or not all(isinstance(kw, str) for kw in data["keywords"])
+        or not isinstance(data.get("state"), dict)
+    ):
+        return None
+    return data
+
+
+# ✅ 페이지 단위 검색
+#    요청: {"question", "sort": "relevance" | "date", "page_size", "cursor"} (cursor 는 다음 페이지 요청 때만)
+#    응답: {"result_count", "documents", "sort", "next_cursor"} (마지막 페이지면 next_cursor 가 null)
+#    date 정렬은 서버(Qdrant order_by)에서 publish_date 최신순으로 정렬해서 보냄
+@app.post("/search/documents/page")
+async def document_search_page(request: Request):
+    data = await request.json()
+    user_question = data.get("question")
+    sort = data.get("sort") or "relevance"
+    cursor = data.get("cursor")
+
+    if not user_question:
+        return JSONResponse(status_code=400, content={"error": "❌ 질문이 없습니다."})
+    if sort not in PAGE_SORTS:
+        return JSONResponse(status_code=400, content={"error": f"❌ 지원하지 않는 정렬입니다: {sort}"})
+    try:
+        page_size = parse_page_size(data.get("page_size"))
+    except (TypeError, ValueError):
+        return JSONResponse(status_code=400, content={"error": "❌ page_size 는 숫자여야 합니다."})
+
+    question_key = normalize_question(user_question)
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None or position.get("question") != question_key or position.get("sort") != sort:
+            return JSONResponse(status_code=400, content={"error": "❌ 잘못된 cursor 입니다."})
+        keywords, state = position["keywords"], position["state"]
+    else:
+        debug = debug_sampled()
+        if debug:
+            print(f"\n📥 사용자 질문 (페이지, {sort}): {user_question}")
+        keywords, _ = await resolve_keywords(user_question, debug)
+        state = None
+        if debug:
+            print(f"✅ 정제된 키워드 리스트: {keywords}")
+
+    try:
+        with STAGE_SECONDS.time(stage="search"):
+            document_list, next_state = await search_documents_page(
+                user_question, keywords, sort=sort, page_size=page_size, state=state
+            )
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "❌ 잘못된 cursor 입니다."})
+
+    formatted_documents = [format_document(doc) for doc in document_list]
     return {
         "result_count": len(formatted_documents),
-        "documents": formatted_documents
+        "documents": formatted_documents,
+        "sort": sort,
+        "next_cursor": page_cursor(user_question, sort, keywords, next_state)
     }
 
 
+@app.get("/documents/{doc_id}")
+async def document_detail(doc_id: str):
+    try:
+        doc = await get_document(doc_id)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "❌ 잘못된 기사 id 입니다."})
+    if doc is None:
+        return JSONResponse(status_code=404, content={"error": "❌ 기사를 찾을 수 없습니다."})
+
+    detail = format_document(doc)
+    detail.pop("accuracy")
+    detail["content"] = doc.get("본문", "")
+    return detail
+
+
 @app.post("/summarize")
 async def summarize_article(request: Request):
     data = await request.json()
     content = data.get("content", "")
     question = data.get("question", None)
+    doc_id = data.get("id")
 
-    print(f"\n🧠 요약 요청 수신")
-    print(f"📄 본문 길이: {len(content)}자")
-    print(f"📄 본문 앞 100자: {content[:100]}")
+    # ✅ 요청별 로그는 LOG_LEVEL=debug 에서 일부 요청만
+    debug = debug_sampled()
+    if debug:
+        print("\n🧠 요약 요청 수신")
+    # ✅ 기사 id 로 요청한 경우 본문을 서버에서 조회
+    if not content and doc_id is not None:
+        try:
+            doc = await get_document(doc_id)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "❌ 잘못된 기사 id 입니다."})
+        if doc is None:
+            return {"error": "❌ 기사를 찾을 수 없습니다."}
+        content = doc.get("본문", "")
+    if debug:
+        print(f"📄 본문 길이: {len(content)}자")
+        print(f"📄 본문 앞 100자: {content[:100]}")
 
     if not content:
         return {"error": "❌ 기사 본문이 없습니다."}
 
-    summary = call_vllm_summarize_article(content, question)
+    # ✅ 저장된 요약 우선 사용 (기사 id + 본문 해시 + 프롬프트 버전)
+    article_key = doc_id if doc_id is not None else ""
+    digest = content_hash(content)
+    cached = await asyncio.to_thread(summary_store.get, article_key, digest)
+    if cached is not None:
+        if debug:
+            print("⚡ 저장된 요약 사용")
+        return {"summary": cached}
+
+    summary = await call_vllm_summarize_article(content, question)
+    if is_llm_unavailable(summary):
+        return JSONResponse(status_code=503, content={"error": summary})
+    if not is_llm_error(summary):
+        await asyncio.to_thread(summary_store.put, article_key, digest, summary)
     return {"summary": summary}
+
+
+# ✅ 여러 기사를 한 번의 vLLM 요청으로 요약
+#    요청: {"ids": [...]} 또는 {"articles": [{"id": ..., "content": ...}, ...]}
+#    응답: 입력 순서대로 항목별 {"id", "summary"} 또는 {"id", "error"}
+#    요청 형식이 틀리면 400, 항목 하나가 잘못된 경우(객체가 아님 / 잘못된 id / 본문 없음)는 그 항목만 오류
+@app.post("/summarize/batch")
+async def summarize_article_batch(request: Request):
+    data = await request.json()
+    if not isinstance(data, dict):
+        return JSONResponse(status_code=400, content={"error": "❌ 요청은 JSON 객체여야 합니다."})
+    articles, ids = data.get("articles"), data.get("ids")
+    if articles is None and isinstance(ids, list):
+        articles = [{"id": doc_id} for doc_id in ids]
+    if not isinstance(articles, list) or not articles:
+        return JSONResponse(status_code=400, content={"error": "❌ 요약할 기사가 없습니다. (articles 또는 ids 목록 필요)"})
+    if len(articles) > SUMMARY_BATCH_MAX_ITEMS:
+        return JSONResponse(status_code=400, content={
+            "error": f"❌ 한 번에 최대 {SUMMARY_BATCH_MAX_ITEMS}건까지 요약할 수 있습니다."
+        })
+
+    print(f"\n🧠 배치 요약 요청 수신: {len(articles)}건")
+
+    results = [None] * len(articles)
+    point_ids = {}  # 본문 없이 id 만 온 항목 → point id
+    for idx, article in enumerate(articles):
+        if not isinstance(article, dict):
+            results[idx] = {"id": None, "error": "❌ 잘못된 항목입니다. (객체가 아님)"}
+            continue
+        content = article.get("content")
+        if content is not None and not isinstance(content, str):
+            results[idx] = {"id": article.get("id"), "error": "❌ 잘못된 항목입니다. (content 는 문자열)"}
+        elif not content and article.get("id") is not None:
+            try:
+                point_ids[idx] = parse_point_id(article["id"])
+            except ValueError:
+                results[idx] = {"id": article["id"], "error": "❌ 잘못된 기사 id 입니다."}
+
+    # ✅ 본문 없이 id 만 온 기사는 한 번에 조회
+    fetched = await get_documents(list(point_ids.values()))
+
+    pending = []  # (index, article_key, digest, content)
+    cached_count = 0
+    for idx, article in enumerate(articles):
+        if results[idx] is not None:
+            continue
+        doc_id = article.get("id")
+        content = article.get("content") or fetched.get(str(point_ids.get(idx)), {}).get("본문", "")
+        if not content:
+            results[idx] = {"id": doc_id, "error": "❌ 기사 본문이 없습니다."}
+            continue
+
+        article_key = doc_id if doc_id is not None else ""
+        digest = content_hash(content)
+        cached = await asyncio.to_thread(summary_store.get, article_key, digest)
+        if cached is not None:
+            results[idx] = {"id": doc_id, "summary": cached}
+            cached_count += 1
+        else:
+            pending.append((idx, article_key, digest, content))
+
+    summaries = await call_vllm_summarize_articles([content for *_, content in pending])
+    # vLLM 을 쓸 수 없어도 저장소에서 찾은 요약이 있으면 200 (요약하지 못한 항목에만 오류), 성공한 항목이 하나도 없을 때만 503
+    if summaries and cached_count == 0 and all(is_llm_unavailable(summary) for summary in summaries):
+        return JSONResponse(status_code=503, content={"error": summaries[0]})
+    for (idx, article_key, digest, _), summary in zip(pending, summaries):
+        doc_id = articles[idx].get("id")
+        if is_llm_error(summary):
+            results[idx] = {"id": doc_id, "error": summary}
+            continue
+        await asyncio.to_thread(summary_store.put, article_key, digest, summary)
+        results[idx] = {"id": doc_id, "summary": summary}
+
+    print(f"✅ 배치 요약 완료: 저장소 {cached_count}건 / vLLM {len(pending)}건")
+    return {"results": results}
+
+
+# ✅ SSE 이벤트 한 건
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/summarize/stream")
+async def summarize_article_stream(request: Request):
+    data = await request.json()
+    content = data.get("content", "")
+    question = data.get("question", None)
+    doc_id = data.get("id")
+
+    debug = debug_sampled()
+    if debug:
+        print("\n🧠 스트리밍 요약 요청 수신")
+    if not content and doc_id is not None:
+        try:
+            doc = await get_document(doc_id)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "❌ 잘못된 기사 id 입니다."})
+        content = doc.get("본문", "") if doc else ""
+
+    article_key = doc_id if doc_id is not None else ""
+    digest = content_hash(content) if content else ""
+    cached = await asyncio.to_thread(summary_store.get, article_key, digest) if content else None
+
+    # ✅ vLLM 대기열이 가득 찼거나 차단 중이면 스트림을 열지 않고 바로 503
+    unavailable = llm_unavailable_reason() if content and cached is None else None
+    if unavailable:
+        return JSONResponse(status_code=503, content={"error": unavailable})
+
+    async def event_stream():
+        if not content:
+            yield sse_event({"error": "❌ 기사 본문이 없습니다."}, event="error")
+            return
+
+        if cached is not None:
+            if debug:
+                print("⚡ 저장된 요약 사용")
+            yield sse_event({"text": cached})
+            yield sse_event({}, event="done")
+            return
+
+        parts = []
+        try:
+            async for delta in stream_summarize_article(content, question):
+                parts.append(delta)
+                yield sse_event({"text": delta})
+        except Exception as e:
+            print(f"[❌ 스트리밍 요약 실패]: {e}")
+            ERRORS.inc(component="llm")
+            yield sse_event({"error": "❌ 요약 중 오류가 발생했습니다."}, event="error")
+            return
+        if parts:
+            await asyncio.to_thread(summary_store.put, article_key, digest, "".join(parts))
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,197 @@
+import os, time, random, bisect, threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# ✅ Prometheus 텍스트 형식 지표 (외부 라이브러리 없이 /metrics 에서 노출)
+#    Histogram / Counter 는 요청 경로에서 직접 기록, 캐시/배처 통계는 조회 시점에 콜백으로 수집
+
+# ✅ 디버그 출력 설정
+#    LOG_LEVEL=debug 일 때만 요청별 검색 로그(질문/키워드/결과 수)와 응답 전체/LLM 원본 응답 같은 큰 출력을 남기고,
+#    그중 DEBUG_LOG_SAMPLE_RATE 비율만 출력
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()
+DEBUG_LOG_SAMPLE_RATE = float(os.getenv("DEBUG_LOG_SAMPLE_RATE", "0.01"))
+
+# 지연시간 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 배치 크기 버킷
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def debug_sampled() -> bool:
+    return LOG_LEVEL == "debug" and random.random() < DEBUG_LOG_SAMPLE_RATE
+
+
+# 정렬된 값 목록의 p 백분위수 (선형 보간, 벤치마크 / recall 보고서 공통)
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple, list] = {}  # 라벨 → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if idx < len(self.buckets):
+                state[idx] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    # with 블록 안의 await 까지 포함한 경과 시간을 기록
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    le = 'le="%s"' % _format_value(float(bound))
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+# ✅ 조회 시점에 값을 읽어 오는 지표 (fn 은 {라벨 값 튜플: 값} 반환)
+class CallbackMetric:
+    def __init__(self, name: str, help_text: str, metric_type: str, labelnames: Tuple[str, ...],
+                 fn: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self.labelnames = labelnames
+        self.fn = fn
+        REGISTRY.append(self)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(self.fn().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+REGISTRY: List = []
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        try:
+            lines.extend(metric.collect())
+        except Exception as e:
+            print(f"❌ 지표 수집 실패 ({metric.name}): {e}")
+    return "\n".join(lines) + "\n"
+
+
+# ✅ 파이프라인 단계별 소요 시간 (keyword_llm / embed / rerank / summarize / search)
+STAGE_SECONDS = Histogram("rag_stage_duration_seconds", "Time spent in each pipeline stage", ("stage",))
+
+# ✅ Qdrant 요청별 소요 시간
+QDRANT_SECONDS = Histogram("rag_qdrant_query_duration_seconds", "Time spent in each Qdrant request", ("operation",))
+
+# ✅ HTTP 엔드포인트 소요 시간 (스트리밍 응답은 헤더 전송까지)
+REQUEST_SECONDS = Histogram("rag_http_request_duration_seconds", "HTTP request latency", ("path", "method", "status"))
+
+# ✅ 오류 수 (component: llm / qdrant / embed / summarize ...)
+ERRORS = Counter("rag_errors_total", "Errors by component", ("component",))
+
+# ✅ vLLM 요청 제어 (reason: queue_full / queue_timeout / circuit_open)
+LLM_REJECTED = Counter("rag_llm_rejected_total", "vLLM requests rejected before being sent", ("reason",))
+LLM_RETRIES = Counter("rag_llm_retries_total", "vLLM request retries after transient errors")
+
+# ✅ 요약 방식 (mode: single / chunked) 과 분할 요약 조각 수
+SUMMARY_REQUESTS = Counter("rag_summarize_requests_total", "Article summaries by mode", ("mode",))
+
+# ✅ 배치 크기
+EMBED_BATCH_SIZE = Histogram("rag_embed_batch_size", "Texts per embedding micro-batch", buckets=BATCH_SIZE_BUCKETS)
+LLM_BATCH_SIZE = Histogram("rag_llm_batch_size", "Prompts per multi-prompt vLLM request", buckets=BATCH_SIZE_BUCKETS)
+SUMMARY_CHUNKS = Histogram("rag_summarize_chunks", "Chunks per map-reduce article summary", buckets=BATCH_SIZE_BUCKETS)
+
+# ✅ 캐시 통계 (register_cache 로 등록한 캐시의 stats() 를 조회 시점에 읽음)
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache):
+    _caches[name] = cache
+
+
+def _cache_stat(field: str) -> Callable[[], Dict[Tuple, float]]:
+    def collect():
+        values = {}
+        for name, cache in _caches.items():
+            stats = cache.stats()
+            if field in stats:
+                values[(name,)] = stats[field]
+        return values
+    return collect
+
+
+CallbackMetric("rag_cache_hits_total", "Cache hits", "counter", ("cache",), _cache_stat("hits"))
+CallbackMetric("rag_cache_misses_total", "Cache misses", "counter", ("cache",), _cache_stat("misses"))
+CallbackMetric("rag_cache_entries", "Entries currently cached", "gauge", ("cache",), _cache_stat("size"))
+CallbackMetric("rag_cache_bytes", "Estimated bytes currently cached", "gauge", ("cache",), _cache_stat("bytes"))
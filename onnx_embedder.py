@@ -0,0 +1,235 @@
+"""
+KURE-v1 int8 양자화 ONNX 임베딩 백엔드 (GPU 없는 서버용)
+
+    python onnx_embedder.py export --output models/kure-v1-int8
+    python onnx_embedder.py compare --model-dir models/kure-v1-int8 --samples questions.txt
+
+export  : SentenceTransformer 모델을 ONNX 로 내보내고 동적 int8 양자화 (가중치 int8, 활성값은 실행 시 양자화)
+compare : 같은 문장을 fp32 원본 모델과 int8 모델로 임베딩해 cosine 일치도를 출력, 기준 미달이면 종료 코드 1
+
+서버에서는 EMBED_BACKEND=onnx-int8, EMBED_ONNX_DIR=models/kure-v1-int8 로 선택 (resources.get_model).
+onnxruntime / transformers 가 필요 (requirements.txt 에는 없음, 이 백엔드를 쓰는 서버에만 설치).
+"""
+import os, sys, json, time, argparse
+from typing import List, Optional, Union
+import numpy as np
+
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+# 가중치는 그래프와 분리해서 "<파일>.data" 하나에 저장 (KURE-v1 fp32 는 약 2.2GB 로 protobuf 2GB 제한을 넘음)
+ONNX_EXTERNAL_DATA_SUFFIX = ".data"
+CONFIG_FILE = "embedder_config.json"
+
+
+# ✅ onnxruntime 세션으로 SentenceTransformer.encode 와 같은 결과를 내는 임베더
+#    (토크나이저 → 트랜스포머 → pooling → 정규화, 입력이 문자열 하나면 1차원 벡터 반환)
+class OnnxEmbedder:
+    def __init__(self, model_dir: str, intra_op_threads: int = 0, inter_op_threads: int = 0,
+                 model_file: str = ONNX_INT8_FILE):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads > 0:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.config["max_seq_length"], return_tensors="np"
+        )
+        feed = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        hidden = self.session.run(None, feed)[0]
+        return pool(hidden, tokens["attention_mask"], self.config["pooling_mode"])
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               normalize_embeddings: Optional[bool] = None, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # 길이순으로 묶어 패딩 낭비를 줄이고 원래 순서로 되돌림
+        order = np.argsort([-len(t) for t in texts])
+        vectors = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            vectors[idx] = self._encode_batch([texts[i] for i in idx])
+
+        if normalize_embeddings or (normalize_embeddings is None and self.config["normalize"]):
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+def pool(hidden: np.ndarray, attention_mask: np.ndarray, mode: str) -> np.ndarray:
+    if mode == "cls":
+        return hidden[:, 0]
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    if mode == "max":
+        return np.where(mask > 0, hidden, -1e9).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+# ONNX 파일 크기 (MB, 외부 가중치 파일 포함)
+def onnx_size_mb(path: str) -> float:
+    data_path = path + ONNX_EXTERNAL_DATA_SUFFIX
+    return (os.path.getsize(path) + (os.path.getsize(data_path) if os.path.exists(data_path) else 0)) / 1e6
+
+
+# ✅ SentenceTransformer → ONNX(fp32) → 동적 int8 양자화
+#    fp32 / int8 모두 가중치를 외부 데이터 파일로 저장 (2GB 넘는 모델도 내보내기 / 양자화 가능)
+def export_quantized(model_name: str, output_dir: str, opset: int = 17, per_channel: bool = True):
+    import tempfile
+    import onnx
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = next(m for m in st_model if type(m).__name__ == "Pooling")
+    config = {
+        "model_name": model_name,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "pooling_mode": pooling.get_pooling_mode_str(),
+        "normalize": any(type(m).__name__ == "Normalize" for m in st_model),
+    }
+    if config["pooling_mode"] not in ("cls", "mean", "max"):
+        raise SystemExit(f"❌ 지원하지 않는 pooling 방식: {config['pooling_mode']}")
+
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["내보내기용 예시 문장입니다"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILE)
+
+    start = time.time()
+    # 2GB 가 넘으면 torch 는 가중치를 텐서마다 따로 파일로 쓰므로 임시 디렉터리에 내보낸 뒤 파일 하나로 합쳐서 저장
+    with tempfile.TemporaryDirectory(dir=output_dir) as export_dir, torch.no_grad():
+        export_path = os.path.join(export_dir, ONNX_FP32_FILE)
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            export_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+        onnx.save_model(
+            onnx.load(export_path), fp32_path,
+            save_as_external_data=True, all_tensors_to_one_file=True,
+            location=ONNX_FP32_FILE + ONNX_EXTERNAL_DATA_SUFFIX
+        )
+    print(f"📤 ONNX 내보내기 완료: {fp32_path} ({time.time() - start:.1f}초)")
+
+    start = time.time()
+    quantize_dynamic(
+        fp32_path, os.path.join(output_dir, ONNX_INT8_FILE),
+        weight_type=QuantType.QInt8, per_channel=per_channel,
+        use_external_data_format=True
+    )
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    sizes = {name: onnx_size_mb(os.path.join(output_dir, name)) for name in (ONNX_FP32_FILE, ONNX_INT8_FILE)}
+    print(f"✅ int8 양자화 완료 ({time.time() - start:.1f}초): "
+          f"{sizes[ONNX_FP32_FILE]:.0f}MB → {sizes[ONNX_INT8_FILE]:.0f}MB | {config}")
+
+
+# ✅ fp32 원본 모델 대비 cosine 일치도
+def compare(model_name: str, model_dir: str, samples: List[str], batch_size: int,
+            threshold: float, intra_op_threads: int) -> bool:
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu")
+    candidate = OnnxEmbedder(model_dir, intra_op_threads=intra_op_threads)
+
+    start = time.time()
+    ref = reference.encode(samples, batch_size=batch_size, normalize_embeddings=True)
+    ref_seconds = time.time() - start
+    start = time.time()
+    cand = candidate.encode(samples, batch_size=batch_size, normalize_embeddings=True)
+    cand_seconds = time.time() - start
+
+    cosines = np.sum(ref * cand, axis=1)
+    worst = np.argsort(cosines)[:3]
+    print(f"📊 문장 {len(samples)}건 | cosine 평균 {cosines.mean():.5f} / 최소 {cosines.min():.5f} "
+          f"/ 하위 1% {np.percentile(cosines, 1):.5f}")
+    print(f"⏱️ fp32 {ref_seconds:.2f}초 | int8 {cand_seconds:.2f}초 ({ref_seconds / max(cand_seconds, 1e-9):.2f}배)")
+    for i in worst:
+        print(f"   {cosines[i]:.5f}  {samples[i][:60]}")
+
+    passed = bool(cosines.min() >= threshold)
+    print(f"{'✅' if passed else '❌'} 최소 cosine {cosines.min():.5f} (기준 {threshold})")
+    return passed
+
+
+def load_samples(path: str, limit: int) -> List[str]:
+    if not path:
+        from benchmark import make_queries
+        return make_queries(limit, seed=42)
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                line = record.get("question") or f"{record.get('title_original', '')}\n{record.get('content', '')}".strip()
+            samples.append(line)
+            if len(samples) >= limit:
+                break
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KURE-v1 int8 ONNX 임베딩 백엔드 도구")
+    parser.add_argument("--model", default=os.getenv("EMBED_MODEL_NAME", "nlpai-lab/KURE-v1"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="ONNX 내보내기 + int8 양자화")
+    export.add_argument("--output", required=True, help="저장 디렉터리 (이후 EMBED_ONNX_DIR 로 지정)")
+    export.add_argument("--opset", type=int, default=17)
+    export.add_argument("--per-tensor", action="store_true", help="채널별 대신 텐서 단위 양자화")
+
+    check = sub.add_parser("compare", help="fp32 모델 대비 cosine 일치도 확인")
+    check.add_argument("--model-dir", required=True)
+    check.add_argument("--samples", default="", help="문장 파일 (한 줄 하나, 또는 question/title_original/content 필드 JSONL), 기본: 합성 질문")
+    check.add_argument("--limit", type=int, default=500)
+    check.add_argument("--batch-size", type=int, default=32)
+    check.add_argument("--threshold", type=float, default=0.98, help="허용 최소 cosine")
+    check.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op 스레드 수 (0: 자동)")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_quantized(args.model, args.output, opset=args.opset, per_channel=not args.per_tensor)
+    else:
+        samples = load_samples(args.samples, args.limit)
+        passed = compare(args.model, args.model_dir, samples, args.batch_size, args.threshold, args.threads)
+        sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
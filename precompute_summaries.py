@@ -0,0 +1,148 @@
+"""
+요약 사전 생성 배치 작업
+
+Qdrant 컬렉션을 순회하면서 요약 저장소에 없는 기사(또는 본문/프롬프트가 바뀐 기사)의
+요약을 vLLM 으로 미리 생성한다. 중단 후 다시 실행하면 마지막으로 끝낸 페이지부터 이어서 진행한다.
+요약에 실패한 기사가 있는 페이지부터는 재시작 지점을 저장하지 않으므로 다시 실행하면 그 페이지부터 재시도한다.
+
+    python precompute_summaries.py --concurrency 8 --rate 4
+    python precompute_summaries.py --restart        # 처음부터 다시 순회 (이미 저장된 요약은 건너뜀)
+    python precompute_summaries.py --partition-by-year   # 연도별 컬렉션(<컬렉션>_<연도>)을 모두 순회, 재시작 지점은 컬렉션별
+"""
+import argparse, asyncio, json, time
+from typing import List
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PayloadSelectorInclude
+from vllm_utils import call_vllm_summarize_article, close_http_client, is_llm_error, SUMMARY_PROMPT_VERSION
+from summary_store import summary_store, content_hash
+from qdrant_admin import QDRANT_HOST, QDRANT_PORT, PARTITION_BY_YEAR, collection_name, parse_partition_name
+
+
+def state_key(collection: str) -> str:
+    return f"precompute_summaries:{collection}:{SUMMARY_PROMPT_VERSION}"
+
+
+# ✅ 초당 요청 수 제한 (요청 시작 간격을 일정하게 유지)
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def summarize_point(point, semaphore, limiter, stats):
+    content = (point.payload or {}).get("content", "")
+    if not content:
+        stats["empty"] += 1
+        return
+    digest = content_hash(content)
+    if await asyncio.to_thread(summary_store.get, point.id, digest) is not None:
+        stats["skipped"] += 1
+        return
+
+    async with semaphore:
+        await limiter.wait()
+        summary = await call_vllm_summarize_article(content)
+
+    if is_llm_error(summary):
+        stats["failed"] += 1
+        return
+    await asyncio.to_thread(summary_store.put, point.id, digest, summary)
+    stats["generated"] += 1
+
+
+# ✅ 순회할 컬렉션 (파티션을 켜면 PartitionRouter 처럼 <기본 컬렉션>_<연도> 컬렉션 전부)
+async def target_collections(client: AsyncQdrantClient, base: str, partitioned: bool) -> List[str]:
+    if not partitioned:
+        return [base]
+    response = await client.get_collections()
+    return sorted(c.name for c in response.collections if parse_partition_name(base, c.name) is not False)
+
+
+# ✅ 컬렉션 하나 순회 (재시작 지점은 컬렉션마다 따로 저장), 처리한 기사 수 반환
+async def precompute_collection(client, name: str, args, semaphore, limiter, stats, start: float, limit: int) -> int:
+    offset = None if args.restart else summary_store.get_state(state_key(name))
+    offset = json.loads(offset) if offset else None
+    if offset is not None:
+        print(f"↩️ {name}: 이전 작업 지점부터 재개: offset={offset}")
+
+    processed = 0
+    checkpoint_frozen = False
+    while True:
+        points, next_offset = await client.scroll(
+            collection_name=name,
+            limit=args.page_size,
+            offset=offset,
+            with_payload=PayloadSelectorInclude(include=["content"]),
+            with_vectors=False
+        )
+        failed_before = stats["failed"]
+        await asyncio.gather(*(summarize_point(p, semaphore, limiter, stats) for p in points))
+        processed += len(points)
+
+        # 페이지 단위로 재시작 지점 저장 (실패가 나온 페이지부터는 저장하지 않음 → 다음 실행에서 그 페이지부터 재시도)
+        if stats["failed"] > failed_before and not checkpoint_frozen:
+            checkpoint_frozen = True
+            print(f"⚠️ {name}: 요약 실패 발생 → 재시작 지점을 offset={offset} 에 고정")
+        if not checkpoint_frozen:
+            summary_store.set_state(state_key(name), json.dumps(next_offset) if next_offset is not None else None)
+        elapsed = time.time() - start
+        print(f"📄 {name}: {processed}건 처리 | 생성 {stats['generated']} / 건너뜀 {stats['skipped']} / "
+              f"실패 {stats['failed']} | {stats['generated'] / elapsed if elapsed else 0:.2f}건/초")
+
+        if next_offset is None or (limit and processed >= limit):
+            return processed
+        offset = next_offset
+
+
+async def run(args):
+    client = AsyncQdrantClient(host=args.host, port=args.port)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limiter = RateLimiter(args.rate)
+    stats = {"generated": 0, "skipped": 0, "failed": 0, "empty": 0}
+
+    start = time.time()
+    processed = 0
+    try:
+        collections = await target_collections(client, args.collection, args.partition_by_year)
+        if args.partition_by_year:
+            print(f"📅 연도별 파티션 {len(collections)}개 순회: {collections}")
+        for name in collections:
+            remaining = args.limit - processed if args.limit else 0
+            processed += await precompute_collection(client, name, args, semaphore, limiter, stats, start, remaining)
+            if args.limit and processed >= args.limit:
+                break
+    finally:
+        await client.close()
+        await close_http_client()
+
+    print(f"✅ 완료 (소요 시간: {time.time() - start:.1f}초) → {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qdrant 기사 요약 사전 생성")
+    parser.add_argument("--host", default=QDRANT_HOST)
+    parser.add_argument("--port", type=int, default=QDRANT_PORT)
+    parser.add_argument("--collection", default=collection_name)
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 vLLM 요청 수")
+    parser.add_argument("--rate", type=float, default=2.0, help="초당 최대 vLLM 요청 수 (0 이면 제한 없음)")
+    parser.add_argument("--page-size", type=int, default=64, help="Qdrant scroll 페이지 크기")
+    parser.add_argument("--limit", type=int, default=0, help="처리할 최대 기사 수 (0 이면 전체)")
+    parser.add_argument("--restart", action="store_true", help="저장된 재시작 지점을 무시하고 처음부터 순회")
+    parser.add_argument("--partition-by-year", action="store_true", default=PARTITION_BY_YEAR,
+                        help="연도별 컬렉션(<컬렉션>_<연도>)을 모두 순회 (기본: PARTITION_BY_YEAR)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
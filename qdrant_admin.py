@@ -0,0 +1,660 @@
+"""
+Qdrant 컬렉션 관리 명령
+
+    python qdrant_admin.py create-indexes            # 검색 필터용 payload 인덱스 생성
+    python qdrant_admin.py create-text-indexes       # 제목/본문 전문(full-text) 인덱스 추가 / 토크나이저 변경 (기존 컬렉션 마이그레이션)
+    python qdrant_admin.py build-hybrid --target article_2025_hybrid
+                                                     # 밀집 + 희소(BM25) 벡터 컬렉션으로 복사 (희소 벡터는 기존 컬렉션에 추가 불가)
+    python qdrant_admin.py quantize --type scalar     # 밀집 벡터 양자화 켜기 (scalar int8 / binary / none), 양자화 벡터는 RAM 에 유지
+    python qdrant_admin.py quantize --type binary --vectors-on-disk
+                                                     # 원본 float32 벡터는 디스크로 (재점수 계산 때만 읽음)
+    python qdrant_admin.py recall-report --oversampling 1,2,4
+                                                     # 정확(exact) 검색 대비 recall / 지연시간 비교
+    python qdrant_admin.py migrate-dates             # 문자열 year / month / date_day → 정수 + publish_date(YYYYMMDD) 추가 + 정수 인덱스
+                                                     # (이어서 backfill-snippets 도 실행)
+    python qdrant_admin.py backfill-snippets         # 목록용 미리보기(snippet)가 없는 기존 기사에 본문으로 snippet 저장
+    python qdrant_admin.py partition                 # 연도별 컬렉션(<컬렉션>_<연도>)으로 분할 복사 (PARTITION_BY_YEAR=1 로 사용)
+
+- build-hybrid / partition 은 복사하면서 날짜 정수 변환과 snippet 저장을 함께 하므로 migrate-dates 를 먼저 실행하지 않아도 된다.
+  원본 컬렉션을 계속 쓸 경우에만 원본에 migrate-dates 를 실행한다.
+- 파티션을 만든 뒤 새 기사는 ingest --partition-by-year (또는 PARTITION_BY_YEAR=1) 로 파티션에 적재해야
+  qdrant_utils / qdrant_multi 검색에 나온다.
+"""
+import os, re, json, time, random, argparse, asyncio
+from collections import defaultdict
+from typing import Dict, Optional
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, PayloadSchemaType, VectorParams, TextIndexParams, TextIndexType, TokenizerType,
+    FieldCondition, MatchText, MatchValue, SparseVectorParams, Modifier, PointStruct,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    Disabled, VectorParamsDiff, SearchParams, QuantizationSearchParams, SetPayload, SetPayloadOperation,
+    OptimizersConfigDiff, Filter, HasIdCondition
+)
+from sparse_utils import encode_sparse_document, document_text
+from vllm_utils import clean_article_text
+from metrics import percentile
+
+# ✅ Qdrant 설정 (qdrant_utils 와 동일, 임베딩 모델 로딩을 피하려고 직접 생성)
+QDRANT_HOST = "localhost"
+QDRANT_PORT = 6333
+collection_name = os.getenv("QDRANT_COLLECTION", "article_2025_image_test")
+
+# ✅ 적재 버전 표시 파일 (ingest / build-hybrid 가 끝날 때 갱신, 검색 응답 캐시 무효화에 사용)
+#    point 수가 같은 덮어쓰기 적재도 감지하기 위함
+INGEST_VERSION_FILE = os.getenv("INGEST_VERSION_FILE", ".ingest_version")
+
+# ✅ 벡터 구성
+#    밀집(KURE-v1) 벡터는 기본(이름 없는) 벡터, BM25 스타일 희소 벡터는 이름 있는 sparse 벡터로 저장
+#    희소 벡터의 IDF 는 Qdrant 가 서버에서 계산 (Modifier.IDF)
+SPARSE_VECTOR_NAME = "sparse"
+
+
+# 희소 벡터가 있는 컬렉션은 벡터가 {"": 밀집, "sparse": 희소} 형태로 오므로 밀집 벡터만 꺼냄
+def dense_vector(vector):
+    return vector.get("") if isinstance(vector, dict) else vector
+
+# ✅ 날짜 필드는 정수로 저장하고 정수 인덱스로 비교 (qdrant_utils / qdrant_multi 공통)
+#    예전 적재분은 문자열이므로 migrate-dates 로 한 번 변환해야 날짜 필터가 맞음
+DATE_FIELDS = ["year", "month", "date_day"]
+
+# ✅ 발행일 정렬용 정수 필드 (YYYYMMDD, year / month / date_day 로 계산)
+#    정수 인덱스(range)가 있어야 Qdrant order_by 로 최신순 정렬 가능
+PUBLISH_DATE_FIELD = "publish_date"
+
+# ✅ 필터에 쓰이는 payload 필드 인덱스
+PAYLOAD_INDEX_SCHEMA = {
+    "year": PayloadSchemaType.INTEGER,
+    "month": PayloadSchemaType.INTEGER,
+    "date_day": PayloadSchemaType.INTEGER,
+    PUBLISH_DATE_FIELD: PayloadSchemaType.INTEGER,
+    "reporter": PayloadSchemaType.KEYWORD,
+    "topic": PayloadSchemaType.KEYWORD,
+    "organization": PayloadSchemaType.KEYWORD,
+}
+
+
+# ✅ 전문 검색 인덱스 (MatchText 조건용)
+#    prefix 토크나이저는 단어마다 앞부분(min_token_len 글자 이상)을 모두 색인하고 검색어는 단어 그대로 비교하므로
+#    조사가 붙은 '비트코인이' 도 '비트코인' 으로 검색됨
+#    (multilingual 토크나이저는 multiling-korean 기능을 넣어 빌드한 Qdrant 에서만 한국어를 형태소로 나누고,
+#     기본 빌드에서는 어절 통째로 색인해서 '비트코인' 으로 '비트코인이' 를 찾지 못함)
+TEXT_INDEX_FIELDS = ["title_original", "content"]
+TEXT_INDEX_PARAMS = TextIndexParams(
+    type=TextIndexType.TEXT,
+    tokenizer=TokenizerType.PREFIX,
+    min_token_len=2,
+    max_token_len=20,
+    lowercase=True,
+)
+
+# ✅ 연도별 파티션 (컬렉션 이름: <기본 컬렉션>_<연도>, 연도가 없는 기사는 <기본 컬렉션>_undated)
+#    PARTITION_BY_YEAR=1 이면 ingest 는 연도별 컬렉션에 적재하고, qdrant_utils 는 질문의 연도에 맞는 파티션만 조회
+#    (연도가 없는 질문은 모든 파티션에 병렬로 보내고 점수순으로 합침)
+PARTITION_BY_YEAR = os.getenv("PARTITION_BY_YEAR", "0") == "1"
+UNDATED_PARTITION = "undated"
+
+
+def to_int(value) -> Optional[int]:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+# ✅ 정수 point id 로 쓸 수 있는 기사 id (0 이상 정수 또는 ASCII 숫자 문자열), 아니면 None
+#    ingest.to_point_id 와 qdrant_utils.parse_point_id 가 같은 기준을 쓰도록 공유
+#    ('１２３' 같은 전각/유니코드 숫자는 정수로 보지 않음)
+def integer_point_id(value) -> Optional[int]:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+
+# 날짜 필드를 정수로 바꾼 payload 일부 (변환할 수 없는 값은 제외)
+#    연/월/일이 모두 올바르면 publish_date 도 추가
+def typed_date_fields(payload: Dict) -> Dict:
+    typed = {}
+    for field in DATE_FIELDS:
+        value = to_int(payload.get(field))
+        if value is not None:
+            typed[field] = value
+    year, month, day = (typed.get(field) for field in DATE_FIELDS)
+    if year is not None and month is not None and day is not None and 1 <= month <= 12 and 1 <= day <= 31:
+        typed[PUBLISH_DATE_FIELD] = year * 10000 + month * 100 + day
+    return typed
+
+
+# ✅ 목록용 미리보기 문구 (ingest 가 payload 의 snippet 필드로 저장, 검색 목록은 본문 대신 이 필드만 조회)
+SNIPPET_LENGTH = 160
+
+
+def make_snippet(text: str, length: int = SNIPPET_LENGTH) -> str:
+    cleaned = clean_article_text(text or "")
+    if len(cleaned) <= length:
+        return cleaned
+    cut = cleaned[:length]
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return cut + "…"
+
+
+# payload 의 year 값 → 파티션 연도 (4자리 정수로 바꿀 수 없는 값은 None → undated 파티션)
+#    '2024년' / '' / 25 같은 값으로 parse_partition_name 이 찾지 못하는 컬렉션이 생기지 않도록 함
+def partition_year(value) -> Optional[int]:
+    year = None if isinstance(value, bool) else to_int(value)
+    return year if year is not None and 1000 <= year <= 9999 else None
+
+
+def partition_name(base: str, year) -> str:
+    year = partition_year(year)
+    return f"{base}_{year if year is not None else UNDATED_PARTITION}"
+
+
+# 컬렉션 이름 → 파티션 연도 (파티션이 아니면 False, undated 파티션은 None)
+def parse_partition_name(base: str, name: str):
+    m = re.fullmatch(re.escape(base) + r"_(\d{4}|" + UNDATED_PARTITION + ")", name)
+    if not m:
+        return False
+    return None if m.group(1) == UNDATED_PARTITION else int(m.group(1))
+
+
+# ✅ 키워드 매칭 방식 (qdrant_utils / qdrant_multi 공통)
+#    text  : 제목/본문은 전문 인덱스 기반 MatchText (단어 앞부분 일치, 조사가 붙은 어절도 검색), 나머지는 MatchValue
+#    exact : 모든 필드를 MatchValue (필드 전체가 키워드와 같아야 함, 기존 방식)
+KEYWORD_MATCH_MODE = os.getenv("KEYWORD_MATCH_MODE", "text")
+
+
+def keyword_condition(field: str, keyword: str) -> FieldCondition:
+    if KEYWORD_MATCH_MODE == "text" and field in TEXT_INDEX_FIELDS:
+        return FieldCondition(key=field, match=MatchText(text=keyword))
+    return FieldCondition(key=field, match=MatchValue(value=keyword))
+
+
+# ✅ 밀집 벡터 검색 방식 (qdrant_utils / qdrant_multi 공통)
+#    default   : 서버 기본값 (양자화가 켜져 있으면 양자화 벡터로 검색 후 기본 재점수)
+#    quantized : 양자화 벡터로 limit × VECTOR_OVERSAMPLING 개 후보를 찾고, VECTOR_RESCORE 면 원본 벡터로 재점수
+#    original  : 양자화가 있어도 무시하고 원본 벡터 HNSW 검색
+#    exact     : 색인/양자화 없이 전체 원본 벡터 비교 (정답 기준, 느림)
+VECTOR_SEARCH_MODE = os.getenv("VECTOR_SEARCH_MODE", "default")
+VECTOR_OVERSAMPLING = float(os.getenv("VECTOR_OVERSAMPLING", "2.0"))
+VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "1") == "1"
+
+
+def vector_search_params(mode: str = None, oversampling: float = None, rescore: bool = None):
+    mode = mode or VECTOR_SEARCH_MODE
+    if mode == "exact":
+        return SearchParams(exact=True)
+    if mode == "quantized":
+        return SearchParams(quantization=QuantizationSearchParams(
+            rescore=VECTOR_RESCORE if rescore is None else rescore,
+            oversampling=VECTOR_OVERSAMPLING if oversampling is None else oversampling,
+        ))
+    if mode == "original":
+        return SearchParams(quantization=QuantizationSearchParams(ignore=True))
+    return None
+
+
+# ✅ 양자화 설정 (scalar: float32 → int8, 4배 축소 / binary: 1비트, 32배 축소)
+#    always_ram=True 면 원본 벡터를 디스크에 두더라도 양자화 벡터는 RAM 에 유지
+def quantization_config(kind: str, always_ram: bool = True, quantile: float = 0.99):
+    if kind == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8, quantile=quantile, always_ram=always_ram
+        ))
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    if kind == "none":
+        return Disabled.DISABLED
+    raise ValueError(f"알 수 없는 양자화 방식: {kind}")
+
+
+def read_ingest_version(name: str) -> str:
+    try:
+        with open(INGEST_VERSION_FILE, encoding="utf-8") as f:
+            return json.load(f).get(name, "")
+    except (OSError, ValueError):
+        return ""
+
+
+def bump_ingest_version(name: str) -> str:
+    try:
+        with open(INGEST_VERSION_FILE, encoding="utf-8") as f:
+            versions = json.load(f)
+    except (OSError, ValueError):
+        versions = {}
+    versions[name] = f"{time.time():.6f}"
+    tmp_path = f"{INGEST_VERSION_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(versions, f)
+    os.replace(tmp_path, INGEST_VERSION_FILE)
+    print(f"🔖 적재 버전 갱신: {name} → {versions[name]}")
+    return versions[name]
+
+
+# ✅ 컬렉션이 없으면 생성 (기본으로 희소 벡터 포함)
+async def ensure_collection(client: AsyncQdrantClient, name: str, vector_size: int, sparse: bool = True,
+                            quantization=None):
+    if await client.collection_exists(name):
+        return False
+    await client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        sparse_vectors_config={SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)} if sparse else None,
+        quantization_config=quantization
+    )
+    print(f"🆕 컬렉션 생성: {name} (dim={vector_size}, sparse={sparse})")
+    return True
+
+
+async def has_sparse_vectors(client: AsyncQdrantClient, name: str) -> bool:
+    info = await client.get_collection(name)
+    return SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+
+
+# ✅ 다른 컬렉션으로 복사할 때의 payload (build-hybrid / partition 공통)
+#    migrate-dates / backfill-snippets 를 거치지 않은 원본이어도 날짜는 정수로, snippet 은 채워서 복사
+def copy_payload(payload: Dict) -> Dict:
+    payload = {**payload, **typed_date_fields(payload)}
+    if not payload.get("snippet") and payload.get("content"):
+        payload["snippet"] = make_snippet(payload["content"])
+    return payload
+
+
+# ✅ 기존 컬렉션 → 밀집 + 희소 벡터 컬렉션 복사
+#    밀집 벡터는 그대로, payload 는 copy_payload 로 정리해서 옮기고,
+#    희소 벡터는 ingest 와 같은 텍스트(제목 + 정제된 본문)로 새로 계산
+async def build_hybrid_collection(client: AsyncQdrantClient, source: str, target: str, batch_size: int = 256):
+    source_info = await client.get_collection(source)
+    vector_size = source_info.config.params.vectors.size
+    # 원본 컬렉션의 양자화 설정도 그대로 유지
+    await ensure_collection(client, target, vector_size, sparse=True,
+                            quantization=source_info.config.quantization_config)
+    await ensure_payload_indexes(client, target)
+    await ensure_text_indexes(client, target)
+
+    start = time.time()
+    copied = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            await client.upsert(
+                collection_name=target,
+                points=[
+                    PointStruct(
+                        id=p.id,
+                        vector={
+                            "": dense_vector(p.vector),
+                            SPARSE_VECTOR_NAME: encode_sparse_document(
+                                document_text(p.payload.get("title_original", ""), p.payload.get("content", ""))
+                            ),
+                        },
+                        payload=copy_payload(p.payload)
+                    )
+                    for p in points
+                ],
+                wait=True
+            )
+            copied += len(points)
+            print(f"📦 {copied}건 복사 | {copied / (time.time() - start):.1f} docs/sec | 다음 offset={offset}")
+        if offset is None:
+            break
+    print(f"✅ {source} → {target}: {copied}건 복사 완료")
+    bump_ingest_version(target)
+
+
+# ✅ 기존 컬렉션의 문자열 날짜 필드 → 정수 + publish_date 추가 (같은 날짜끼리 묶어 set_payload 한 번에 처리)
+#    문자열(keyword) 인덱스는 지우고 정수 인덱스로 다시 생성
+async def migrate_date_fields(client: AsyncQdrantClient, name: str, batch_size: int = 1000):
+    info = await client.get_collection(name)
+    for field in DATE_FIELDS + [PUBLISH_DATE_FIELD]:
+        index = (info.payload_schema or {}).get(field)
+        if index is not None and index.data_type != PayloadSchemaType.INTEGER:
+            await client.delete_payload_index(name, field, wait=True)
+            print(f"🗑️ {field} 인덱스 삭제 ({index.data_type})")
+
+    start = time.time()
+    converted = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=DATE_FIELDS + [PUBLISH_DATE_FIELD],
+            with_vectors=False
+        )
+        groups = defaultdict(list)  # 정수 날짜 필드 → point id 목록
+        for p in points:
+            payload = p.payload or {}
+            typed = typed_date_fields(payload)
+            if any(type(payload.get(field)) is not int for field in typed):
+                groups[tuple(sorted(typed.items()))].append(p.id)
+        if groups:
+            await client.batch_update_points(name, update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=dict(fields), points=ids))
+                for fields, ids in groups.items()
+            ], wait=True)
+            converted += sum(len(ids) for ids in groups.values())
+            print(f"🔢 {converted}건 변환 | {time.time() - start:.1f}초 | 다음 offset={offset}")
+        if offset is None:
+            break
+
+    await ensure_payload_indexes(client, name)
+    print(f"✅ {name}: 날짜 필드 {converted}건 정수로 변환")
+    bump_ingest_version(name)
+
+
+# ✅ snippet 필드가 없는 기존 기사에 본문으로 만든 snippet 저장 (기사마다 값이 달라 point 별 set_payload)
+async def backfill_snippets(client: AsyncQdrantClient, name: str, batch_size: int = 256):
+    start = time.time()
+    filled = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["content", "snippet"],
+            with_vectors=False
+        )
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(
+                payload={"snippet": make_snippet(p.payload.get("content", ""))}, points=[p.id]
+            ))
+            for p in points
+            if p.payload is not None and not p.payload.get("snippet") and p.payload.get("content")
+        ]
+        if operations:
+            await client.batch_update_points(name, update_operations=operations, wait=True)
+            filled += len(operations)
+            print(f"✏️ snippet {filled}건 저장 | {time.time() - start:.1f}초 | 다음 offset={offset}")
+        if offset is None:
+            break
+
+    print(f"✅ {name}: snippet {filled}건 저장")
+    if filled:
+        bump_ingest_version(name)
+
+
+# ✅ 컬렉션 → 연도별 파티션 컬렉션으로 분할 복사 (원본은 그대로 둠)
+#    벡터 구성(희소 벡터 포함 여부)과 양자화 설정은 원본과 같게 만들고, payload 는 copy_payload 로 정리
+async def partition_by_year(client: AsyncQdrantClient, source: str, base: str, batch_size: int = 256):
+    source_info = await client.get_collection(source)
+    vector_size = source_info.config.params.vectors.size
+    sparse = await has_sparse_vectors(client, source)
+    prepared = set()
+
+    start = time.time()
+    copied = defaultdict(int)
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        groups = defaultdict(list)
+        for p in points:
+            payload = copy_payload(p.payload)
+            groups[partition_name(base, payload.get("year"))].append(
+                PointStruct(id=p.id, vector=p.vector, payload=payload)
+            )
+        for name, group in groups.items():
+            if name not in prepared:
+                await ensure_collection(client, name, vector_size, sparse=sparse,
+                                        quantization=source_info.config.quantization_config)
+                await ensure_payload_indexes(client, name)
+                await ensure_text_indexes(client, name)
+                prepared.add(name)
+            await client.upsert(collection_name=name, points=group, wait=True)
+            copied[name] += len(group)
+        if points:
+            total = sum(copied.values())
+            print(f"📦 {total}건 복사 | {total / (time.time() - start):.1f} docs/sec | 다음 offset={offset}")
+        if offset is None:
+            break
+
+    for name in sorted(copied):
+        print(f"   {name}: {copied[name]}건")
+    print(f"✅ {source} → 연도별 파티션 {len(copied)}개 복사 완료")
+    bump_ingest_version(base)
+
+
+# ✅ payload 인덱스 생성 (이미 있는 필드는 건너뜀)
+async def ensure_payload_indexes(client: AsyncQdrantClient, name: str, schema=None):
+    schema = schema or PAYLOAD_INDEX_SCHEMA
+    info = await client.get_collection(name)
+    existing = info.payload_schema or {}
+    for field, field_schema in schema.items():
+        if field in existing:
+            continue
+        await client.create_payload_index(
+            collection_name=name,
+            field_name=field,
+            field_schema=field_schema,
+            wait=True
+        )
+        print(f"📇 payload 인덱스 생성: {field} ({getattr(field_schema, 'type', field_schema)})")
+
+
+# ✅ 전문 검색 인덱스 생성 (본문 전체를 색인하므로 큰 컬렉션에서는 시간이 걸림)
+#    토크나이저가 TEXT_INDEX_PARAMS 와 다른 기존 인덱스(예: multilingual)는 지우고 다시 생성
+async def ensure_text_indexes(client: AsyncQdrantClient, name: str):
+    info = await client.get_collection(name)
+    for field in TEXT_INDEX_FIELDS:
+        index = (info.payload_schema or {}).get(field)
+        tokenizer = getattr(getattr(index, "params", None), "tokenizer", None)
+        if index is not None and tokenizer != TEXT_INDEX_PARAMS.tokenizer:
+            await client.delete_payload_index(name, field, wait=True)
+            print(f"🗑️ {field} 전문 인덱스 삭제 (tokenizer={getattr(tokenizer, 'value', tokenizer)})")
+    await ensure_payload_indexes(client, name, {field: TEXT_INDEX_PARAMS for field in TEXT_INDEX_FIELDS})
+
+
+# ✅ 기존 컬렉션에 양자화 적용 (서버가 백그라운드에서 세그먼트별로 양자화 벡터 생성)
+async def apply_quantization(client: AsyncQdrantClient, name: str, kind: str, always_ram: bool = True,
+                             quantile: float = 0.99, vectors_on_disk: bool = False, timeout: float = 3600):
+    await client.update_collection(
+        collection_name=name,
+        quantization_config=quantization_config(kind, always_ram, quantile),
+        vectors_config={"": VectorParamsDiff(on_disk=True)} if vectors_on_disk else None
+    )
+    print(f"🗜️ 양자화 설정 적용: {name} → {kind} (always_ram={always_ram}, 원본 디스크={vectors_on_disk})")
+
+    await wait_for_optimization(client, name, timeout)
+
+
+# ✅ 설정 변경 후 최적화가 시작됐다가(green 이 아닌 상태) 다시 green 이 될 때까지 대기
+#    start_timeout 안에 상태가 바뀌지 않으면 최적화할 것이 없었던 것으로 보고 종료
+#    grey(최적화 대기 중, 자동 시작 안 됨)면 빈 optimizers_config 업데이트로 한 번 시작시킴
+async def wait_for_optimization(client: AsyncQdrantClient, name: str, timeout: float = 3600,
+                                start_timeout: float = 30, interval: float = 5):
+    start = time.monotonic()
+    started = nudged = False
+    while True:
+        info = await client.get_collection(name)
+        status = str(getattr(info.status, "value", info.status))
+        elapsed = time.monotonic() - start
+        if status == "green":
+            if started:
+                print(f"✅ 최적화 완료 ({elapsed:.0f}초, 색인된 벡터 {info.indexed_vectors_count}건)")
+                return
+            if elapsed >= start_timeout:
+                print(f"ℹ️ {start_timeout:.0f}초 동안 최적화가 시작되지 않음 (status=green) → 완료로 간주")
+                return
+        else:
+            started = True
+            if status == "red":
+                raise SystemExit(f"❌ 최적화 실패: {name} (status=red)")
+            if status == "grey" and not nudged:
+                await client.update_collection(collection_name=name, optimizers_config=OptimizersConfigDiff())
+                nudged = True
+                print("▶️ 대기 중인 최적화 시작 요청 (status=grey)")
+        if elapsed >= timeout:
+            raise SystemExit(f"❌ 최적화 대기 시간 초과 ({timeout:.0f}초, status={status})")
+        if started:
+            print(f"⏳ 최적화 진행 중 (status={status}, 색인된 벡터 {info.indexed_vectors_count}건)")
+        # 시작을 기다리는 동안은 짧게 확인
+        await asyncio.sleep(interval if started else 1)
+
+
+# ✅ 컬렉션 전체에서 point id 를 균등하게 무작위 추출 (id 만 scroll 하며 reservoir sampling, point id 형식과 무관)
+async def sample_point_ids(client: AsyncQdrantClient, name: str, samples: int, seed: int, batch_size: int = 10000):
+    rng = random.Random(seed)
+    reservoir, seen = [], 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(name, limit=batch_size, offset=offset, with_payload=False, with_vectors=False)
+        for p in points:
+            seen += 1
+            if len(reservoir) < samples:
+                reservoir.append(p.id)
+            else:
+                j = rng.randrange(seen)
+                if j < samples:
+                    reservoir[j] = p.id
+        if offset is None:
+            return reservoir
+
+
+# ✅ 정확 검색 대비 recall@k 와 지연시간 비교
+#    질문 벡터는 컬렉션 전체에서 무작위로 뽑은 point 의 벡터를 사용 (임베딩 모델 로딩 불필요)
+#    질문으로 쓴 point 자신은 결과에서 제외 (자기 자신이 항상 1위로 잡혀 recall 이 부풀려지지 않도록)
+async def recall_report(client: AsyncQdrantClient, name: str, samples: int, top_k: int,
+                        oversampling_values, seed: int = 42):
+    info = await client.get_collection(name)
+    total = info.points_count or 0
+    if not total:
+        raise SystemExit(f"❌ 빈 컬렉션: {name}")
+
+    ids = await sample_point_ids(client, name, samples, seed)
+    points = await client.retrieve(name, ids=ids, with_payload=False, with_vectors=True)
+    queries = [(p.id, dense_vector(p.vector)) for p in points]
+
+    async def measure(params):
+        latencies, results = [], []
+        for pid, vector in queries:
+            start = time.perf_counter()
+            response = await client.query_points(name, query=vector, limit=top_k, search_params=params,
+                                                 query_filter=Filter(must_not=[HasIdCondition(has_id=[pid])]),
+                                                 with_payload=False)
+            latencies.append(time.perf_counter() - start)
+            results.append([hit.id for hit in response.points])
+        return sorted(latencies), results
+
+    _, truth = await measure(vector_search_params("exact"))
+    configs = [("original (양자화 무시)", vector_search_params("original"))]
+    for oversampling in oversampling_values:
+        for rescore in (True, False):
+            configs.append((
+                f"quantized x{oversampling:g} {'rescore' if rescore else 'no-rescore'}",
+                vector_search_params("quantized", oversampling=oversampling, rescore=rescore)
+            ))
+
+    quantization = info.config.quantization_config
+    report = {
+        "collection": name,
+        "points": total,
+        "quantization": quantization.model_dump(mode="json") if quantization else None,
+        "samples": len(queries),
+        "top_k": top_k,
+        "results": [],
+    }
+    print(f"📊 {name}: {total}건, 양자화={type(quantization).__name__ if quantization else '없음'}, "
+          f"질문 {len(queries)}건, top_k={top_k}")
+    for label, params in configs:
+        latencies, results = await measure(params)
+        recall = sum(len(set(r) & set(t)) / max(len(t), 1) for r, t in zip(results, truth)) / len(truth)
+        row = {
+            "mode": label,
+            "recall": round(recall, 4),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+        report["results"].append(row)
+        print(f"   {label:<32} recall@{top_k} {row['recall']:.4f} | p50 {row['p50_ms']}ms "
+              f"| p95 {row['p95_ms']}ms | p99 {row['p99_ms']}ms")
+    return report
+
+
+async def run(args):
+    client = AsyncQdrantClient(host=args.host, port=args.port, timeout=args.timeout)
+    try:
+        if args.command == "create-indexes":
+            await ensure_payload_indexes(client, args.collection)
+        elif args.command == "create-text-indexes":
+            await ensure_text_indexes(client, args.collection)
+        elif args.command == "build-hybrid":
+            await build_hybrid_collection(client, args.collection, args.target, args.batch_size)
+        elif args.command == "quantize":
+            await apply_quantization(
+                client, args.collection, args.type, not args.no_always_ram, args.quantile, args.vectors_on_disk,
+                args.wait_timeout
+            )
+        elif args.command == "migrate-dates":
+            await migrate_date_fields(client, args.collection, args.batch_size)
+            await backfill_snippets(client, args.collection)
+        elif args.command == "backfill-snippets":
+            await backfill_snippets(client, args.collection, args.batch_size)
+        elif args.command == "partition":
+            await partition_by_year(client, args.collection, args.base or args.collection, args.batch_size)
+        elif args.command == "recall-report":
+            oversampling = [float(v) for v in args.oversampling.split(",") if v.strip()]
+            report = await recall_report(client, args.collection, args.samples, args.top_k, oversampling)
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                print(f"💾 보고서 저장: {args.output}")
+    finally:
+        await client.close()
+    print("✅ 완료")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qdrant 컬렉션 관리")
+    parser.add_argument("--host", default=QDRANT_HOST)
+    parser.add_argument("--port", type=int, default=QDRANT_PORT)
+    parser.add_argument("--collection", default=collection_name)
+    parser.add_argument("--timeout", type=int, default=600, help="요청 타임아웃(초), 인덱스 생성 대기 포함")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("create-indexes", help="검색 필터용 payload 인덱스 생성")
+    sub.add_parser("create-text-indexes", help="제목/본문 전문 검색 인덱스 생성")
+    hybrid = sub.add_parser("build-hybrid", help="밀집 + 희소 벡터 컬렉션으로 복사")
+    hybrid.add_argument("--target", required=True, help="새 컬렉션 이름 (이후 QDRANT_COLLECTION 으로 지정)")
+    hybrid.add_argument("--batch-size", type=int, default=256)
+    quantize = sub.add_parser("quantize", help="밀집 벡터 양자화 설정")
+    quantize.add_argument("--type", choices=["scalar", "binary", "none"], required=True)
+    quantize.add_argument("--quantile", type=float, default=0.99, help="scalar 양자화 범위 (이상치 제외 비율)")
+    quantize.add_argument("--no-always-ram", action="store_true", help="양자화 벡터도 디스크에 둠")
+    quantize.add_argument("--vectors-on-disk", action="store_true", help="원본 float32 벡터를 디스크로 이동")
+    quantize.add_argument("--wait-timeout", type=float, default=3600, help="최적화 완료 대기 최대 시간(초)")
+    report = sub.add_parser("recall-report", help="정확 검색 대비 recall / 지연시간 보고서")
+    report.add_argument("--samples", type=int, default=200, help="질문으로 쓸 point 수")
+    report.add_argument("--top-k", type=int, default=30)
+    report.add_argument("--oversampling", default="1,2,4", help="비교할 oversampling 값 (쉼표 구분)")
+    report.add_argument("--output", default="", help="결과 JSON 파일")
+    migrate = sub.add_parser("migrate-dates", help="문자열 날짜 필드를 정수로 변환하고 publish_date 추가")
+    migrate.add_argument("--batch-size", type=int, default=1000)
+    snippets = sub.add_parser("backfill-snippets", help="snippet 이 없는 기사에 목록용 미리보기 저장")
+    snippets.add_argument("--batch-size", type=int, default=256)
+    partition = sub.add_parser("partition", help="연도별 파티션 컬렉션으로 분할 복사")
+    partition.add_argument("--base", default="", help="파티션 이름 접두사 (기본: --collection, 검색 시 QDRANT_COLLECTION 과 같아야 함)")
+    partition.add_argument("--batch-size", type=int, default=256)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
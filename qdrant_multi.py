@@ -1,16 +1,11 @@
-import time
-from typing import List
-from qdrant_client import QdrantClient
+import time, heapq
+from typing import List, Optional
 from qdrant_client.models import Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-
-# ✅ Qdrant 설정
-qdrant_client = QdrantClient(host="localhost", port=6333)
-collection_name = "article_2025_image_test"
-
-# ✅ 한국어 임베딩 모델
-model = SentenceTransformer("nlpai-lab/KURE-v1")
+from qdrant_admin import (
+    keyword_condition, collection_name, vector_search_params, parse_partition_name, PARTITION_BY_YEAR
+)
+from resources import get_model, get_sync_qdrant_client
 
 # ✅ 필터링 필드 목록
 KEYWORD_FILTER_FIELDS = [
@@ -18,17 +13,46 @@ KEYWORD_FILTER_FIELDS = [
     "year", "month", "date_day", "date_weekday", "topic", "content"
 ]
 
+# ✅ 연도별 파티션 조회 여부 (qdrant_utils.partition_router 와 같은 PARTITION_BY_YEAR 기준)
+partitioned = PARTITION_BY_YEAR
+
+
+# ✅ 조회할 컬렉션 목록 (파티션을 끄면 기본 컬렉션, 켜면 year 파티션 또는 (연도가 없으면) 모든 파티션)
+def target_collections(year: Optional[int] = None) -> List[str]:
+    if not partitioned:
+        return [collection_name]
+    partitions = {}
+    for collection in get_sync_qdrant_client().get_collections().collections:
+        partition_year = parse_partition_name(collection_name, collection.name)
+        if partition_year is not False:
+            partitions[partition_year] = collection.name
+    if year is not None:
+        return [partitions[year]] if year in partitions else []
+    return list(partitions.values())
+
+
+# ✅ 컬렉션마다 query_points 후 합치기 (벡터 검색은 점수순, 필터 검색은 앞에서부터 limit 건)
+def query_collections(collections: List[str], limit: int, **kwargs):
+    points = []
+    for name in collections:
+        points.extend(get_sync_qdrant_client().query_points(collection_name=name, limit=limit, **kwargs).points)
+    if len(collections) > 1 and kwargs.get("query") is not None:
+        return heapq.nlargest(limit, points, key=lambda point: point.score)
+    return points[:limit]
+
+
 # ✅ 벡터 기반 의미 검색 (전체 대상)
 def semantic_vector_search(question: str, top_k: int = 10):
     print(f"\n🧠 [의미 기반 벡터 검색] 질문: {question}")
     start = time.time()
 
     try:
-        query_vector = model.encode(question)
-        results = qdrant_client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            limit=top_k,
+        query_vector = get_model().encode(question)
+        results = query_collections(
+            target_collections(),
+            top_k,
+            query=query_vector,
+            search_params=vector_search_params(),
             with_payload=True,
             score_threshold=0.5
         )
@@ -74,7 +98,7 @@ def search_qdrant_metadata_smart(keywords: List[str], top_k_per_keyword: int = 5
         if keyword.isdigit() and (keyword == str(year_val) or keyword == str(month_val) or keyword == str(day_val)):
             continue  # 날짜로 이미 처리된 값은 제외
         keyword_conditions.extend(
-            FieldCondition(key=field, match=MatchValue(value=keyword))
+            keyword_condition(field, keyword)
             for field in KEYWORD_FILTER_FIELDS
         )
 
@@ -90,10 +114,10 @@ def search_qdrant_metadata_smart(keywords: List[str], top_k_per_keyword: int = 5
         else:
             query_filter = Filter(should=keyword_conditions)
 
-        result = qdrant_client.query_points(
-            collection_name=collection_name,
+        points = query_collections(
+            target_collections(year_val),
+            top_k_per_keyword,
             query_filter=query_filter,
-            limit=top_k_per_keyword,
             with_payload=True
         )
     except Exception as e:
@@ -101,7 +125,7 @@ def search_qdrant_metadata_smart(keywords: List[str], top_k_per_keyword: int = 5
         return []
 
     documents = []
-    for point in result.points:
+    for point in points:
         payload = point.payload
         documents.append({
             "id": point.id,
@@ -129,22 +153,22 @@ def search_qdrant_metadata_by_keywords(keywords: List[str], top_k_per_keyword: i
 
         try:
             conditions = [
-                FieldCondition(key=field, match=MatchValue(value=keyword))
+                keyword_condition(field, keyword)
                 for field in KEYWORD_FILTER_FIELDS
             ]
             query_filter = Filter(should=conditions)
 
-            result = qdrant_client.query_points(
-                collection_name=collection_name,
+            points = query_collections(
+                target_collections(),
+                top_k_per_keyword,
                 query_filter=query_filter,
-                limit=top_k_per_keyword,
                 with_payload=True
             )
         except Exception as e:
             print(f"❌ 키워드 '{keyword}' 검색 오류: {e}")
             continue
 
-        for point in result.points:
+        for point in points:
             pid = point.id
             if pid not in matched_ids:
                 matched_ids.add(pid)
@@ -176,9 +200,9 @@ def keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int
         return semantic_vector_search(question, top_k=top_k)
 
     print("💡 키워드 결과 존재 → 의미 기반 재정렬 수행 중...")
-    query_vector = model.encode(question)
+    query_vector = get_model().encode(question)
     contents = [doc["본문"] for doc in metadata_results]
-    doc_vectors = model.encode(contents, batch_size=32)
+    doc_vectors = get_model().encode(contents, batch_size=32)
 
     similarities = cosine_similarity([query_vector], doc_vectors)[0]
 
@@ -1,25 +1,61 @@
-import time, gc, torch
-from typing import List, Tuple, Dict, Set
-from concurrent.futures import ThreadPoolExecutor
-from qdrant_client import QdrantClient
-from qdrant_client.models import MatchValue, Filter, FieldCondition
-from sentence_transformers import SentenceTransformer
+import os, uuid, asyncio, time, heapq
+from functools import partial
+from typing import List, Tuple, Dict, Set, Optional
+from qdrant_client.models import (
+    MatchValue, Filter, FieldCondition, QueryRequest, PayloadSelectorInclude,
+    Prefetch, FusionQuery, Fusion, OrderByQuery, OrderBy, Direction
+)
 from sklearn.metrics.pairwise import cosine_similarity
+from embedding_utils import EmbeddingBatcher, embed_executor
+from cache_utils import normalize_question, vector_cache
+from metrics import STAGE_SECONDS, QDRANT_SECONDS
+from sparse_utils import encode_sparse_query
+from qdrant_admin import (
+    keyword_condition, collection_name, SPARSE_VECTOR_NAME, read_ingest_version, vector_search_params,
+    PARTITION_BY_YEAR, PUBLISH_DATE_FIELD, parse_partition_name, make_snippet, dense_vector, integer_point_id
+)
+from resources import get_model, get_qdrant_client
 
-# ✅ Qdrant 설정
-qdrant_client = QdrantClient(host="localhost", port=6333)
-collection_name = "article_2025_image_test"
+# ✅ 검색 방식
+#    hybrid : 질문 벡터 + 키워드/날짜 필터를 Qdrant 에 한 번에 보내 서버에서 점수 계산 (top_k 만 반환)
+#    rerank : 키워드별 조회 후 벡터를 받아 로컬에서 cosine 재정렬 (기존 방식)
+#    fusion : 밀집 + 희소(BM25) 벡터를 한 번에 조회하고 서버에서 RRF 로 결합 (희소 벡터가 있는 컬렉션 필요)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
 
-# ✅ 한국어 임베딩 모델
-model = SentenceTransformer("nlpai-lab/KURE-v1")
+# ✅ 밀집 벡터 검색 파라미터 (VECTOR_SEARCH_MODE / VECTOR_OVERSAMPLING / VECTOR_RESCORE, qdrant_admin 참고)
+SEARCH_PARAMS = vector_search_params()
 
-# ✅ VRAM 청소 포함 임베딩 함수 (query 전용)
-def encode_and_clear(texts, **kwargs):
-    vectors = model.encode(texts, **kwargs)
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-        gc.collect()
-    return vectors
+# ✅ fusion 모드에서 밀집/희소 각각 가져올 후보 수
+FUSION_PREFETCH_LIMIT = int(os.getenv("FUSION_PREFETCH_LIMIT", "100"))
+
+# ✅ 연도별 파티션 목록을 다시 읽는 주기 (초, PARTITION_BY_YEAR=1 일 때만 사용)
+PARTITION_REFRESH_INTERVAL = float(os.getenv("PARTITION_REFRESH_INTERVAL", "60"))
+
+# ✅ 페이지 검색 정렬 방식
+#    relevance : 질문과의 유사도순
+#    date      : 유사도 상위 DATE_SORT_CANDIDATES 건 (파티션마다) 을 publish_date 최신순으로 (publish_date 없는 기사는 제외)
+PAGE_SORTS = ("relevance", "date")
+DATE_SORT_CANDIDATES = int(os.getenv("DATE_SORT_CANDIDATES", "200"))
+
+# ✅ 임베딩 함수 (모델/클라이언트는 resources 에서 공유, VRAM 정리는 embedding_utils 에서 주기적으로 실행)
+def encode_texts(texts, **kwargs):
+    return get_model().encode(texts, **kwargs)
+
+async def encode_async(texts, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(embed_executor, partial(encode_texts, texts, **kwargs))
+
+# ✅ 질문 임베딩 마이크로 배처 (동시 요청을 모아서 한 번에 encode)
+query_batcher = EmbeddingBatcher(encode_texts)
+
+async def encode_query(question: str):
+    cache_key = normalize_question(question)
+    vector = vector_cache.get(cache_key)
+    if vector is None:
+        with STAGE_SECONDS.time(stage="embed"):
+            vector = await query_batcher.encode(question)
+        vector_cache.set(cache_key, vector)
+    return vector
 
 # ✅ 일반 키워드 검색 필드
 KEYWORD_FILTER_FIELDS = [
@@ -27,61 +63,450 @@ KEYWORD_FILTER_FIELDS = [
     "topic", "content"
 ]
 
-# ✅ 단일 키워드 검색
-def keyword_search_single(keyword: str, top_k: int = 30) -> Tuple[Set, Dict, str]:
-    keyword_type = "none"
-    query_filter = None
+# ✅ 검색 목록에 필요한 payload 필드만 조회 (본문은 /documents/{id} 에서 따로 조회)
+LISTING_FIELDS = [
+    "title_original", "reporter", "year", "month", "date_day", PUBLISH_DATE_FIELD,
+    "topic", "url", "main_image_url", "snippet"
+]
+LISTING_PAYLOAD = PayloadSelectorInclude(include=LISTING_FIELDS)
+
+# ✅ payload 날짜 → "YYYY-MM-DD" (publish_date 가 없는 기존 데이터는 연/월/일 필드로, 한 자리 월/일은 0 채움)
+def format_date(payload: Dict) -> str:
+    publish_date = payload.get(PUBLISH_DATE_FIELD)
+    if isinstance(publish_date, int):
+        return f"{publish_date // 10000:04d}-{publish_date // 100 % 100:02d}-{publish_date % 100:02d}"
+    year, month, day = (str(payload.get(field, "")).strip() for field in ("year", "month", "date_day"))
+    return f"{year or '----'}-{month.zfill(2) if month else '--'}-{day.zfill(2) if day else '--'}"
+
+# ✅ Qdrant 검색 결과 → 응답 문서 형식
+#    snippet 필드가 없는 기존 데이터는 본문이 있을 때만 즉석에서 생성 (목록 조회에는 본문이 없으므로
+#    기존 컬렉션은 qdrant_admin.py backfill-snippets 로 snippet 을 채워야 함)
+def format_hit(pid, payload: Dict, score: Optional[float] = None, include_content: bool = False) -> Dict:
+    doc = {
+        "id": pid,
+        "제목": payload.get("title_original", ""),
+        "기자": payload.get("reporter", ""),
+        "날짜": format_date(payload),
+        "주제": payload.get("topic", ""),
+        "URL": payload.get("url", ""),
+        "Image_url": payload.get("main_image_url", ""),
+        "미리보기": payload.get("snippet") or make_snippet(payload.get("content", "")),
+    }
+    if include_content:
+        doc["본문"] = payload.get("content", "")
+    if score is not None:
+        doc["score"] = round(float(score), 5)
+    return doc
+
+# ✅ 기사 id → Qdrant point id (부호 없는 정수 또는 UUID, 그 외는 ValueError)
+def parse_point_id(doc_id):
+    point_id = integer_point_id(doc_id)
+    if point_id is not None:
+        return point_id
+    if isinstance(doc_id, str):
+        try:
+            return str(uuid.UUID(doc_id))
+        except ValueError:
+            pass
+    raise ValueError(f"잘못된 기사 id: {doc_id!r}")
 
+# ✅ 기사 단건 조회 (본문 포함)
+async def get_document(doc_id) -> Optional[Dict]:
+    return (await get_documents([doc_id])).get(str(parse_point_id(doc_id)))
+
+# ✅ 기사 여러 건 조회 (한 번의 retrieve 호출, 결과는 str(point id) → 문서)
+#    형식이 잘못된 id 가 있으면 Qdrant 에 보내지 않고 ValueError
+async def get_documents(doc_ids: List) -> Dict[str, Dict]:
+    if not doc_ids:
+        return {}
+    ids = [parse_point_id(doc_id) for doc_id in doc_ids]
+
+    # id 로는 연도를 알 수 없으므로 파티션 전체에 병렬 조회
+    async def retrieve(name):
+        with QDRANT_SECONDS.time(operation="retrieve"):
+            return await get_qdrant_client().retrieve(
+                collection_name=name,
+                ids=ids,
+                with_payload=True,
+                with_vectors=False
+            )
+
+    results = await asyncio.gather(*(retrieve(name) for name in await partition_router.route()))
+    return {str(p.id): format_hit(p.id, p.payload, include_content=True) for points in results for p in points}
+
+# ✅ 키워드 분류 + 조건 생성 ("year" / "month" / "none" / "skip")
+#    연/월은 payload 의 정수 필드와 정수로 비교 (정수 인덱스 사용)
+def classify_keyword(keyword: str) -> Tuple[str, List[FieldCondition]]:
     if keyword.isdigit():
-        val_str = keyword
         val = int(keyword)
-
         if len(keyword) == 4 and 1900 <= val <= 2100:
-            keyword_type = "year"
-            query_filter = Filter(must=[FieldCondition(key="year", match=MatchValue(value=val_str))])
-        elif 1 <= val <= 12:
-            keyword_type = "month"
-            query_filter = Filter(must=[FieldCondition(key="month", match=MatchValue(value=val_str))])
-        else:
-            return set(), {}, keyword_type
+            return "year", [FieldCondition(key="year", match=MatchValue(value=val))]
+        if 1 <= val <= 12:
+            return "month", [FieldCondition(key="month", match=MatchValue(value=val))]
+        return "skip", []
+    return "none", [keyword_condition(field, keyword) for field in KEYWORD_FILTER_FIELDS]
+
+
+def query_years(keywords: List[str]) -> Set[int]:
+    return {int(kw) for kw in keywords if classify_keyword(kw)[0] == "year"}
+
+
+# ✅ 연도별 파티션 라우터
+#    파티션을 끄면 항상 기본 컬렉션 하나, 켜면 <기본 컬렉션>_<연도> 컬렉션 중
+#    질문 연도에 해당하는 것만 (연도가 없으면 전부) 반환 → 호출 측이 컬렉션별로 병렬 조회 후 합침
+class PartitionRouter:
+    def __init__(self, base: str, enabled: bool, refresh_interval: float):
+        self.base = base
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.partitions: Dict[Optional[int], str] = {}  # 연도 (undated 는 None) → 컬렉션 이름
+        self._refreshed_at: Optional[float] = None  # None: 아직 한 번도 조회하지 않음
+        self._lock = asyncio.Lock()
+
+    # 한 번도 조회하지 않았거나 refresh_interval 이 지났으면 다시 조회
+    # (time.monotonic() 은 부팅 직후 0 에 가까울 수 있어 0.0 을 "조회 안 함" 으로 쓰지 않음)
+    def _stale(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    async def refresh(self, force: bool = False):
+        if not force and not self._stale():
+            return
+        async with self._lock:
+            if not force and not self._stale():
+                return
+            with QDRANT_SECONDS.time(operation="list_collections"):
+                response = await get_qdrant_client().get_collections()
+            partitions = {}
+            for collection in response.collections:
+                year = parse_partition_name(self.base, collection.name)
+                if year is not False:
+                    partitions[year] = collection.name
+            if partitions.keys() != self.partitions.keys():
+                print(f"📅 연도별 파티션 {len(partitions)}개: {sorted(partitions.values())}")
+            self.partitions = partitions
+            self._refreshed_at = time.monotonic()
+
+    async def route(self, years: Optional[Set[int]] = None) -> List[str]:
+        if not self.enabled:
+            return [self.base]
+        await self.refresh()
+        if years:
+            return [self.partitions[year] for year in sorted(years) if year in self.partitions]
+        return list(self.partitions.values())
+
+
+partition_router = PartitionRouter(collection_name, PARTITION_BY_YEAR, PARTITION_REFRESH_INTERVAL)
+
+
+# ✅ 컬렉션별 검색 결과를 점수순으로 합쳐 상위 limit 개 (컬렉션이 하나면 그대로)
+def merge_hits(hit_lists, limit: int):
+    if len(hit_lists) == 1:
+        return hit_lists[0]
+    return heapq.nlargest(limit, (hit for hits in hit_lists for hit in hits), key=lambda hit: hit.score)
+
+# ✅ (점수, id, 컬렉션) 목록 → id 별 목록용 payload (컬렉션마다 retrieve 한 번)
+async def retrieve_listing_payloads(ranked) -> Dict:
+    by_collection = {}
+    for _, pid, name in ranked:
+        by_collection.setdefault(name, []).append(pid)
+
+    async def retrieve(name, ids):
+        with QDRANT_SECONDS.time(operation="retrieve"):
+            return await get_qdrant_client().retrieve(
+                collection_name=name, ids=ids, with_payload=LISTING_PAYLOAD, with_vectors=False
+            )
+
+    results = await asyncio.gather(*(retrieve(name, ids) for name, ids in by_collection.items()))
+    return {p.id: p.payload for points in results for p in points}
+
+# ✅ 단일 키워드 검색 (collections 의 컬렉션마다 top_k 건)
+async def keyword_search_single(keyword: str, top_k: int = 30,
+                                collections: Optional[List[str]] = None) -> Tuple[Set, Dict, str]:
+    keyword_type, conditions = classify_keyword(keyword)
+
+    if keyword_type == "skip":
+        return set(), {}, "none"
+    if keyword_type in ("year", "month"):
+        query_filter = Filter(must=conditions)
     else:
-        query_filter = Filter(
-            should=[FieldCondition(key=field, match=MatchValue(value=keyword))
-                    for field in KEYWORD_FILTER_FIELDS]
-        )
+        query_filter = Filter(should=conditions)
 
-    result = qdrant_client.query_points(
-        collection_name=collection_name,
-        query_filter=query_filter,
-        limit=top_k,
-        with_payload=True,
-        with_vectors=True   # ✅ 벡터도 같이 가져오기
-    )
+    async def query(name):
+        with QDRANT_SECONDS.time(operation="keyword_filter"):
+            return (await get_qdrant_client().query_points(
+                collection_name=name,
+                query_filter=query_filter,
+                limit=top_k,
+                with_payload=LISTING_PAYLOAD,
+                with_vectors=True   # ✅ 벡터도 같이 가져오기 (희소 벡터가 있는 컬렉션이면 dense_vector 로 밀집만 사용)
+            )).points
 
-    ids = {p.id for p in result.points}
-    payloads = {p.id: {"payload": p.payload, "vector": p.vector} for p in result.points}
+    results = await asyncio.gather(*(query(name) for name in (collections if collections is not None else [collection_name])))
+    points = [p for result in results for p in result]
+    ids = {p.id for p in points}
+    payloads = {p.id: {"payload": p.payload, "vector": dense_vector(p.vector)} for p in points}
     return ids, payloads, keyword_type
 
-# ✅ 병렬 키워드 검색
-def search_qdrant_metadata_parallel(keywords: List[str], top_k_per_keyword: int = 50):
+# ✅ 병렬 키워드 검색 (asyncio.gather 로 동시 실행)
+async def search_qdrant_metadata_parallel(keywords: List[str], top_k_per_keyword: int = 50,
+                                          collections: Optional[List[str]] = None):
     all_payloads = {}
     keyword_results = {}
     keyword_types = {}
 
-    with ThreadPoolExecutor(max_workers=len(keywords)) as executor:
-        futures = {executor.submit(keyword_search_single, kw, top_k_per_keyword): kw for kw in keywords}
-        for future in futures:
-            ids, payloads, kw_type = future.result()
-            kw = futures[future]
-            keyword_results[kw] = ids
-            keyword_types[kw] = kw_type
-            all_payloads.update(payloads)
+    results = await asyncio.gather(*(keyword_search_single(kw, top_k_per_keyword, collections) for kw in keywords))
+    for kw, (ids, payloads, kw_type) in zip(keywords, results):
+        keyword_results[kw] = ids
+        keyword_types[kw] = kw_type
+        all_payloads.update(payloads)
 
     return keyword_results, all_payloads, keyword_types
 
+# ✅ 컬렉션 버전 (point 수, 적재 버전) → 검색 응답 캐시 무효화 기준
+async def collection_version():
+    async def count(name):
+        with QDRANT_SECONDS.time(operation="count"):
+            return (await get_qdrant_client().count(collection_name=name, exact=False)).count
+
+    counts = await asyncio.gather(*(count(name) for name in await partition_router.route()))
+    return sum(counts), read_ingest_version(collection_name)
+
+
+# ✅ 검색 진입점 (RETRIEVAL_MODE 에 따라 분기)
+async def search_documents(question: str, keywords: List[str], top_k: int = 5):
+    if RETRIEVAL_MODE == "rerank":
+        return await keyword_then_semantic_rerank(question, keywords, top_k=top_k)
+    if RETRIEVAL_MODE == "fusion":
+        return await fusion_search(question, keywords, top_k=top_k)
+    return await hybrid_filtered_search(question, keywords, top_k=top_k)
+
+# ✅ 하이브리드 검색 단계 (날짜 단계 목록, 나머지 단계 목록), 단계는 (이름, 필터)
+#      1) 날짜(연/월) MUST 필터 + 벡터 검색
+#      2) 일반 키워드 합집합(SHOULD) 필터 + 벡터 검색
+#      3) 필터 없는 전체 벡터 검색
+def search_stages(keywords: List[str]):
+    date_conditions, keyword_conditions = [], []
+    for kw in keywords:
+        kw_type, conditions = classify_keyword(kw)
+        if kw_type in ("year", "month"):
+            date_conditions.extend(conditions)
+        elif kw_type == "none":
+            keyword_conditions.extend(conditions)
+
+    date_stages, other_stages = [], []
+    if date_conditions:
+        date_stages.append(("날짜 필터", Filter(must=date_conditions)))
+    if keyword_conditions:
+        other_stages.append(("키워드 필터", Filter(should=keyword_conditions)))
+    other_stages.append(("전체 의미 검색", None))
+    return date_stages, other_stages
+
+# ✅ 서버 측 하이브리드 검색
+#    keyword_then_semantic_rerank 와 같은 우선순위(search_stages)를 한 번의 batch 요청으로 처리
+#    batch 요청은 단계별 id/점수만 받고, 결과가 있는 첫 번째 단계의 top_k 건만 payload 를 조회 (벡터는 전송하지 않음)
+async def hybrid_filtered_search(question: str, keywords: List[str], top_k: int = 5):
+    date_stages, other_stages = search_stages(keywords)
+
+    query_vector = await encode_query(question)
+    query_vector = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+
+    # 컬렉션마다 단계 전체를 batch 요청 1건으로 보내고, 단계별로 점수순 병합
+    async def run_stages(stages, collections):
+        async def run(name):
+            with QDRANT_SECONDS.time(operation="hybrid_batch"):
+                return await get_qdrant_client().query_batch_points(
+                    collection_name=name,
+                    requests=[
+                        QueryRequest(query=query_vector, filter=query_filter, limit=top_k, params=SEARCH_PARAMS,
+                                     with_payload=False)
+                        for _, query_filter in stages
+                    ]
+                )
+
+        responses = await asyncio.gather(*(run(name) for name in collections))
+        for i, (label, _) in enumerate(stages):
+            ranked = heapq.nlargest(
+                top_k,
+                ((hit.score, hit.id, name) for name, response in zip(collections, responses) for hit in response[i].points),
+                key=lambda hit: hit[0]
+            )
+            if ranked:
+                print(f"⚡ 하이브리드 검색: {label} 단계 결과 {len(ranked)}건 사용 (컬렉션 {len(collections)}개)")
+                payloads = await retrieve_listing_payloads(ranked)
+                return [format_hit(pid, payloads[pid], score) for score, pid, _ in ranked if pid in payloads]
+        return []
+
+    # 파티션을 쓰면 날짜 단계는 해당 연도 파티션에만, 나머지 단계는 날짜 단계 결과가 없을 때 전체 파티션에
+    years = query_years(keywords)
+    if date_stages and partition_router.enabled and years:
+        results = await run_stages(date_stages, await partition_router.route(years))
+        if results:
+            return results
+        return await run_stages(other_stages, await partition_router.route())
+    collections = await partition_router.route()
+    return await run_stages(date_stages + other_stages, collections)
+
+# ✅ 페이지 단위 검색 (search_stages 순서로 결과가 있는 첫 단계를 고른 뒤 그 단계 안에서 페이지 이동)
+#    state 는 이전 페이지가 돌려준 위치 (None 이면 첫 페이지), (문서 목록, 다음 state 또는 None) 반환
+#      relevance : {"stage", "offset"}        → Qdrant offset 으로 다음 page_size 건만 조회
+#      date      : {"stage", "before", "seen"} → order_by start_from(이 날짜 이하) 부터 조회,
+#                  같은 날짜에서 이미 보낸 id 는 제외 (seen 은 후보 수 이하로 제한됨)
+# 정수 (bool 제외, JSON 의 true/false 가 정수로 통과하지 않도록)
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# ✅ 클라이언트가 돌려보낸 페이지 위치 검증 (cursor 는 클라이언트가 만들 수 있으므로 형식을 믿지 않음)
+#    relevance: offset 은 0 이상 정수 / date: before 는 정수 또는 null, seen 은 정수/문자열 id 목록
+def valid_page_state(state, sort: str, num_stages: int) -> bool:
+    if not isinstance(state, dict) or not _is_int(state.get("stage")) or not 0 <= state["stage"] < num_stages:
+        return False
+    if sort == "date":
+        seen = state.get("seen", [])
+        return (
+            (state.get("before") is None or _is_int(state["before"]))
+            and isinstance(seen, list)
+            and all(_is_int(pid) or isinstance(pid, str) for pid in seen)
+        )
+    offset = state.get("offset", 0)
+    return _is_int(offset) and offset >= 0
+
+
+async def search_documents_page(question: str, keywords: List[str], sort: str = "relevance",
+                                page_size: int = 10, state: Optional[Dict] = None):
+    date_stages, other_stages = search_stages(keywords)
+    stages = date_stages + other_stages
+    years = query_years(keywords)
+
+    query_vector = await encode_query(question)
+    query_vector = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+
+    # 날짜 단계는 질문 연도 파티션에만 (파티션을 안 쓰면 항상 기본 컬렉션)
+    async def stage_collections(stage: int):
+        return await partition_router.route(years if stage < len(date_stages) else None)
+
+    async def relevance_page(stage: int, offset: int):
+        query_filter, collections = stages[stage][1], await stage_collections(stage)
+        if len(collections) == 1:
+            with QDRANT_SECONDS.time(operation="page_relevance"):
+                hits = (await get_qdrant_client().query_points(
+                    collection_name=collections[0], query=query_vector, query_filter=query_filter,
+                    limit=page_size, offset=offset, search_params=SEARCH_PARAMS, with_payload=LISTING_PAYLOAD
+                )).points
+            docs = [format_hit(hit.id, hit.payload, hit.score) for hit in hits]
+        else:
+            # 파티션이 여러 개면 파티션마다 앞쪽 offset + page_size 건의 id/점수만 받아 합치고, 이번 페이지 payload 만 조회
+            async def ranked(name):
+                with QDRANT_SECONDS.time(operation="page_relevance"):
+                    points = (await get_qdrant_client().query_points(
+                        collection_name=name, query=query_vector, query_filter=query_filter,
+                        limit=offset + page_size, search_params=SEARCH_PARAMS, with_payload=False
+                    )).points
+                return [(hit.score, hit.id, name) for hit in points]
+
+            ranked_lists = await asyncio.gather(*(ranked(name) for name in collections))
+            page = heapq.nlargest(offset + page_size, (hit for hits in ranked_lists for hit in hits),
+                                  key=lambda hit: hit[0])[offset:]
+            payloads = await retrieve_listing_payloads(page)
+            docs = [format_hit(pid, payloads[pid], score) for score, pid, _ in page if pid in payloads]
+        next_state = {"stage": stage, "offset": offset + len(docs)} if len(docs) == page_size else None
+        return docs, next_state
+
+    async def date_page(stage: int, before: Optional[int], seen: List):
+        query_filter, collections = stages[stage][1], await stage_collections(stage)
+        seen_ids = set(seen)
+
+        async def query(name):
+            with QDRANT_SECONDS.time(operation="page_date"):
+                return (await get_qdrant_client().query_points(
+                    collection_name=name,
+                    prefetch=Prefetch(query=query_vector, filter=query_filter, limit=DATE_SORT_CANDIDATES,
+                                      params=SEARCH_PARAMS),
+                    query=OrderByQuery(order_by=OrderBy(key=PUBLISH_DATE_FIELD, direction=Direction.DESC,
+                                                        start_from=before)),
+                    limit=page_size + len(seen_ids),
+                    with_payload=LISTING_PAYLOAD
+                )).points
+
+        hit_lists = await asyncio.gather(*(query(name) for name in collections))
+        hits = heapq.nlargest(
+            page_size,
+            (hit for hits in hit_lists for hit in hits if hit.id not in seen_ids),
+            key=lambda hit: hit.payload.get(PUBLISH_DATE_FIELD, 0)
+        )
+        docs = [format_hit(hit.id, hit.payload) for hit in hits]
+        if len(hits) < page_size:
+            return docs, None
+        last = hits[-1].payload.get(PUBLISH_DATE_FIELD)
+        same_day = [hit.id for hit in hits if hit.payload.get(PUBLISH_DATE_FIELD) == last]
+        return docs, {"stage": stage, "before": last, "seen": same_day + (seen if last == before else [])}
+
+    async def fetch(stage: int, position: Dict):
+        if sort == "date":
+            return await date_page(stage, position.get("before"), position.get("seen", []))
+        return await relevance_page(stage, position.get("offset", 0))
+
+    if state is not None:
+        if not valid_page_state(state, sort, len(stages)):
+            raise ValueError(f"잘못된 페이지 위치: {state}")
+        return await fetch(state["stage"], state)
+    for stage, (label, _) in enumerate(stages):
+        docs, next_state = await fetch(stage, {})
+        if docs:
+            print(f"⚡ 페이지 검색 ({sort}): {label} 단계 결과 {len(docs)}건")
+            return docs, next_state
+    return [], None
+
+# ✅ 밀집 + 희소 벡터 하이브리드 검색 (서버 측 RRF)
+#    - 희소 질의: 날짜가 아닌 키워드 (없으면 질문 원문) → 키워드 수와 관계없이 요청 1건
+#    - 날짜(연/월)는 양쪽 prefetch 에 MUST 필터로 적용, 결과가 없으면 날짜 없이 한 번 더 조회
+async def fusion_search(question: str, keywords: List[str], top_k: int = 5):
+    date_conditions, lexical_terms = [], []
+    for kw in keywords:
+        kw_type, conditions = classify_keyword(kw)
+        if kw_type in ("year", "month"):
+            date_conditions.extend(conditions)
+        elif kw_type == "none":
+            lexical_terms.append(kw)
+
+    query_vector = await encode_query(question)
+    query_vector = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+    sparse_query = encode_sparse_query(" ".join(lexical_terms) or question)
+
+    # 파티션별 RRF 점수(1 / (k + 순위))를 점수순으로 합침 → 한 컬렉션에서 RRF 한 결과와 순위가 조금 다를 수 있음
+    async def run(query_filter, collections):
+        async def query(name):
+            with QDRANT_SECONDS.time(operation="fusion"):
+                return (await get_qdrant_client().query_points(
+                    collection_name=name,
+                    prefetch=[
+                        Prefetch(query=sparse_query, using=SPARSE_VECTOR_NAME, filter=query_filter, limit=FUSION_PREFETCH_LIMIT),
+                        Prefetch(query=query_vector, filter=query_filter, limit=FUSION_PREFETCH_LIMIT, params=SEARCH_PARAMS),
+                    ],
+                    query=FusionQuery(fusion=Fusion.RRF),
+                    limit=top_k,
+                    with_payload=LISTING_PAYLOAD
+                )).points
+
+        hit_lists = await asyncio.gather(*(query(name) for name in collections))
+        return merge_hits(hit_lists, top_k)
+
+    date_filter = Filter(must=date_conditions) if date_conditions else None
+    results = await run(date_filter, await partition_router.route(query_years(keywords)))
+    if not results and date_filter is not None:
+        print("⚠️ 날짜 필터 결과 없음 → 날짜 조건 없이 RRF 검색")
+        results = await run(None, await partition_router.route())
+
+    print(f"⚡ RRF 하이브리드 검색: 희소 질의 {lexical_terms or '(질문 원문)'} → {len(results)}건")
+    return [format_hit(hit.id, hit.payload, hit.score) for hit in results]
+
 # ✅ 날짜(MUST) + 의미검색 재정렬
-def keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int = 5):
-    keyword_results, all_payloads, keyword_types = search_qdrant_metadata_parallel(keywords, top_k_per_keyword=200)
+async def keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int = 5):
+    # 연도가 있으면 해당 연도 파티션만 조회 (파티션을 안 쓰면 기본 컬렉션)
+    collections = await partition_router.route(query_years(keywords))
+    keyword_results, all_payloads, keyword_types = await search_qdrant_metadata_parallel(
+        keywords, top_k_per_keyword=200, collections=collections
+    )
 
     date_sets = [ids for kw, ids in keyword_results.items() if keyword_types[kw] in ("year", "month")]
     date_intersection = set.intersection(*date_sets) if date_sets else None
@@ -101,84 +526,60 @@ def keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int
     # ✅ Qdrant에서 바로 의미검색 (날짜 필터 있는 경우)
     if date_intersection:
         print(f"⚡ 날짜 필터 적용됨 → Qdrant에서 벡터검색 바로 실행")
-        query_vector = encode_and_clear([question])[0]
+        query_vector = await encode_query(question)
         must_conditions = []
         for kw, kw_type in keyword_types.items():
-            if kw_type == "year":
-                must_conditions.append(FieldCondition(key="year", match=MatchValue(value=kw)))
-            elif kw_type == "month":
-                must_conditions.append(FieldCondition(key="month", match=MatchValue(value=kw)))
+            if kw_type in ("year", "month"):
+                must_conditions.extend(classify_keyword(kw)[1])
         filter_query = Filter(must=must_conditions)
-        results = qdrant_client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            query_filter=filter_query,
-            limit=top_k,
-            with_payload=True
-        )
-        return [
-            {
-                "id": hit.id,
-                "제목": hit.payload.get("title_original", ""),
-                "기자": hit.payload.get("reporter", ""),
-                "날짜": f"{hit.payload.get('year', '----')}-{hit.payload.get('month', '--')}-{hit.payload.get('date_day', '--')}",
-                "주제": hit.payload.get("topic", ""),
-                "URL": hit.payload.get("url", ""),
-                "Image_url": hit.payload.get("main_image_url", ""),
-                "본문": hit.payload.get("content", ""),
-                "score": round(hit.score, 5)
-            }
-            for hit in results
-        ]
+
+        async def query(name):
+            with QDRANT_SECONDS.time(operation="date_filtered"):
+                return (await get_qdrant_client().query_points(
+                    collection_name=name,
+                    query=query_vector,
+                    query_filter=filter_query,
+                    limit=top_k,
+                    search_params=SEARCH_PARAMS,
+                    with_payload=LISTING_PAYLOAD
+                )).points
+
+        results = merge_hits(await asyncio.gather(*(query(name) for name in collections)), top_k)
+        return [format_hit(hit.id, hit.payload, hit.score) for hit in results]
 
     # ✅ 로컬 재랭킹 (벡터는 Qdrant에서 꺼냄)
     if not final_ids:
         print("⚠️ 필터 결과 없음 → 전체 의미 기반 검색으로 fallback")
-        return semantic_vector_search(question, top_k=top_k)
+        return await semantic_vector_search(question, top_k=top_k)
 
     print(f"💡 필터링된 문서 {len(final_ids)}건 → 로컬 의미검색 재정렬")
-    query_vector = encode_and_clear([question])[0]
+    query_vector = await encode_query(question)
 
     doc_vectors = [all_payloads[pid]["vector"] for pid in final_ids]
-    similarities = cosine_similarity([query_vector], doc_vectors)[0]
-
-    reranked = []
-    for pid, score in zip(final_ids, similarities):
-        payload = all_payloads[pid]["payload"]
-        reranked.append({
-            "id": pid,
-            "제목": payload.get("title_original", ""),
-            "기자": payload.get("reporter", ""),
-            "날짜": f"{payload.get('year', '----')}-{payload.get('month', '--')}-{payload.get('date_day', '--')}",
-            "주제": payload.get("topic", ""),
-            "URL": payload.get("url", ""),
-            "Image_url": payload.get("main_image_url", ""),
-            "본문": payload.get("content", ""),
-            "score": round(float(score), 5)
-        })
+    with STAGE_SECONDS.time(stage="rerank"):
+        similarities = (await asyncio.to_thread(cosine_similarity, [query_vector], doc_vectors))[0]
+
+    reranked = [
+        format_hit(pid, all_payloads[pid]["payload"], score)
+        for pid, score in zip(final_ids, similarities)
+    ]
 
     return sorted(reranked, key=lambda x: x["score"], reverse=True)[:top_k]
 
 # ✅ 의미 기반 벡터 검색 (Qdrant 벡터 직접 활용)
-def semantic_vector_search(question: str, top_k: int = 30):
-    query_vector = encode_and_clear([question])[0]
-    results = qdrant_client.search(
-        collection_name=collection_name,
-        query_vector=query_vector,
-        limit=top_k,
-        with_payload=True
-    )
-    return [
-        {
-            "id": hit.id,
-            "제목": hit.payload.get("title_original", ""),
-            "기자": hit.payload.get("reporter", ""),
-            "날짜": f"{hit.payload.get('year', '----')}-{hit.payload.get('month', '--')}-{hit.payload.get('date_day', '--')}",
-            "주제": hit.payload.get("topic", ""),
-            "URL": hit.payload.get("url", ""),
-            "Image_url": hit.payload.get("main_image_url", ""),
-            "본문": hit.payload.get("content", ""),
-            "score": round(hit.score, 5)
-        }
-        for hit in results
-    ]
+async def semantic_vector_search(question: str, top_k: int = 30):
+    query_vector = await encode_query(question)
+
+    async def query(name):
+        with QDRANT_SECONDS.time(operation="semantic"):
+            return (await get_qdrant_client().query_points(
+                collection_name=name,
+                query=query_vector,
+                limit=top_k,
+                search_params=SEARCH_PARAMS,
+                with_payload=LISTING_PAYLOAD
+            )).points
+
+    hit_lists = await asyncio.gather(*(query(name) for name in await partition_router.route()))
+    results = merge_hits(hit_lists, top_k)
+    return [format_hit(hit.id, hit.payload, hit.score) for hit in results]
@@ -0,0 +1,206 @@
+import re
+from typing import Dict, List, Optional
+
+# ✅ 규칙 기반 한국어 질문 전처리기
+#    - 연/월/일과 명사 토큰을 결정적으로 추출
+#    - 확신할 수 있을 때는 LLM 키워드 생성 호출을 생략
+#    - 출력 키워드 형식은 clean_llm_keywords 결과와 동일 (연도 4자리, 월은 숫자만)
+
+# 연도 범위 (keyword_search_single 의 연도 판별 범위와 동일)
+MIN_YEAR, MAX_YEAR = 1900, 2100
+
+# 확신 판정 기준: 명사 토큰 최대 개수
+MAX_CONFIDENT_NOUNS = 3
+
+_FULL_DATE_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})\s*[./-]\s*(\d{1,2})(?:\s*[./-]\s*(\d{1,2}))?(?!\d)")
+# 연도는 '2024년(도)', "'23년(도)", '23년도' 만 인정 ('10년' 처럼 기간일 수 있는 두 자리는 연도로 보지 않음)
+_YEAR_RE = re.compile(r"(?<![\d'’])(?:(\d{4})\s*년(?:도)?|['’](\d{2})\s*년(?:도)?|(\d{2})\s*년도)")
+# 연도로 인정하지 않은 나머지 'N년' (기간/횟수일 수 있으므로 LLM 에 맡김)
+_OTHER_YEAR_RE = re.compile(r"(?<!\d)\d+\s*년(?:도)?")
+# 상대 기간 ('10년 전', '3개월 후', '5년 만에', '2주 동안') → 날짜로 쓰지 않고 LLM 에 맡김
+_RELATIVE_PERIOD_RE = re.compile(r"(?<!\d)\d{1,3}\s*(?:년|개월|달|주|일)\s*(?:전|후|뒤|만에|만|째|간|동안)")
+_BARE_YEAR_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+_MONTH_RE = re.compile(r"(?<!\d)(\d{1,2})\s*월")
+_DAY_RE = re.compile(r"(?<!\d)(\d{1,2})\s*일")
+
+# 조사 (긴 것부터 제거)
+_JOSA = sorted([
+    "에서의", "에서는", "으로는", "에서", "으로", "에게", "한테", "부터", "까지", "처럼", "보다",
+    "이나", "에는", "와의", "과의", "에의", "이랑",
+    "은", "는", "이", "가", "을", "를", "에", "의", "로", "와", "과", "도", "만", "랑",
+], key=len, reverse=True)
+
+# 검색 의미가 없는 단어
+_STOPWORDS = {
+    "기사", "기사들", "뉴스", "소식", "관련", "관련된", "관한", "대한", "대해", "대해서", "내용",
+    "자료", "정보", "좀", "주세요", "줘", "알려줘", "찾아줘", "보여줘", "검색", "검색해줘",
+    "정리해줘", "있는", "나온", "나왔던", "쓴", "작성한", "모든", "전부", "및", "그리고",
+}
+
+# 이런 단어가 있으면 LLM 에 맡김 (상대 날짜, 의문사, 복합 조건)
+_UNCERTAIN_WORDS = {
+    "올해", "작년", "재작년", "내년", "지난해", "이번달", "지난달", "다음달", "이번주", "지난주",
+    "최근", "요즘", "어제", "오늘", "내일", "상반기", "하반기", "분기", "초", "말", "중순",
+    "왜", "어떻게", "무엇", "무슨", "뭐", "뭔가", "어떤", "누가", "누구", "언제", "어디", "얼마",
+    "아닌", "제외", "말고", "빼고", "이후", "이전", "전후", "사이",
+}
+
+# 동사/형용사 어미로 끝나는 토큰은 명사로 보지 않음
+_VERB_ENDING_RE = re.compile(r"(다|요|까|죠|줘|니|나요|는지|을까|ㄴ가|한가|했어|해줘|인가|였나)$")
+_NOUN_TOKEN_RE = re.compile(r"^[가-힣A-Za-z0-9&+·.\-]+$")
+
+
+def _to_year(raw: str) -> Optional[int]:
+    year = int(raw)
+    if len(raw) == 2:
+        year += 2000
+    return year if MIN_YEAR <= year <= MAX_YEAR else None
+
+
+def strip_josa(token: str) -> str:
+    for josa in _JOSA:
+        if token.endswith(josa) and len(token) - len(josa) >= 2:
+            return token[:-len(josa)]
+    return token
+
+
+def parse_question(question: str) -> Dict:
+    text = question or ""
+    year = month = day = None
+    uncertain = []
+
+    # 0) '10년 전' 같은 상대 기간은 연/월/일로 해석하지 않음
+    for m in _RELATIVE_PERIOD_RE.finditer(text):
+        uncertain.append(m.group(0))
+    text = _RELATIVE_PERIOD_RE.sub(" ", text)
+
+    # 1) 2024.3.5 / 2024-03 형태
+    m = _FULL_DATE_RE.search(text)
+    if m:
+        year = _to_year(m.group(1))
+        month = int(m.group(2))
+        day = int(m.group(3)) if m.group(3) else None
+        text = text[:m.start()] + " " + text[m.end():]
+
+    # 2) '2024년', '23년도', "'23년"
+    m = _YEAR_RE.search(text)
+    if m:
+        parsed = _to_year(next(group for group in m.groups() if group))
+        if parsed is None:
+            uncertain.append(m.group(0))
+        year = year or parsed
+        text = text[:m.start()] + " " + text[m.end():]
+    for m in _OTHER_YEAR_RE.finditer(text):
+        uncertain.append(m.group(0))
+    text = _OTHER_YEAR_RE.sub(" ", text)
+
+    # 3) 문장 속 단독 4자리 연도 ('2024 반도체')
+    if year is None:
+        m = _BARE_YEAR_RE.search(text)
+        if m:
+            year = _to_year(m.group(1))
+            text = text[:m.start()] + " " + text[m.end():]
+
+    # 4) '3월', '5일'
+    m = _MONTH_RE.search(text)
+    if m:
+        month = month or int(m.group(1))
+        text = text[:m.start()] + " " + text[m.end():]
+    m = _DAY_RE.search(text)
+    if m:
+        day = day or int(m.group(1))
+        text = text[:m.start()] + " " + text[m.end():]
+
+    if month is not None and not 1 <= month <= 12:
+        uncertain.append(f"{month}월")
+        month = None
+    if day is not None and not 1 <= day <= 31:
+        uncertain.append(f"{day}일")
+        day = None
+
+    # 5) 명사 토큰
+    nouns = []
+    for raw_token in re.split(r"[\s,?!'\"“”‘’()\[\]]+", text):
+        token = raw_token.strip(".·")
+        if not token:
+            continue
+        if token in _UNCERTAIN_WORDS or strip_josa(token) in _UNCERTAIN_WORDS:
+            uncertain.append(token)
+            continue
+        if token in _STOPWORDS:
+            continue
+        token = strip_josa(token)
+        if token in _STOPWORDS:
+            continue
+        if _VERB_ENDING_RE.search(token) or not _NOUN_TOKEN_RE.match(token) or token.isdigit():
+            uncertain.append(token)
+            continue
+        if token not in nouns:
+            nouns.append(token)
+
+    has_date = year is not None or month is not None
+    confident = bool(
+        not uncertain
+        and len(nouns) <= MAX_CONFIDENT_NOUNS
+        and (has_date or nouns)
+    )
+
+    return {
+        "year": year,
+        "month": month,
+        "day": day,
+        "nouns": nouns,
+        "uncertain": uncertain,
+        "confident": confident,
+    }
+
+
+# ✅ 파싱 결과 → keyword_then_semantic_rerank 가 받는 키워드 리스트
+#    (일(day)은 월과 구분되지 않으므로 키워드로 내보내지 않음)
+def date_keywords(parsed: Dict) -> List[str]:
+    keywords = []
+    if parsed["year"] is not None:
+        keywords.append(str(parsed["year"]))
+    if parsed["month"] is not None:
+        keywords.append(str(parsed["month"]))
+    return keywords
+
+
+def to_keywords(parsed: Dict) -> List[str]:
+    return date_keywords(parsed) + parsed["nouns"]
+
+
+_DATE_UNIT_KEYWORD_RE = re.compile(r"^(\d+)\s*(년도|년|월|일)?$")
+
+
+# LLM 숫자 키워드의 날짜 단위 ("year" / "month" / None), 단위가 없으면 keyword_search_single 과 같은 기준
+def _keyword_date_unit(number: str, unit: Optional[str]) -> Optional[str]:
+    if unit in ("년", "년도") or (unit is None and len(number) == 4):
+        return "year"
+    if unit == "월" or (unit is None and len(number) <= 2):
+        return "month"
+    return None
+
+
+# ✅ LLM 키워드에 파싱된 날짜 필터를 병합
+#    LLM 이 '3월', '2024년' 처럼 단위를 붙였거나 날짜를 빠뜨린 경우에도 필터가 적용되도록 함
+#    파서가 찾은 단위(연/월)의 숫자 키워드만 파서 결과로 대체하고, 나머지 단위는 LLM 값을 숫자로 정리해서 유지
+def merge_date_keywords(keywords: List[str], parsed: Dict) -> List[str]:
+    parsed_dates = date_keywords(parsed)
+    if not parsed_dates:
+        return keywords
+
+    merged = list(parsed_dates)
+    for kw in keywords:
+        m = _DATE_UNIT_KEYWORD_RE.match(kw)
+        if m:
+            unit = _keyword_date_unit(m.group(1), m.group(2))
+            if unit is None or parsed[unit] is not None:
+                continue
+            value = _to_year(m.group(1)) if unit == "year" else int(m.group(1))
+            if value is None or (unit == "month" and not 1 <= value <= 12):
+                continue
+            kw = str(value)
+        if kw not in merged:
+            merged.append(kw)
+    return merged
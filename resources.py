@@ -0,0 +1,187 @@
+import os, gc, time, threading
+from typing import Optional, Set
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_admin import QDRANT_HOST, QDRANT_PORT
+
+# ✅ 임베딩 모델 / Qdrant 클라이언트 공용 제공자
+#    - import 시점에는 아무것도 로드하지 않음 (torch / sentence_transformers import 도 첫 사용 시)
+#    - qdrant_utils, qdrant_multi, ingest 가 같은 모델 인스턴스를 공유 → 프로세스당 한 번만 로드
+#    - main 의 lifespan 에서 백그라운드로 로드 + 워밍업, 끝나면 /health/ready 가 200
+
+# ✅ 임베딩 모델 설정
+EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "nlpai-lab/KURE-v1")
+EMBED_DEVICE = os.getenv("EMBED_DEVICE") or None  # 비어 있으면 sentence_transformers 가 자동 선택
+EMBED_WARMUP_BATCH = int(os.getenv("EMBED_WARMUP_BATCH", "8"))  # 0 이면 워밍업 생략
+
+# ✅ 임베딩 백엔드
+#    torch     : sentence_transformers 원본 모델 (GPU 가 있으면 GPU)
+#    onnx-int8 : onnx_embedder.py export 로 만든 int8 양자화 모델을 onnxruntime CPU 로 실행 (GPU 없는 서버용)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "models/kure-v1-int8")
+
+# ✅ CPU 스레드 설정 (한 서버에 워커 여러 개를 띄울 때 코어 과다 할당 방지)
+#    EMBED_INTRA_OP_THREADS : 연산 하나에 쓰는 스레드 수 (0 이면 라이브러리 기본값 = 전체 코어)
+#    EMBED_INTER_OP_THREADS : 독립 연산을 동시에 실행하는 스레드 수
+#    EMBED_CPU_AFFINITY     : 이 프로세스(모든 스레드)를 고정할 CPU 목록 (예: "0-3" 또는 "0,2,4,6"), 리눅스 전용
+EMBED_INTRA_OP_THREADS = int(os.getenv("EMBED_INTRA_OP_THREADS", "0"))
+EMBED_INTER_OP_THREADS = int(os.getenv("EMBED_INTER_OP_THREADS", "0"))
+EMBED_CPU_AFFINITY = os.getenv("EMBED_CPU_AFFINITY", "")
+
+# ✅ 멀티 워커 메모리 공유
+#    EMBED_PRELOAD=1 이면 main import 시점(= fork 전 마스터 프로세스)에 CPU 모델을 로드하고
+#    가중치를 공유 메모리로 옮긴 뒤 gc.freeze() → fork 된 워커들이 같은 가중치 페이지를 공유
+#      EMBED_PRELOAD=1 EMBED_DEVICE=cpu gunicorn main:app -k uvicorn.workers.UvicornWorker -w 4 --preload
+#    (uvicorn --workers 는 spawn 으로 워커를 띄우므로 공유되지 않음, CUDA 는 fork 전 초기화 불가)
+EMBED_PRELOAD = os.getenv("EMBED_PRELOAD", "0") == "1"
+
+_model = None
+_model_lock = threading.Lock()
+_async_client: Optional[AsyncQdrantClient] = None
+_sync_client: Optional[QdrantClient] = None
+
+# 준비 상태 (/health/ready 응답에 그대로 포함)
+status = {
+    "backend": EMBED_BACKEND,
+    "model_loaded": False,
+    "warmed_up": False,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def parse_cpu_list(spec: str) -> Set[int]:
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.update(range(int(lo), int(hi) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+# ✅ 프로세스 전체 CPU 고정 (한 번만 실행)
+#    리눅스에서 sched_setaffinity(0) 은 호출한 스레드만 고정하므로 /proc/self/task 의 모든 스레드에 적용
+#    이후 생기는 스레드는 만든 스레드의 설정을 물려받으므로 main 은 import 시점(메인 스레드, 실행기/torch 스레드 풀 생성 전)에 호출
+_affinity_applied = False
+
+
+def apply_cpu_affinity():
+    global _affinity_applied
+    if _affinity_applied or not EMBED_CPU_AFFINITY or not hasattr(os, "sched_setaffinity"):
+        return
+    _affinity_applied = True
+    cpus = parse_cpu_list(EMBED_CPU_AFFINITY)
+    try:
+        tids = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        tids = [0]
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except ProcessLookupError:
+            pass  # 그 사이 종료된 스레드
+    print(f"📌 CPU 고정: {sorted(cpus)} (스레드 {len(tids)}개)")
+
+
+# ✅ CPU 고정 + torch 스레드 수 (onnxruntime 스레드 수는 세션 옵션으로 전달)
+def configure_threads():
+    apply_cpu_affinity()
+    if EMBED_BACKEND == "torch" and (EMBED_INTRA_OP_THREADS or EMBED_INTER_OP_THREADS):
+        import torch
+        if EMBED_INTRA_OP_THREADS:
+            torch.set_num_threads(EMBED_INTRA_OP_THREADS)
+        if EMBED_INTER_OP_THREADS:
+            torch.set_num_interop_threads(EMBED_INTER_OP_THREADS)
+
+
+def load_model():
+    if EMBED_BACKEND == "onnx-int8":
+        from onnx_embedder import OnnxEmbedder
+        return OnnxEmbedder(EMBED_ONNX_DIR, EMBED_INTRA_OP_THREADS, EMBED_INTER_OP_THREADS)
+    if EMBED_BACKEND != "torch":
+        raise ValueError(f"알 수 없는 EMBED_BACKEND: {EMBED_BACKEND}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBED_MODEL_NAME, device=EMBED_DEVICE)
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                start = time.time()
+                try:
+                    configure_threads()
+                    model = load_model()
+                except Exception as e:
+                    status["error"] = f"모델 로드 실패: {e}"
+                    raise
+                status["model_loaded"] = True
+                status["load_seconds"] = round(time.time() - start, 2)
+                print(f"🧠 임베딩 모델 로드 완료: {EMBED_MODEL_NAME} [{EMBED_BACKEND}] ({status['load_seconds']}초)")
+                _model = model
+    return _model
+
+
+def model_loaded() -> bool:
+    return _model is not None
+
+
+# ✅ 첫 요청이 커널 초기화/메모리 할당 비용을 떠안지 않도록 미리 encode
+#    질문 임베딩(1건)과 마이크로 배치(EMBED_WARMUP_BATCH 건) 크기를 모두 한 번씩 실행
+def warmup(batch_size: int = EMBED_WARMUP_BATCH):
+    model = get_model()
+    start = time.time()
+    if batch_size > 0:
+        model.encode("워밍업 질문입니다")
+        model.encode([f"워밍업 문장 {i} 입니다" for i in range(batch_size)], batch_size=batch_size)
+    status["warmed_up"] = True
+    status["warmup_seconds"] = round(time.time() - start, 2)
+    print(f"🔥 임베딩 워밍업 완료 ({status['warmup_seconds']}초, 배치 {batch_size})")
+
+
+# ✅ fork 전 마스터 프로세스에서 호출 (EMBED_PRELOAD=1)
+def preload_for_fork():
+    model = get_model()
+    if hasattr(model, "share_memory"):
+        model.share_memory()
+    gc.collect()
+    gc.freeze()
+    print("📌 임베딩 모델 공유 메모리 적재 완료 (워커 fork 대기)")
+
+
+def get_qdrant_client() -> AsyncQdrantClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    return _async_client
+
+
+def set_qdrant_client(client: AsyncQdrantClient):
+    global _async_client
+    _async_client = client
+
+
+async def close_qdrant_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+# ✅ 동기 클라이언트 (qdrant_multi 전용)
+def get_sync_qdrant_client() -> QdrantClient:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    return _sync_client
+
+
+def set_sync_qdrant_client(client: QdrantClient):
+    global _sync_client
+    _sync_client = client
@@ -0,0 +1,64 @@
+import os, re, zlib, unicodedata
+from collections import Counter
+from typing import Dict, List
+from qdrant_client.models import SparseVector
+from query_parser import strip_josa
+from vllm_utils import clean_article_text
+
+# ✅ 로컬 BM25 스타일 희소 벡터
+#    - 문서: 토큰별 BM25 TF 포화 가중치 (IDF 는 Qdrant sparse vector 의 IDF modifier 가 서버에서 계산)
+#    - 질문: 고유 토큰마다 가중치 1
+#    - 토큰 → 인덱스는 crc32 해시 (외부 사전/서비스 불필요)
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+BM25_AVG_DOC_LEN = float(os.getenv("BM25_AVG_DOC_LEN", "400"))  # 기사 평균 토큰 수 추정치
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[a-z0-9]+")
+_HANGUL_RE = re.compile(r"^[가-힣]+$")
+
+
+# ✅ 토큰화: 단어(조사 제거) + 한글 단어의 2글자 조각 (복합명사 부분 일치용)
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for word in _TOKEN_RE.findall(text):
+        if _HANGUL_RE.match(word):
+            word = strip_josa(word)
+            if len(word) < 2:
+                continue
+            tokens.append(word)
+            if len(word) > 2:
+                tokens.extend(f"#{word[i:i + 2]}" for i in range(len(word) - 1))
+        elif len(word) >= 2 or word.isdigit():
+            tokens.append(word)
+    return tokens
+
+
+# ✅ 문서 입력 텍스트: 제목 + 정제된 본문 (ingest 의 밀집 임베딩 / build-hybrid 의 희소 벡터 공통)
+def document_text(title: str, content: str) -> str:
+    return f"{title or ''}\n{clean_article_text(content or '')}".strip()
+
+
+def token_index(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _to_sparse(weights: Dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[float(weights[i]) for i in indices])
+
+
+def encode_sparse_document(text: str) -> SparseVector:
+    tokens = tokenize(text)
+    doc_len = len(tokens) or 1
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / BM25_AVG_DOC_LEN)
+    weights: Dict[int, float] = {}
+    for token, tf in Counter(tokens).items():
+        idx = token_index(token)
+        weights[idx] = weights.get(idx, 0.0) + tf * (BM25_K1 + 1) / (tf + norm)
+    return _to_sparse(weights)
+
+
+def encode_sparse_query(text: str) -> SparseVector:
+    return _to_sparse({token_index(token): 1.0 for token in set(tokenize(text))})
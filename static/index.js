@@ -11,90 +11,162 @@ function formatDateKorean(dateStr) {
     return `${year}년 ${month}월 ${day}일`;
 }
 
-function toSortableDateNum(dateStr) {
-    if (!dateStr) return 0;
-
-//    console.log("[원본 dateStr]", dateStr);
-
-    // 숫자만 추출
-    let digits = dateStr.replace(/\D/g, "");
-  //  console.log("[숫자만 추출]", digits);
-
-    // 6자리(YYYYM D)나 7자리(YYYYMM D or YYYY MDD) 보정
-    if (digits.length === 6) {
-        // 예: 202553 → 20250503
-        const year = digits.slice(0, 4);
-        const month = digits.slice(4, 5).padStart(2, "0");
-        const day = digits.slice(5).padStart(2, "0");
-        digits = year + month + day;
-    //    console.log("[6자리 보정됨]", digits);
-    } else if (digits.length === 7) {
-        const year = digits.slice(0, 4);
-        const month = digits.slice(4, 5).padStart(2, "0");
-        const day = digits.slice(5).padStart(2, "0");
-        digits = year + month + day;
-  //      console.log("[7자리 보정됨]", digits);
-    }
+// ✅ HTML 특수문자 이스케이프 (제목/미리보기는 기사 본문에서 온 값이라 그대로 innerHTML 에 넣지 않음)
+function escapeHtml(value) {
+    return String(value)
+        .replace(/&/g, "&amp;")
+        .replace(/</g, "&lt;")
+        .replace(/>/g, "&gt;")
+        .replace(/"/g, "&quot;")
+        .replace(/'/g, "&#39;");
+}
 
-    const result = digits.length >= 8 ? parseInt(digits.slice(0, 8), 10) : 0;
-//    console.log("[최종 리턴]", result);
+// ✅ 검색 결과 카드 한 장
+function renderCard(doc, index) {
+    const safeId = `summary_${index}`;
+    const imageSrc = (doc.image_url && doc.image_url.trim() !== "") 
+        ? doc.image_url 
+        : "https://s1.tokenpost.kr/assets/images/tokenpost_new/common_new/logo.svg";
 
-    return result;
+    return `
+        <div class="result-card">
+            <div class="result-content">
+                <div class="result-title">${escapeHtml(doc.title || "제목 없음")}</div>
+                <div class="result-meta">📝 기자: ${escapeHtml(doc.reporter || "없음")} | ${escapeHtml(formatDateKorean(doc.date))}</div>
+                ${doc.accuracy ? `<div class="result-accuracy">🧠 정확도: ${escapeHtml(doc.accuracy)}</div>` : ""}
+                <div class="result-snippet">${escapeHtml(doc.snippet || "")}</div>
+                <div class="result-buttons">
+                    <button 
+                        data-id="${encodeURIComponent(doc.id)}" 
+                        data-target="${safeId}" 
+                        onclick="summarizeFromButton(this)">요약하기</button>
+                    <a href="${escapeHtml(doc.url || "")}" target="_blank">
+                        <button>보러가기</button>
+                    </a>
+                </div>
+                <div id="${safeId}"></div>
+            </div>
+            <img src="${escapeHtml(imageSrc)}" alt="기사 이미지" class="result-thumb">
+        </div>
+    `;
 }
 
+// ✅ 검색 상태 (다음 페이지 요청용, 정렬은 서버에서 끝난 순서 그대로 표시)
+let searchQuestion = "";
+let searchSort = "relevance";
+let nextCursor = null;
+let shownCount = 0;
 
-
-// ✅ 검색 함수
+// ✅ 검색 함수 (첫 페이지)
 async function search() {
-    const question = document.getElementById('questionInput').value;
+    searchQuestion = document.getElementById('questionInput').value;
+    searchSort = document.getElementById('sortSelect').value;
+    nextCursor = null;
+    shownCount = 0;
+
     const resultDiv = document.getElementById('result');
-    resultDiv.innerHTML = '⏳ 검색 중...';
+    resultDiv.innerHTML = `
+        <p id="resultStatus">⏳ 검색 중...</p>
+        <div id="resultList"></div>
+        <div class="more-container"><button id="moreButton" onclick="loadMore()" style="display:none;">더 보기</button></div>
+    `;
+    await streamFirstPage();
+}
+
+// ✅ 첫 페이지는 NDJSON 스트림으로 받아서 기사가 도착하는 대로 표시 (마지막 줄에 다음 페이지 cursor)
+async function streamFirstPage() {
+    const resultDiv = document.getElementById('result');
+    const listDiv = document.getElementById('resultList');
 
     try {
-        const response = await fetch("/search/documents", {
+        const response = await fetch("/search/documents/stream", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ question })
+            body: JSON.stringify({ question: searchQuestion, sort: searchSort })
         });
 
+        if (!response.ok || !response.body) {
+            resultDiv.innerHTML = `<p style="color:red;">❌ 검색 실패 (${response.status})</p>`;
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let newline;
+            while ((newline = buffer.indexOf("\n")) !== -1) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (!line) continue;
+
+                const message = JSON.parse(line);
+                if (message.type === "error") {
+                    resultDiv.innerHTML = `<p style="color:red;">${message.error}</p>`;
+                    return;
+                }
+                if (message.type === "document") {
+                    listDiv.insertAdjacentHTML("beforeend", renderCard(message.document, shownCount));
+                    shownCount += 1;
+                    updateStatus(null);
+                }
+                if (message.type === "done") {
+                    updateStatus(message.next_cursor || null);
+                    return;
+                }
+            }
+        }
+        updateStatus(null);
+    } catch (err) {
+        resultDiv.innerHTML = `<p style="color:red;">❌ 오류 발생: ${err.message}</p>`;
+    }
+}
+
+// ✅ 표시 건수와 "더 보기" 버튼 갱신
+function updateStatus(cursor) {
+    const statusP = document.getElementById('resultStatus');
+    const moreButton = document.getElementById('moreButton');
+    nextCursor = cursor;
+    statusP.innerHTML = `🔎 ${shownCount}건 표시 중${searchSort === "date" ? " (최신순)" : ""}`;
+    moreButton.style.display = nextCursor ? "" : "none";
+    moreButton.disabled = false;
+}
+
+// ✅ 다음 페이지 (서버가 준 cursor 로 다음 기사만 받아서 아래에 추가)
+async function loadMore() {
+    if (!nextCursor) return;
+    await fetchPage(nextCursor);
+}
+
+async function fetchPage(cursor) {
+    const resultDiv = document.getElementById('result');
+    const listDiv = document.getElementById('resultList');
+    const moreButton = document.getElementById('moreButton');
+    moreButton.disabled = true;
+
+    try {
+        const response = await fetch("/search/documents/page", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ question: searchQuestion, sort: searchSort, cursor })
+        });
         const data = await response.json();
 
-        if (data.error) {
-            resultDiv.innerHTML = `<p style="color:red;">❌ ${data.error}</p>`;
+        if (!response.ok || data.error) {
+            resultDiv.innerHTML = `<p style="color:red;">${data.error || `❌ 검색 실패 (${response.status})`}</p>`;
             return;
         }
-       // data.documents.sort((a, b) => toSortableDateNum(b.date) - toSortableDateNum(a.date)); //날짜순 정렬
-        data.documents.sort((a, b) => b.accuracy - a.accuracy); // 정확도 순 정렬
-
-        let html = `<p>🔎 총 ${data.result_count}건 검색됨</p>`;
-        for (const [index, doc] of data.documents.entries()) {
-            const safeId = `summary_${index}`;
-            const imageSrc = (doc.image_url && doc.image_url.trim() !== "") 
-                ? doc.image_url 
-                : "https://s1.tokenpost.kr/assets/images/tokenpost_new/common_new/logo.svg";
-
-            html += `
-                <div class="result-card">
-                    <div class="result-content">
-                        <div class="result-title">${doc.title || "제목 없음"}</div>
-                        <div class="result-meta">📝 기자: ${doc.reporter || "없음"} | ${formatDateKorean(doc.date)}</div>
-                        <div class="result-accuracy">🧠 정확도: ${doc.accuracy}</div>
-                        <div class="result-buttons">
-                            <button 
-                                data-content="${encodeURIComponent(doc.content || '')}" 
-                                data-target="${safeId}" 
-                                onclick="summarizeFromButton(this)">요약하기</button>
-                            <a href="${doc.url}" target="_blank">
-                                <button>보러가기</button>
-                            </a>
-                        </div>
-                        <div id="${safeId}"></div>
-                    </div>
-                    <img src="${imageSrc}" alt="기사 이미지" class="result-thumb">
-                </div>
-            `;
+
+        for (const doc of data.documents) {
+            listDiv.insertAdjacentHTML("beforeend", renderCard(doc, shownCount));
+            shownCount += 1;
         }
-        resultDiv.innerHTML = html;
+        updateStatus(data.next_cursor);
     } catch (err) {
         resultDiv.innerHTML = `<p style="color:red;">❌ 오류 발생: ${err.message}</p>`;
     }
@@ -107,17 +179,15 @@ function summarizeFromButton(button) {
     button.style.opacity = "0.6";            // 👉 시각적으로 회색 느낌
     button.style.cursor = "not-allowed";     // 👉 커서도 막힌 느낌
 
-    const contentEncoded = button.dataset.content;
+    const docId = decodeURIComponent(button.dataset.id);
     const targetId = button.dataset.target;
-    summarize(contentEncoded, targetId);
+    summarize(docId, targetId);
 }
 
-// ✅ 요약 함수
-async function summarize(contentEncoded, targetId) {
-    const content = decodeURIComponent(contentEncoded);
-
-    if (!content || content.length < 10) {
-        alert("⚠️ 요약할 본문이 없습니다.");
+// ✅ 요약 함수 (본문은 서버에서 기사 id 로 조회)
+async function summarize(docId, targetId) {
+    if (!docId) {
+        alert("⚠️ 요약할 기사가 없습니다.");
         return;
     }
 
@@ -126,36 +196,70 @@ async function summarize(contentEncoded, targetId) {
     targetDiv.innerText = "🧠 요약 중...";
 
     try {
-        const response = await fetch("/summarize", {
+        const response = await fetch("/summarize/stream", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ content })
+            body: JSON.stringify({ id: docId })
         });
 
-        const data = await response.json();
+        if (!response.ok || !response.body) {
+            targetDiv.innerText = "❌ 요약 실패";
+            return;
+        }
+
+        // ✅ SSE 스트림을 읽으면서 도착한 텍스트를 바로 표시
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        let text = "";
+        let started = false;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
 
-        if (data.summary) {
-            targetDiv.innerHTML = "📄 ";
-            let i = 0;
-            const text = data.summary;
-
-            function typeWriter() {
-                if (i < text.length) {
-                    const char = text.charAt(i);
-                    targetDiv.innerHTML += (char === " " ? "&nbsp;" : char);
-                    i++;
-                    setTimeout(typeWriter, 20);
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const event = parseSseEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+
+                if (event.type === "error") {
+                    targetDiv.innerText = event.data.error || "❌ 요약 실패";
+                    return;
+                }
+                if (event.type === "done") {
+                    if (!started) targetDiv.innerText = "❌ 요약 실패";
+                    return;
+                }
+                if (event.data.text) {
+                    started = true;
+                    text += event.data.text;
+                    targetDiv.innerText = "📄 " + text;
                 }
             }
-            typeWriter();
-        } else {
-            targetDiv.innerText = "❌ 요약 실패";
         }
     } catch (err) {
         targetDiv.innerText = `❌ 요약 중 오류: ${err.message}`;
     }
 }
 
+// ✅ SSE 이벤트 블록 파싱 ("event: ..." / "data: ..." 줄)
+function parseSseEvent(block) {
+    let type = "message";
+    let data = "";
+    for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) type = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+    }
+    try {
+        return { type, data: data ? JSON.parse(data) : {} };
+    } catch (e) {
+        return { type, data: {} };
+    }
+}
+
 // ✅ HTML의 onclick이 동작하도록 전역 등록
 window.search = search;
+window.loadMore = loadMore;
 window.summarizeFromButton = summarizeFromButton;
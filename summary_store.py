@@ -0,0 +1,91 @@
+import os, time, sqlite3, hashlib, threading
+from typing import Optional
+from vllm_utils import clean_article_text, SUMMARY_PROMPT_VERSION
+
+# ✅ 요약 저장소 설정 (로컬 SQLite 파일)
+SUMMARY_DB_PATH = os.getenv("SUMMARY_DB_PATH", "summaries.sqlite3")
+
+
+# ✅ 정제된 본문 기준 해시 (본문이 바뀌면 키도 바뀜)
+def content_hash(article_text: str) -> str:
+    return hashlib.sha256(clean_article_text(article_text or "").encode("utf-8")).hexdigest()
+
+
+# ✅ 기사 id + 본문 해시 + 프롬프트 버전 → 요약
+class SummaryStore:
+    def __init__(self, path: str = SUMMARY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                article_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (article_id, content_hash, prompt_version)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_state (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, article_id, digest: str, prompt_version: str = SUMMARY_PROMPT_VERSION) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE article_id = ? AND content_hash = ? AND prompt_version = ?",
+                (str(article_id), digest, prompt_version)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, article_id, digest: str, summary: str, prompt_version: str = SUMMARY_PROMPT_VERSION):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)",
+                (str(article_id), digest, prompt_version, summary, time.time())
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    # 배치 작업 재시작 지점 저장용
+    def get_state(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM job_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, name: str, value: Optional[str]):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO job_state VALUES (?, ?)", (name, value))
+            self._conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+summary_store = SummaryStore()
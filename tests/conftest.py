@@ -0,0 +1,7 @@
+import os, tempfile
+
+# main / summary_store 를 가져오기 전에 테스트용 경로로 설정 (작업 디렉터리의 저장소 파일을 건드리지 않도록)
+_tmp_dir = tempfile.mkdtemp(prefix="rag-tests-")
+os.environ.setdefault("SUMMARY_DB_PATH", os.path.join(_tmp_dir, "summaries.sqlite3"))
+os.environ.setdefault("INGEST_VERSION_FILE", os.path.join(_tmp_dir, "ingest_version"))
+os.environ.setdefault("EMBED_LOAD_ON_STARTUP", "0")
@@ -0,0 +1,87 @@
+import asyncio
+
+from cache_utils import LRUCache, VersionedCache, normalize_question, json_sizeof
+
+
+def test_normalize_question():
+    assert normalize_question("  ＡＩ   반도체 기사?? ") == "ai 반도체 기사"
+    assert normalize_question(None) == ""
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a 가 최근 사용으로 이동
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = LRUCache(max_size=10, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_max_bytes_evicts_and_skips_oversized_values():
+    cache = LRUCache(max_size=100, ttl=60, max_bytes=20, sizeof=json_sizeof)
+    cache.set("a", "x" * 8)   # 10바이트
+    cache.set("b", "y" * 8)
+    cache.set("c", "z" * 8)   # 합계 30 > 20 → a 제거
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 20
+    cache.set("big", "w" * 100)  # 상한보다 큰 값은 저장하지 않음
+    assert cache.get("big") is None
+    assert cache.get("c") == "z" * 8
+
+
+def test_versioned_cache_clears_on_version_change():
+    versions = iter([1, 1, 2])
+
+    async def version_fn():
+        return next(versions)
+
+    async def run():
+        cache = VersionedCache(version_fn, check_interval=0, max_size=10, ttl=60)
+        cache.set("q", "응답")
+        assert await cache.aget("q") == "응답"   # 버전 1 기록
+        assert await cache.aget("q") == "응답"   # 그대로 1
+        assert await cache.aget("q") is None     # 2 로 바뀜 → 비움
+        assert cache.stats()["invalidations"] == 1
+        assert cache.version == 2
+
+    asyncio.run(run())
+
+
+def test_versioned_cache_checks_at_most_once_per_interval():
+    calls = []
+
+    async def version_fn():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        cache = VersionedCache(version_fn, check_interval=3600, max_size=10, ttl=60)
+        await cache.refresh_version(force=True)
+        cache.set("q", "응답")
+        for _ in range(5):
+            assert await cache.aget("q") == "응답"
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_versioned_cache_keeps_entries_when_version_check_fails():
+    async def version_fn():
+        raise RuntimeError("qdrant down")
+
+    async def run():
+        cache = VersionedCache(version_fn, check_interval=0, max_size=10, ttl=60)
+        cache.set("q", "응답")
+        assert await cache.aget("q") == "응답"
+        assert cache.stats()["invalidations"] == 0
+
+    asyncio.run(run())
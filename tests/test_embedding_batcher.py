@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from embedding_utils import EmbeddingBatcher
+
+
+def make_batcher(encode_fn, **kwargs):
+    options = dict(executor=ThreadPoolExecutor(max_workers=2), max_batch_size=2, max_wait_ms=50,
+                   max_concurrent_batches=2, cleanup_interval=0)
+    options.update(kwargs)
+    return EmbeddingBatcher(encode_fn, **options)
+
+
+def test_concurrent_requests_share_batches_and_keep_order():
+    sizes = []
+    lock = threading.Lock()
+
+    def encode(texts):
+        with lock:
+            sizes.append(len(texts))
+        return [f"vec:{t}" for t in texts]
+
+    async def run():
+        batcher = make_batcher(encode)
+        try:
+            return await batcher.encode_many([f"q{i}" for i in range(5)]), batcher
+        finally:
+            await batcher.stop()
+
+    vectors, batcher = asyncio.run(run())
+    assert vectors == [f"vec:q{i}" for i in range(5)]
+    assert sorted(sizes) == [1, 2, 2]
+    assert batcher.batches == 3 and batcher.items == 5
+
+
+def test_encode_error_fails_every_caller_in_the_batch():
+    def encode(texts):
+        raise RuntimeError("model failed")
+
+    async def run():
+        batcher = make_batcher(encode)
+        try:
+            results = await asyncio.gather(batcher.encode("a"), batcher.encode("b"), return_exceptions=True)
+        finally:
+            await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_restarts_after_stop_and_on_a_new_event_loop():
+    def encode(texts):
+        return [len(t) for t in texts]
+
+    batcher = make_batcher(encode)
+
+    async def run():
+        assert await batcher.encode("abc") == 3
+        await batcher.stop()
+        assert await batcher.encode("abcd") == 4  # stop 후 다시 호출하면 수집 작업 재시작
+        await batcher.stop()
+
+    asyncio.run(run())
+    asyncio.run(run())  # 루프가 바뀌어도 새 대기열로 동작
+
+
+def test_dead_collector_is_restarted():
+    def encode(texts):
+        return [t.upper() for t in texts]
+
+    async def run():
+        batcher = make_batcher(encode)
+        assert await batcher.encode("a") == "A"
+        # 수집 작업이 예외로 끝난 상태를 흉내 냄
+        async def boom():
+            raise RuntimeError("collector crashed")
+        batcher._collector.cancel()
+        batcher._collector = asyncio.get_running_loop().create_task(boom())
+        with pytest.raises(RuntimeError):
+            await batcher._collector
+        assert await asyncio.wait_for(batcher.encode("b"), 1) == "B"
+        await batcher.stop()
+
+    asyncio.run(run())
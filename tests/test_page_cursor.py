@@ -0,0 +1,76 @@
+import base64
+
+import orjson
+import pytest
+
+from main import encode_cursor, decode_cursor, page_cursor, parse_page_size, SEARCH_PAGE_SIZE, SEARCH_PAGE_MAX_SIZE
+from qdrant_utils import valid_page_state
+
+
+def test_cursor_round_trip():
+    data = {"question": "반도체", "sort": "date", "keywords": ["2024", "반도체"],
+            "state": {"stage": 0, "before": 20240301, "seen": [1, "a"]}}
+    cursor = encode_cursor(data)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == data
+
+
+def test_page_cursor_is_none_on_last_page():
+    assert page_cursor("반도체", "relevance", ["반도체"], None) is None
+    cursor = page_cursor("  반도체 ", "relevance", ["반도체"], {"stage": 1, "offset": 10})
+    decoded = decode_cursor(cursor)
+    assert decoded["state"] == {"stage": 1, "offset": 10}
+    assert decoded["keywords"] == ["반도체"]
+
+
+@pytest.mark.parametrize("cursor", [
+    None, 5, ["x"], "", "!!!not-base64!!!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    encode_cursor(["list", "not", "object"]),
+    encode_cursor({"keywords": ["a"]}),
+    encode_cursor({"keywords": "a", "state": {}}),
+    encode_cursor({"keywords": [1, 2], "state": {}}),
+    encode_cursor({"keywords": ["a"], "state": [0]}),
+])
+def test_decode_cursor_rejects_malformed(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_decode_cursor_accepts_unpadded_base64():
+    raw = base64.urlsafe_b64encode(orjson.dumps({"keywords": [], "state": {"stage": 0}})).decode()
+    assert decode_cursor(raw.rstrip("=")) == {"keywords": [], "state": {"stage": 0}}
+
+
+def test_parse_page_size():
+    assert parse_page_size(None) == SEARCH_PAGE_SIZE
+    assert parse_page_size("") == SEARCH_PAGE_SIZE
+    assert parse_page_size(5) == 5
+    assert parse_page_size("7") == 7
+    assert parse_page_size(3.0) == 3
+    assert parse_page_size(0) == 1
+    assert parse_page_size(10_000) == SEARCH_PAGE_MAX_SIZE
+
+
+@pytest.mark.parametrize("value", [True, False, 2.7, "2.7", "abc", "１０", [5], {"n": 5}])
+def test_parse_page_size_rejects_malformed(value):
+    with pytest.raises((TypeError, ValueError)):
+        parse_page_size(value)
+
+
+@pytest.mark.parametrize("state, sort, ok", [
+    ({"stage": 0, "offset": 10}, "relevance", True),
+    ({"stage": 0}, "relevance", True),
+    ({"stage": 0, "offset": -1}, "relevance", False),
+    ({"stage": 0, "offset": True}, "relevance", False),
+    ({"stage": 0, "offset": "10"}, "relevance", False),
+    ({"stage": 2, "offset": 0}, "relevance", False),
+    ({"stage": True, "offset": 0}, "relevance", False),
+    ({"stage": 0, "before": 20240301, "seen": [1, "uuid"]}, "date", True),
+    ({"stage": 0, "before": None, "seen": []}, "date", True),
+    ({"stage": 0, "before": "20240301"}, "date", False),
+    ({"stage": 0, "seen": "12"}, "date", False),
+    ({"stage": 0, "seen": [[1]]}, "date", False),
+    ({"stage": 0, "seen": [False]}, "date", False),
+])
+def test_valid_page_state(state, sort, ok):
+    assert valid_page_state(state, sort, num_stages=2) is ok
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+import qdrant_utils
+from qdrant_admin import partition_name, parse_partition_name, partition_year
+
+
+def test_partition_name_round_trip():
+    assert partition_name("news", 2024) == "news_2024"
+    assert partition_name("news", "2024") == "news_2024"
+    assert parse_partition_name("news", "news_2024") == 2024
+    assert parse_partition_name("news", "news_undated") is None
+    assert parse_partition_name("news", "news") is False
+    assert parse_partition_name("news", "news_hybrid") is False
+
+
+def test_unroutable_years_go_to_undated_partition():
+    for value in ("2024년", "", None, 25, "25", True, 123456, "abcd"):
+        assert partition_year(value) is None, value
+        name = partition_name("news", value)
+        assert name == "news_undated", value
+        assert parse_partition_name("news", name) is None
+
+
+class FakeCollections:
+    def __init__(self, names):
+        self.names = names
+        self.calls = 0
+
+    async def get_collections(self):
+        self.calls += 1
+        return SimpleNamespace(collections=[SimpleNamespace(name=n) for n in self.names])
+
+
+def make_router(monkeypatch, names, enabled=True, refresh_interval=3600):
+    client = FakeCollections(names)
+    monkeypatch.setattr(qdrant_utils, "get_qdrant_client", lambda: client)
+    return qdrant_utils.PartitionRouter("news", enabled, refresh_interval), client
+
+
+def test_router_disabled_uses_base_collection(monkeypatch):
+    router, client = make_router(monkeypatch, ["news_2024"], enabled=False)
+    assert asyncio.run(router.route({2024})) == ["news"]
+    assert client.calls == 0
+
+
+def test_router_routes_years_to_existing_partitions(monkeypatch):
+    router, client = make_router(monkeypatch, ["news", "news_2023", "news_2024", "news_undated", "other_2024"])
+
+    async def run():
+        assert await router.route({2024, 2022}) == ["news_2024"]
+        assert sorted(await router.route()) == ["news_2023", "news_2024", "news_undated"]
+        assert await router.route({2021}) == []
+
+    asyncio.run(run())
+    # 첫 호출은 refresh_interval 이 커도 조회하고, 이후에는 캐시 사용
+    assert client.calls == 1
+
+
+def test_router_refreshes_after_interval(monkeypatch):
+    router, client = make_router(monkeypatch, ["news_2024"], refresh_interval=0)
+
+    async def run():
+        assert await router.route({2025}) == []
+        client.names.append("news_2025")
+        assert await router.route({2025}) == ["news_2025"]
+
+    asyncio.run(run())
+    assert client.calls == 2
@@ -0,0 +1,36 @@
+import uuid
+
+import pytest
+
+from ingest import to_point_id
+from qdrant_utils import parse_point_id
+
+
+@pytest.mark.parametrize("doc_id, expected", [
+    (0, 0),
+    (123, 123),
+    ("123", 123),
+    ("550e8400-e29b-41d4-a716-446655440000", "550e8400-e29b-41d4-a716-446655440000"),
+    ("550E8400E29B41D4A716446655440000", "550e8400-e29b-41d4-a716-446655440000"),
+])
+def test_parse_point_id(doc_id, expected):
+    assert parse_point_id(doc_id) == expected
+
+
+@pytest.mark.parametrize("doc_id", [-1, True, 1.5, None, "", "12a", "１２３", "-3", [1], "not-a-uuid"])
+def test_parse_point_id_rejects_malformed(doc_id):
+    with pytest.raises(ValueError):
+        parse_point_id(doc_id)
+
+
+def test_to_point_id_matches_parse_point_id_for_integer_ids():
+    assert to_point_id(42) == parse_point_id(42) == 42
+    assert to_point_id("42") == parse_point_id("42") == 42
+
+
+def test_to_point_id_hashes_other_ids_to_stable_uuids():
+    for article_id in ("１２３", "news-2024-001", -5):
+        point_id = to_point_id(article_id)
+        assert point_id == str(uuid.uuid5(uuid.NAMESPACE_URL, str(article_id)))
+        # 적재된 point id 는 /documents/{id} 에서 그대로 조회할 수 있어야 함
+        assert parse_point_id(point_id) == point_id
@@ -0,0 +1,63 @@
+from query_parser import parse_question, to_keywords, merge_date_keywords
+
+
+def test_four_digit_year_and_month():
+    parsed = parse_question("2024년 3월 반도체 기사")
+    assert (parsed["year"], parsed["month"]) == (2024, 3)
+    assert parsed["nouns"] == ["반도체"]
+    assert parsed["confident"] is True
+    assert to_keywords(parsed) == ["2024", "3", "반도체"]
+
+
+def test_two_digit_year_forms():
+    assert parse_question("23년도 삼성전자")["year"] == 2023
+    assert parse_question("'23년 삼성전자")["year"] == 2023
+
+
+def test_full_date():
+    parsed = parse_question("2024.3.5 금리")
+    assert (parsed["year"], parsed["month"], parsed["day"]) == (2024, 3, 5)
+
+
+def test_relative_period_is_not_a_year():
+    parsed = parse_question("10년 전 반도체 기사")
+    assert parsed["year"] is None
+    assert parsed["nouns"] == ["반도체"]
+    assert parsed["confident"] is False
+
+    for question in ("5년 만에 흑자", "3개월 후 금리", "3일 전 환율"):
+        parsed = parse_question(question)
+        assert (parsed["year"], parsed["month"], parsed["day"]) == (None, None, None), question
+        assert parsed["confident"] is False, question
+
+
+def test_bare_two_digit_year_is_uncertain():
+    parsed = parse_question("23년 삼성전자")
+    assert parsed["year"] is None
+    assert parsed["confident"] is False
+
+
+def test_four_digit_year_followed_by_jeon_word():
+    parsed = parse_question("2024년 전체 반도체")
+    assert parsed["year"] == 2024
+
+
+def test_confident_is_bool():
+    assert parse_question("반도체")["confident"] is True
+    assert parse_question("")["confident"] is False
+    assert parse_question("요즘 반도체 왜 오르나요")["confident"] is False
+
+
+def test_merge_keeps_llm_month_when_parser_found_only_year():
+    parsed = parse_question("2024년 봄 반도체 수출은 어떻게 됐나요")
+    assert merge_date_keywords(["2024", "3월", "반도체"], parsed) == ["2024", "3", "반도체"]
+
+
+def test_merge_prefers_parsed_units():
+    parsed = parse_question("2024년 3월 반도체")
+    assert merge_date_keywords(["2023년", "4", "반도체"], parsed) == ["2024", "3", "반도체"]
+
+
+def test_merge_without_parsed_dates_returns_llm_keywords():
+    parsed = parse_question("최근 반도체")
+    assert merge_date_keywords(["반도체", "3월"], parsed) == ["반도체", "3월"]
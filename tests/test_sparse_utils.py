@@ -0,0 +1,38 @@
+from sparse_utils import tokenize, encode_sparse_document, encode_sparse_query, document_text, token_index
+
+
+def test_tokenize_strips_josa_and_adds_hangul_bigrams():
+    tokens = tokenize("비트코인이 급등했다 AI 2024")
+    assert "비트코인" in tokens
+    assert {"#비트", "#트코", "#코인"} <= set(tokens)
+    assert "ai" in tokens and "2024" in tokens
+
+
+def test_tokenize_normalizes_full_width_and_case():
+    assert tokenize("ＡＩ") == tokenize("ai") == ["ai"]
+
+
+def test_document_vector_is_sorted_and_unique():
+    vector = encode_sparse_document("반도체 반도체 수출 증가")
+    assert vector.indices == sorted(set(vector.indices))
+    assert len(vector.indices) == len(vector.values)
+    assert all(v > 0 for v in vector.values)
+
+
+def test_repeated_terms_saturate():
+    vector = encode_sparse_document("반도체 " * 50 + "수출")
+    weights = dict(zip(vector.indices, vector.values))
+    assert weights[token_index("반도체")] > weights[token_index("수출")]
+    assert weights[token_index("반도체")] < 50 * weights[token_index("수출")]
+
+
+def test_query_matches_inflected_document_terms():
+    query = encode_sparse_query("비트코인")
+    document = encode_sparse_document("비트코인이 사상 최고가를 기록했다")
+    assert set(query.indices) <= set(document.indices)
+    assert all(v == 1.0 for v in query.values)
+
+
+def test_document_text_joins_title_and_cleaned_body():
+    assert document_text("제목", "본문").startswith("제목\n")
+    assert document_text(None, None) == ""
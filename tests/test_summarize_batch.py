@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+
+import main
+from vllm_utils import LLM_OVERLOADED, LLM_CONNECTION_FAILED
+from summary_store import summary_store, content_hash
+
+
+def post_batch(monkeypatch, body, summarize=None):
+    calls, fetched = [], []
+
+    async def fake_summarize(contents):
+        calls.append(list(contents))
+        return summarize(contents) if summarize else [f"요약:{c}" for c in contents]
+
+    async def fake_get_documents(ids):
+        fetched.append(list(ids))
+        return {}
+
+    monkeypatch.setattr(main, "call_vllm_summarize_articles", fake_summarize)
+    monkeypatch.setattr(main, "get_documents", fake_get_documents)
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/summarize/batch", json=body)
+
+    return asyncio.run(run()), calls, fetched
+
+
+def test_rejects_malformed_requests(monkeypatch):
+    for body in ([], {}, {"articles": []}, {"articles": "본문"}):
+        response, calls, _ = post_batch(monkeypatch, body)
+        assert response.status_code == 400, body
+        assert calls == []
+    too_many = {"articles": [{"content": "본문"}] * (main.SUMMARY_BATCH_MAX_ITEMS + 1)}
+    assert post_batch(monkeypatch, too_many)[0].status_code == 400
+
+
+def test_invalid_items_get_per_item_errors(monkeypatch):
+    body = {"articles": [
+        "문자열",
+        {"id": "a", "content": 123},
+        {"id": "not-an-id"},
+        {"id": 7, "content": ""},
+        {"id": "c", "content": "정상 본문 배치1"},
+    ]}
+    response, calls, fetched = post_batch(monkeypatch, body)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == {"id": None, "error": "❌ 잘못된 항목입니다. (객체가 아님)"}
+    assert results[1] == {"id": "a", "error": "❌ 잘못된 항목입니다. (content 는 문자열)"}
+    assert results[2] == {"id": "not-an-id", "error": "❌ 잘못된 기사 id 입니다."}
+    assert results[3] == {"id": 7, "error": "❌ 기사 본문이 없습니다."}
+    assert results[4] == {"id": "c", "summary": "요약:정상 본문 배치1"}
+    assert calls == [["정상 본문 배치1"]]
+    assert fetched == [[7]]  # 본문 없이 id 만 온 항목만 조회
+
+
+def test_stored_summaries_survive_llm_outage(monkeypatch):
+    summary_store.put("stored", content_hash("저장된 본문 배치2"), "저장된 요약")
+    body = {"articles": [
+        {"id": "stored", "content": "저장된 본문 배치2"},
+        {"id": "new", "content": "새 본문 배치2"},
+    ]}
+    response, calls, _ = post_batch(monkeypatch, body, summarize=lambda contents: [LLM_OVERLOADED] * len(contents))
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"id": "stored", "summary": "저장된 요약"},
+        {"id": "new", "error": LLM_OVERLOADED},
+    ]
+    assert calls == [["새 본문 배치2"]]
+
+
+def test_all_items_unavailable_returns_503(monkeypatch):
+    body = {"articles": [{"id": "x", "content": "본문 배치3-1"}, {"id": "y", "content": "본문 배치3-2"}]}
+    response, *_ = post_batch(monkeypatch, body, summarize=lambda contents: [LLM_OVERLOADED] * len(contents))
+    assert response.status_code == 503
+    assert response.json() == {"error": LLM_OVERLOADED}
+
+
+def test_other_llm_errors_stay_per_item(monkeypatch):
+    body = {"articles": [{"id": "z", "content": "본문 배치4"}]}
+    response, *_ = post_batch(monkeypatch, body, summarize=lambda contents: [LLM_CONNECTION_FAILED] * len(contents))
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"id": "z", "error": LLM_CONNECTION_FAILED}]
+    assert summary_store.get("z", content_hash("본문 배치4")) is None
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import vllm_utils
+from vllm_utils import ConcurrencyGate, CircuitBreaker, LLMUnavailable, LLM_OVERLOADED, LLM_CIRCUIT_OPEN
+
+
+def test_gate_rejects_when_queue_is_full():
+    async def run():
+        gate = ConcurrencyGate(max_in_flight=1, max_waiting=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.slot(timeout=5):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert gate.in_flight == 1 and gate.waiting == 1 and gate.full()
+
+        with pytest.raises(LLMUnavailable) as exc:
+            async with gate.slot(timeout=5):
+                pass
+        assert exc.value.reason == "queue_full"
+        assert exc.value.message == LLM_OVERLOADED
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+        assert gate.in_flight == 0 and gate.waiting == 0
+
+    asyncio.run(run())
+
+
+def test_gate_times_out_waiting_requests():
+    async def run():
+        gate = ConcurrencyGate(max_in_flight=1, max_waiting=4)
+        async with gate.slot(timeout=1):
+            with pytest.raises(LLMUnavailable) as exc:
+                async with gate.slot(timeout=0.01):
+                    pass
+            assert exc.value.reason == "queue_timeout"
+            assert gate.waiting == 0
+        # 시간 초과 후에도 슬롯이 새지 않음
+        async with gate.slot(timeout=0.01):
+            assert gate.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(vllm_utils.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open() and breaker.opens == 1
+    assert not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()       # 시험 요청 1건
+    assert not breaker.allow()   # 결과가 나오기 전 다른 요청은 차단
+
+    breaker.record_failure()     # 시험 실패 → 다시 reset 시간만큼 차단
+    assert breaker.is_open() and breaker.opens == 1
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open() and breaker.failures == 0 and breaker.allow()
+
+
+def test_unavailable_messages_are_llm_errors():
+    assert LLMUnavailable("circuit_open").message == LLM_CIRCUIT_OPEN
+    for message in (LLM_OVERLOADED, LLM_CIRCUIT_OPEN):
+        assert vllm_utils.is_llm_error(message) and vllm_utils.is_llm_unavailable(message)
+    assert not vllm_utils.is_llm_unavailable(vllm_utils.LLM_CONNECTION_FAILED)
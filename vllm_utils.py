@@ -1,43 +1,324 @@
-import requests
+import httpx
+import json
 import re
+import os
+import time
+import random
+import asyncio
+from contextlib import asynccontextmanager
+from metrics import (
+    STAGE_SECONDS, ERRORS, LLM_BATCH_SIZE, LLM_REJECTED, LLM_RETRIES, SUMMARY_REQUESTS, SUMMARY_CHUNKS,
+    CallbackMetric, debug_sampled
+)
 
 # ✅ vLLM API 서버 정보
 VLLM_API_URL = "http://localhost:8000/v1/completions"
 MODEL_ID = "/home/filadmin/ai-project/vllm/production-models/gemma-3-27b-it"
+VLLM_TIMEOUT = 30
+VLLM_BATCH_TIMEOUT = 120  # 여러 프롬프트를 한 번에 보내는 요청은 더 오래 걸림
+VLLM_CONNECT_TIMEOUT = float(os.getenv("VLLM_CONNECT_TIMEOUT", "3"))
 
-# ✅ 1️⃣ vLLM API 호출 함수
-def call_vllm(prompt, max_tokens=256, stop=None):
-    try:
-        response = requests.post(
-            VLLM_API_URL,
-            headers={"Content-Type": "application/json"},
-            json={
-                "model": MODEL_ID,
-                "prompt": prompt.strip(),
-                "max_tokens": max_tokens,
-                "temperature": 0.4,
-                **({"stop": stop} if stop else {})
-            },
-            timeout=30
+# ✅ 동시 요청 제한 + 대기열 (백프레셔)
+#    VLLM_MAX_IN_FLIGHT 건까지만 vLLM 에 동시에 보내고, 나머지는 VLLM_MAX_QUEUE 건까지 대기
+#    대기열이 가득 차면 바로 거절 (API 는 503), VLLM_QUEUE_TIMEOUT 초 넘게 기다려도 거절
+#    키워드 생성은 검색 응답을 붙잡지 않도록 VLLM_KEYWORD_QUEUE_TIMEOUT 만 기다리고 키워드 없이 검색
+VLLM_MAX_IN_FLIGHT = int(os.getenv("VLLM_MAX_IN_FLIGHT", "16"))
+VLLM_MAX_QUEUE = int(os.getenv("VLLM_MAX_QUEUE", "64"))
+VLLM_QUEUE_TIMEOUT = float(os.getenv("VLLM_QUEUE_TIMEOUT", "10"))
+VLLM_KEYWORD_QUEUE_TIMEOUT = float(os.getenv("VLLM_KEYWORD_QUEUE_TIMEOUT", "1"))
+# keep-alive 연결 풀 크기 (동시 요청 상한보다 작으면 연결을 기다리게 됨)
+VLLM_MAX_CONNECTIONS = int(os.getenv("VLLM_MAX_CONNECTIONS", str(VLLM_MAX_IN_FLIGHT)))
+
+# ✅ 일시적 오류(연결 실패/타임아웃/429/5xx) 재시도: 0 ~ VLLM_RETRY_BACKOFF * 2^n 초 사이 무작위 대기
+VLLM_MAX_RETRIES = int(os.getenv("VLLM_MAX_RETRIES", "2"))
+VLLM_RETRY_BACKOFF = float(os.getenv("VLLM_RETRY_BACKOFF", "0.2"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# ✅ 서킷 브레이커: 재시도까지 실패한 요청이 연속 VLLM_BREAKER_THRESHOLD 건이면 열림
+#    열린 동안은 vLLM 을 호출하지 않고 바로 실패, VLLM_BREAKER_RESET 초마다 시험 요청 1건 허용
+VLLM_BREAKER_THRESHOLD = int(os.getenv("VLLM_BREAKER_THRESHOLD", "5"))
+VLLM_BREAKER_RESET = float(os.getenv("VLLM_BREAKER_RESET", "30"))
+
+# ✅ call_vllm 실패 시 반환되는 문자열
+LLM_EMPTY_RESPONSE = "[⚠️ LLM 응답에 텍스트 없음]"
+LLM_CONNECTION_FAILED = "[❌ LLM 서버 연결 실패]"
+LLM_OVERLOADED = "[❌ LLM 요청이 많아 처리할 수 없음]"
+LLM_CIRCUIT_OPEN = "[❌ LLM 서버 일시 차단 중]"
+
+
+def is_llm_error(text: str) -> bool:
+    return text in (LLM_EMPTY_RESPONSE, LLM_CONNECTION_FAILED, LLM_OVERLOADED, LLM_CIRCUIT_OPEN)
+
+
+# 요청을 보내 보지도 않고 거절된 경우 (API 에서는 503 으로 응답)
+def is_llm_unavailable(text: str) -> bool:
+    return text in (LLM_OVERLOADED, LLM_CIRCUIT_OPEN)
+
+
+class LLMUnavailable(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason  # queue_full / queue_timeout / circuit_open
+
+    @property
+    def message(self) -> str:
+        return LLM_CIRCUIT_OPEN if self.reason == "circuit_open" else LLM_OVERLOADED
+
+
+# ✅ 동시 요청 상한 + 크기 제한 대기열
+class ConcurrencyGate:
+    def __init__(self, max_in_flight: int, max_waiting: int):
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    def full(self) -> bool:
+        return self._semaphore.locked() and self.waiting >= self.max_waiting
+
+    @asynccontextmanager
+    async def slot(self, timeout: float):
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # 빈 슬롯이 있으면 대기 없이 바로 획득
+        elif self.waiting >= self.max_waiting:
+            LLM_REJECTED.inc(reason="queue_full")
+            raise LLMUnavailable("queue_full")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                LLM_REJECTED.inc(reason="queue_timeout")
+                raise LLMUnavailable("queue_timeout")
+            finally:
+                self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+# ✅ 연속 실패 기반 서킷 브레이커 (closed → open → reset 시간 후 시험 요청 → closed / open)
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.opens = 0
+
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # 시험 요청 1건만 통과, 결과가 나오기 전 다른 요청은 다음 reset 시간까지 계속 차단
+            self.opened_at = time.monotonic()
+            print("🔌 vLLM 서킷 브레이커: 시험 요청 허용")
+            return True
+        LLM_REJECTED.inc(reason="circuit_open")
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            print("✅ vLLM 서킷 브레이커 닫힘 (서버 응답 복구)")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is None and self.failures < self.failure_threshold:
+            return
+        if self.opened_at is None:
+            self.opens += 1
+            print(f"🚫 vLLM 서킷 브레이커 열림 (연속 실패 {self.failures}건, {self.reset_timeout}초 차단)")
+        self.opened_at = time.monotonic()
+
+
+llm_gate = ConcurrencyGate(VLLM_MAX_IN_FLIGHT, VLLM_MAX_QUEUE)
+llm_breaker = CircuitBreaker(VLLM_BREAKER_THRESHOLD, VLLM_BREAKER_RESET)
+
+CallbackMetric("rag_llm_in_flight", "vLLM requests currently being processed", "gauge", (),
+               lambda: {(): llm_gate.in_flight})
+CallbackMetric("rag_llm_queue_waiting", "Requests waiting for a vLLM slot", "gauge", (),
+               lambda: {(): llm_gate.waiting})
+CallbackMetric("rag_llm_circuit_open", "1 while the vLLM circuit breaker is open", "gauge", (),
+               lambda: {(): int(llm_breaker.is_open())})
+
+
+# 바로 거절될 요청이면 사유 반환 (스트리밍 응답을 시작하기 전에 503 판단용)
+def llm_unavailable_reason():
+    if llm_breaker.is_open() and time.monotonic() - llm_breaker.opened_at < llm_breaker.reset_timeout:
+        return LLM_CIRCUIT_OPEN
+    if llm_gate.full():
+        return LLM_OVERLOADED
+    return None
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+# ✅ 비동기 HTTP 클라이언트 (이벤트 루프 안에서 지연 생성 후 재사용, keep-alive 연결 풀)
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(VLLM_TIMEOUT, connect=VLLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=VLLM_MAX_CONNECTIONS, max_keepalive_connections=VLLM_MAX_CONNECTIONS)
         )
+    return _http_client
+
 
-        response.raise_for_status()
-        result = response.json()
-        print("🔍 vLLM 응답 전체:", result)
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# ✅ 동시 요청 제한 + 재시도 + 서킷 브레이커를 거친 completions 요청 (응답 JSON 반환)
+#    거절되면 LLMUnavailable, 재시도까지 실패하면 마지막 httpx 예외를 그대로 올림
+async def post_completions(payload, timeout=None, queue_timeout=VLLM_QUEUE_TIMEOUT):
+    if not llm_breaker.allow():
+        raise LLMUnavailable("circuit_open")
+    request_timeout = httpx.Timeout(timeout, connect=VLLM_CONNECT_TIMEOUT) if timeout else httpx.USE_CLIENT_DEFAULT
+    async with llm_gate.slot(queue_timeout):
+        for attempt in range(VLLM_MAX_RETRIES + 1):
+            try:
+                response = await get_http_client().post(
+                    VLLM_API_URL,
+                    headers={"Content-Type": "application/json"},
+                    json=payload,
+                    timeout=request_timeout
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                if not is_transient(e):
+                    llm_breaker.record_success()  # 서버는 응답함 (요청 자체의 문제)
+                    raise
+                if attempt == VLLM_MAX_RETRIES:
+                    llm_breaker.record_failure()
+                    raise
+                delay = random.uniform(0, VLLM_RETRY_BACKOFF * 2 ** attempt)
+                print(f"🔁 vLLM 재시도 {attempt + 1}/{VLLM_MAX_RETRIES} ({delay:.2f}초 후): {e!r}")
+                LLM_RETRIES.inc()
+                await asyncio.sleep(delay)
+                continue
+            llm_breaker.record_success()
+            return response.json()
+
+
+# ✅ 1️⃣ vLLM API 호출 함수 (비동기)
+async def call_vllm(prompt, max_tokens=256, stop=None, queue_timeout=VLLM_QUEUE_TIMEOUT):
+    try:
+        result = await post_completions({
+            "model": MODEL_ID,
+            "prompt": prompt.strip(),
+            "max_tokens": max_tokens,
+            "temperature": 0.4,
+            **({"stop": stop} if stop else {})
+        }, queue_timeout=queue_timeout)
+        if debug_sampled():
+            print("🔍 vLLM 응답 전체:", result)
 
         choices = result.get("choices", [])
         if choices and "text" in choices[0]:
             return choices[0].get("text", "").strip()
 
-        return "[⚠️ LLM 응답에 텍스트 없음]"
+        return LLM_EMPTY_RESPONSE
 
-    except requests.RequestException as e:
+    except LLMUnavailable as e:
+        print(f"[⚠️ vLLM 호출 생략]: {e.reason}")
+        return e.message
+    except httpx.HTTPError as e:
         print(f"[❌ vLLM 호출 실패]: {e}")
-        return "[❌ LLM 서버 연결 실패]"
+        ERRORS.inc(component="llm")
+        return LLM_CONNECTION_FAILED
+
+
+# ✅ vLLM 다중 프롬프트 호출 (한 요청에 여러 프롬프트 → vLLM 이 함께 스케줄링)
+#    입력 순서대로 텍스트 리스트 반환, 항목별 실패는 오류 문자열로 채움
+async def call_vllm_batch(prompts, max_tokens=256, stop=None):
+    if not prompts:
+        return []
+    LLM_BATCH_SIZE.observe(len(prompts))
+    try:
+        result = await post_completions({
+            "model": MODEL_ID,
+            "prompt": [p.strip() for p in prompts],
+            "max_tokens": max_tokens,
+            "temperature": 0.4,
+            **({"stop": stop} if stop else {})
+        }, timeout=VLLM_BATCH_TIMEOUT)
+        print(f"🔍 vLLM 배치 응답: {len(result.get('choices', []))}/{len(prompts)}건")
+
+        texts = [LLM_EMPTY_RESPONSE] * len(prompts)
+        for i, choice in enumerate(result.get("choices", [])):
+            idx = choice.get("index", i)
+            if 0 <= idx < len(prompts) and choice.get("text"):
+                texts[idx] = choice["text"].strip()
+        return texts
+
+    except LLMUnavailable as e:
+        print(f"[⚠️ vLLM 배치 호출 생략]: {e.reason}")
+        return [e.message] * len(prompts)
+    except httpx.HTTPError as e:
+        print(f"[❌ vLLM 배치 호출 실패]: {e}")
+        ERRORS.inc(component="llm")
+        return [LLM_CONNECTION_FAILED] * len(prompts)
+
+
+# ✅ vLLM 스트리밍 호출 (토큰이 생성되는 대로 텍스트 조각을 yield)
+#    호출 측이 중간에 종료하면 연결이 닫히고 vLLM 도 해당 요청 생성을 중단함
+#    스트림이 끝날 때까지 동시 요청 슬롯 1개를 차지, 이미 일부를 보낸 뒤에는 재시도하지 않음
+async def stream_vllm(prompt, max_tokens=256, stop=None):
+    if not llm_breaker.allow():
+        raise LLMUnavailable("circuit_open")
+    async with llm_gate.slot(VLLM_QUEUE_TIMEOUT):
+        try:
+            async with get_http_client().stream(
+                "POST",
+                VLLM_API_URL,
+                headers={"Content-Type": "application/json"},
+                json={
+                    "model": MODEL_ID,
+                    "prompt": prompt.strip(),
+                    "max_tokens": max_tokens,
+                    "temperature": 0.4,
+                    "stream": True,
+                    **({"stop": stop} if stop else {})
+                }
+            ) as response:
+                response.raise_for_status()
+                llm_breaker.record_success()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices", [])
+                    if choices and choices[0].get("text"):
+                        yield choices[0]["text"]
+        except httpx.HTTPError as e:
+            if is_transient(e):
+                llm_breaker.record_failure()
+            raise
 
 
 # ✅ 2️⃣ 검색 키워드 생성 함수
-def call_vllm_generate_search_condition(user_question):
+async def call_vllm_generate_search_condition(user_question):
     prompt = f"""
 다음은 문서 검색용 키워드를 생성하는 작업이야.
 ❗️절대 설명하지 말고, 쉼표로 구분된 키워드 목록만 생성해.
@@ -52,7 +333,7 @@ def call_vllm_generate_search_condition(user_question):
 질문: {user_question}
 
 키워드:"""
-    return call_vllm(prompt, max_tokens=32, stop=["\n"])
+    return await call_vllm(prompt, max_tokens=32, stop=["\n"], queue_timeout=VLLM_KEYWORD_QUEUE_TIMEOUT)
 
 
 # ✅ 3️⃣ 키워드 후처리 함수
@@ -66,22 +347,178 @@ def clean_llm_keywords(raw_text: str) -> list:
 
 
 # ✅ 4️⃣ 뉴스 기사 요약 함수
-def call_vllm_summarize_article(article_text, user_question=None):
-    cleaned_text = clean_article_text(article_text)
-    prompt = f"""다음은 뉴스 기사입니다. 본문의 핵심 정보만 간결하게 3문장 이내로 정리할 것.
+#    프롬프트 내용을 바꾸면 SUMMARY_PROMPT_VERSION 도 올려야 저장된 요약이 무효화됨
+SUMMARY_PROMPT_VERSION = "v2"
+
+# ✅ 긴 기사 분할 요약 (map-reduce)
+#    정제된 본문의 추정 토큰 수가 SUMMARY_CHUNK_THRESHOLD_TOKENS 를 넘으면
+#    문장 경계로 SUMMARY_CHUNK_TOKENS 이하 조각으로 나눠 조각별 요약을 동시에 요청(map)하고,
+#    조각 요약들을 짧은 요청 한 번으로 합침(reduce). 그 이하는 기존처럼 한 번에 요약
+#    토크나이저 없이 글자 수 / SUMMARY_CHARS_PER_TOKEN 으로 토큰 수 추정 (한국어 기사 기준 대략값)
+SUMMARY_CHUNK_THRESHOLD_TOKENS = int(os.getenv("SUMMARY_CHUNK_THRESHOLD_TOKENS", "3000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500"))
+SUMMARY_MAX_CHUNKS = int(os.getenv("SUMMARY_MAX_CHUNKS", "16"))  # 넘는 부분은 잘라냄
+SUMMARY_CHARS_PER_TOKEN = float(os.getenv("SUMMARY_CHARS_PER_TOKEN", "1.5"))
+SUMMARY_MAP_MAX_TOKENS = 160
+# 기사 하나의 조각 요약 동시 요청 수 (긴 기사 하나가 vLLM 동시 요청 슬롯을 독차지하지 않도록)
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+# 조각 요약은 여러 번 나눠 보내므로 대기열에서 기다리는 시간을 더 길게 허용
+SUMMARY_MAP_QUEUE_TIMEOUT = float(os.getenv("SUMMARY_MAP_QUEUE_TIMEOUT", "30"))
+
+# ✅ 모든 요약 프롬프트(단일 / 조각 / 합치기)가 공유하는 고정 지시문
+#    프롬프트 앞부분이 글자 하나까지 같아야 vLLM prefix caching 이 이 부분의 KV 캐시를 재사용함
+SUMMARY_PROMPT_PREFIX = """다음은 뉴스 기사 정리 작업입니다. 본문의 핵심 정보만 간결하게 정리할 것.
 
 조건:
 - "요약" 이라는 단어를 사용 금지
-- 요약을 작성하되, 같은 사실이나 숫자를 반복하지 말 것.
+- 같은 사실이나 숫자를 반복하지 말 것.
+"""
 
+CallbackMetric("rag_summarize_chunk_threshold_tokens", "Estimated article tokens above which summaries use map-reduce",
+               "gauge", (), lambda: {(): SUMMARY_CHUNK_THRESHOLD_TOKENS})
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / SUMMARY_CHARS_PER_TOKEN) + 1
+
+
+def build_summary_prompt(article_text):
+    cleaned_text = clean_article_text(article_text)
+    return f"""{SUMMARY_PROMPT_PREFIX}
+[작업] 기사 전체를 3문장 이내로 정리
 
 [본문]
 {cleaned_text}
 """
-    raw_summary = call_vllm(prompt, max_tokens=512)  # ❌ stop 제거
+
+
+def build_chunk_prompt(chunk: str, index: int, total: int):
+    return f"""{SUMMARY_PROMPT_PREFIX}
+[작업] 긴 기사의 일부({index}/{total})입니다. 이 부분의 핵심 사실만 2문장 이내로 정리
+
+[본문]
+{chunk}
+"""
+
+
+def build_reduce_prompt(partial_summaries):
+    joined = "\n".join(f"- {text}" for text in partial_summaries)
+    return f"""{SUMMARY_PROMPT_PREFIX}
+[작업] 아래는 한 기사를 부분별로 정리한 내용입니다. 기사 전체를 3문장 이내로 정리
+
+[부분별 정리]
+{joined}
+"""
+
+
+# ✅ 문장 경계(. ! ? 뒤 공백)로 나눠 토큰 예산 안에서 이어 붙임, 한 문장이 예산보다 길면 글자 수로 자름
+def split_into_chunks(cleaned_text: str, max_tokens: int = SUMMARY_CHUNK_TOKENS):
+    max_chars = max(1, int(max_tokens * SUMMARY_CHARS_PER_TOKEN))
+    chunks, current = [], ""
+    for sentence in re.split(r"(?<=[.!?。])\s+", cleaned_text):
+        pieces = [sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars)] or [""]
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def needs_chunking(article_text) -> bool:
+    return estimate_tokens(clean_article_text(article_text)) > SUMMARY_CHUNK_THRESHOLD_TOKENS
+
+
+# ✅ map 단계: 조각별 요약을 동시에 요청 (동시 요청 수는 llm_gate 가 제한)
+#    조각 하나라도 실패하면 불완전한 요약이 저장되지 않도록 그 오류 문자열을 반환
+async def summarize_chunks(article_text):
+    chunks = split_into_chunks(clean_article_text(article_text))
+    if len(chunks) > SUMMARY_MAX_CHUNKS:
+        print(f"⚠️ 조각 {len(chunks)}개 중 앞 {SUMMARY_MAX_CHUNKS}개만 요약")
+        chunks = chunks[:SUMMARY_MAX_CHUNKS]
+    SUMMARY_CHUNKS.observe(len(chunks))
+    print(f"✂️ 긴 기사 분할 요약: 조각 {len(chunks)}개")
+
+    semaphore = asyncio.Semaphore(max(1, SUMMARY_MAP_CONCURRENCY))
+
+    async def summarize_chunk(i, chunk):
+        async with semaphore:
+            return await call_vllm(build_chunk_prompt(chunk, i, len(chunks)), max_tokens=SUMMARY_MAP_MAX_TOKENS,
+                                   queue_timeout=SUMMARY_MAP_QUEUE_TIMEOUT)
+
+    with STAGE_SECONDS.time(stage="summarize_map"):
+        partials = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, 1)))
+    for partial in partials:
+        if is_llm_error(partial):
+            return partial
+    return [clean_sentences_preserve_meaning(partial) for partial in partials]
+
+
+async def call_vllm_summarize_article(article_text, user_question=None):
+    if needs_chunking(article_text):
+        SUMMARY_REQUESTS.inc(mode="chunked")
+        partials = await summarize_chunks(article_text)
+        if isinstance(partials, str):
+            return partials
+        with STAGE_SECONDS.time(stage="summarize_reduce"):
+            raw_summary = await call_vllm(build_reduce_prompt(partials), max_tokens=512)
+        return raw_summary if is_llm_error(raw_summary) else clean_sentences_preserve_meaning(raw_summary)
+
+    SUMMARY_REQUESTS.inc(mode="single")
+    prompt = build_summary_prompt(article_text)
+    with STAGE_SECONDS.time(stage="summarize"):
+        raw_summary = await call_vllm(prompt, max_tokens=512)  # ❌ stop 제거
     return clean_sentences_preserve_meaning(raw_summary)
 
 
+# ✅ 여러 기사 요약을 한 번의 vLLM 요청으로 처리 (긴 기사는 따로 분할 요약을 동시에 실행)
+async def call_vllm_summarize_articles(article_texts):
+    long_indexes = [i for i, text in enumerate(article_texts) if needs_chunking(text)]
+    short_indexes = [i for i in range(len(article_texts)) if i not in set(long_indexes)]
+
+    async def summarize_short():
+        prompts = [build_summary_prompt(article_texts[i]) for i in short_indexes]
+        SUMMARY_REQUESTS.inc(len(prompts), mode="single")
+        with STAGE_SECONDS.time(stage="summarize_batch"):
+            return await call_vllm_batch(prompts, max_tokens=512)
+
+    raw_short, long_summaries = await asyncio.gather(
+        summarize_short(),
+        asyncio.gather(*(call_vllm_summarize_article(article_texts[i]) for i in long_indexes))
+    )
+
+    results = [None] * len(article_texts)
+    for i, raw in zip(short_indexes, raw_short):
+        results[i] = raw if is_llm_error(raw) else clean_sentences_preserve_meaning(raw)
+    for i, summary in zip(long_indexes, long_summaries):
+        results[i] = summary
+    return results
+
+
+# ✅ 스트리밍 요약 (정제된 텍스트 조각을 도착하는 대로 yield)
+#    긴 기사는 map 단계를 끝낸 뒤 reduce 응답만 스트리밍
+async def stream_summarize_article(article_text, user_question=None):
+    if needs_chunking(article_text):
+        SUMMARY_REQUESTS.inc(mode="chunked")
+        partials = await summarize_chunks(article_text)
+        if isinstance(partials, str):
+            raise RuntimeError(f"조각 요약 실패: {partials}")
+        prompt = build_reduce_prompt(partials)
+    else:
+        SUMMARY_REQUESTS.inc(mode="single")
+        prompt = build_summary_prompt(article_text)
+    cleaner = IncrementalSentenceCleaner()
+    with STAGE_SECONDS.time(stage="summarize_stream"):
+        async for chunk in stream_vllm(prompt, max_tokens=512):
+            delta = cleaner.feed(chunk)
+            if delta:
+                yield delta
+    delta = cleaner.finish()
+    if delta:
+        yield delta
 
 
 # ✅ 5️⃣ 문장 정제 함수
@@ -92,6 +529,33 @@ def clean_sentences_preserve_meaning(text: str) -> str:
     return text
 
 
+# ✅ clean_sentences_preserve_meaning 의 스트리밍 버전
+#    - 아직 닫히지 않은 태그('<' 이후)와 끝 공백은 다음 조각이 올 때까지 보류
+#    - 지금까지 보낸 텍스트 뒤에 이어 붙일 부분만 반환
+class IncrementalSentenceCleaner:
+    def __init__(self):
+        self.raw = ""
+        self.sent = ""
+
+    def _emit(self, cleaned: str) -> str:
+        if not cleaned.startswith(self.sent):
+            return ""
+        delta = cleaned[len(self.sent):]
+        self.sent = cleaned
+        return delta
+
+    def feed(self, chunk: str) -> str:
+        self.raw += chunk
+        safe = self.raw
+        open_tag = safe.rfind("<")
+        if open_tag > safe.rfind(">"):
+            safe = safe[:open_tag]
+        return self._emit(clean_sentences_preserve_meaning(safe))
+
+    def finish(self) -> str:
+        return self._emit(clean_sentences_preserve_meaning(self.raw))
+
+
 # ✅ 6️⃣ 기사 본문 정제 함수
 def clean_article_text(text: str) -> str:
     text = text.replace('\n', ' ').replace('\r', ' ')